@@ -0,0 +1,47 @@
+"""
+Run the benchmark suite against the mock hardware.
+
+    python -m benchmarks --output bench_results.json
+    python -m benchmarks --compare bench_results.json
+    python -m benchmarks --check-budgets
+"""
+import argparse
+import sys
+
+from . import bench_execute_command, bench_position_state_machine, bench_robot_server  # noqa: F401  (registers the benchmarks)
+from .runner import BENCHMARKS, check_import_budgets, compare, over_budget, run, write
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks")
+    parser.add_argument("names", nargs="*", help=f"benchmarks to run, out of: {', '.join(BENCHMARKS)}")
+    parser.add_argument("--output", default="bench_results.json", help="JSON file to write the results to")
+    parser.add_argument("--compare", metavar="BASELINE", help="JSON results of a previous run to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.1, help="allowed slowdown before failing, e.g. 0.1")
+    parser.add_argument("--check-budgets", action="store_true",
+                        help="fail if a benchmark or a module import is slower than its budget")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--min-time", type=float, default=0.2, help="seconds spent per timing repetition")
+    arguments = parser.parse_args()
+
+    results = run(arguments.names, repeat=arguments.repeat, min_time=arguments.min_time)
+    for result in results:
+        print(f"{result.name:40} {result.ops_per_second:>16,.0f} ops/s")
+    write(results, arguments.output)
+
+    failed = False
+    if arguments.compare:
+        regressions = compare(results, arguments.compare, arguments.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        failed = bool(regressions)
+    if arguments.check_budgets:
+        violations = over_budget(results) + check_import_budgets()
+        for violation in violations:
+            print(f"OVER BUDGET {violation}")
+        failed = failed or bool(violations)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,187 @@
+"""
+Hot path of CleaningRobot against the mock hardware.
+"""
+from mock import GPIO
+from src.cleaning_robot import CleaningRobot
+from src.position_state_manager import PositionStateMachineContext, PositionStatus, NorthState, Pose
+
+from .runner import benchmark, import_budget
+
+ROUTE_LENGTH = 1000
+
+# Importing the robot must not pull in the GPIO and I2C libraries, see select_backend
+import_budget("src.cleaning_robot", 3)
+
+
+class FixedReading:
+    """
+    Sensor returning a constant value, so that the benchmark measures the robot and not a mock library
+    """
+
+    def __init__(self, value: int) -> None:
+        self.value = value
+
+    def get_temperature(self) -> int:
+        return self.value
+
+    def get_charge_left(self) -> int:
+        return self.value
+
+
+def make_robot(charge: int = 90, obstacle: bool = False) -> CleaningRobot:
+    GPIO.reset()
+    robot = CleaningRobot()
+    robot.initialize_robot()
+    robot.ltc2990 = FixedReading(50)
+    robot.ibs = FixedReading(charge)
+    GPIO.set_input(robot.INFRARED_PIN, obstacle)
+    return robot
+
+
+@benchmark("execute_command.turn", operations=ROUTE_LENGTH)
+def bench_turn():
+    robot = make_robot()
+
+    def run():
+        execute_command = robot.execute_command
+        for _ in range(ROUTE_LENGTH):
+            execute_command("l")
+    return run
+
+
+@benchmark("execute_command.forward", operations=ROUTE_LENGTH)
+def bench_forward():
+    robot = make_robot()
+
+    def run():
+        robot.initialize_robot()
+        execute_command = robot.execute_command
+        for _ in range(ROUTE_LENGTH):
+            execute_command("f")
+    return run
+
+
+@benchmark("execute_command.forward_obstacle", operations=ROUTE_LENGTH)
+def bench_forward_obstacle():
+    robot = make_robot(obstacle=True)
+
+    def run():
+        execute_command = robot.execute_command
+        for _ in range(ROUTE_LENGTH):
+            execute_command("f")
+    return run
+
+
+@benchmark("execute_command.low_battery", operations=ROUTE_LENGTH)
+def bench_low_battery():
+    robot = make_robot(charge=5)
+
+    def run():
+        execute_command = robot.execute_command
+        for _ in range(ROUTE_LENGTH):
+            execute_command("f")
+    return run
+
+
+@benchmark("execute_commands.route", operations=ROUTE_LENGTH)
+def bench_execute_commands():
+    robot = make_robot()
+    route = "ffrfl" * (ROUTE_LENGTH // 5)
+
+    def run():
+        robot.initialize_robot()
+        robot.execute_commands(route)
+    return run
+
+
+@benchmark("execute_commands.straight_runs", operations=ROUTE_LENGTH)
+def bench_straight_runs():
+    robot = make_robot()
+    route = ("f" * 9 + "l") * (ROUTE_LENGTH // 10)
+
+    def run():
+        robot.initialize_robot()
+        robot.execute_commands(route)
+    return run
+
+
+@benchmark("execute_commands.straight_runs_fused", operations=ROUTE_LENGTH)
+def bench_straight_runs_fused():
+    robot = make_robot()
+    route = ("f" * 9 + "l") * (ROUTE_LENGTH // 10)
+
+    def run():
+        robot.initialize_robot()
+        robot.execute_commands(route, fuse_forward=True)
+    return run
+
+
+@benchmark("position_status.parse", operations=ROUTE_LENGTH)
+def bench_position_status_parse():
+    statuses = [f"({x},{x + 1},N)" for x in range(ROUTE_LENGTH)]
+
+    def run():
+        for status in statuses:
+            PositionStatus(status)
+    return run
+
+
+@benchmark("pose.from_status", operations=ROUTE_LENGTH)
+def bench_pose_from_status():
+    statuses = [f"({x},{x + 1},N)" for x in range(ROUTE_LENGTH)]
+
+    def run():
+        for status in statuses:
+            Pose.from_status(status)
+    return run
+
+
+@benchmark("state_machine.transitions", operations=ROUTE_LENGTH)
+def bench_state_machine_transitions():
+    route = "lflfrfrffl" * (ROUTE_LENGTH // 10)
+
+    def run():
+        context = PositionStateMachineContext(NorthState())
+        pose = Pose(0, 0, "N")
+        for command in route:
+            if command == "l":
+                context.left_pose(pose)
+            elif command == "r":
+                context.right_pose(pose)
+            else:
+                context.forward_pose(pose, False)
+    return run
+
+
+@benchmark("state_machine.string_actions", operations=ROUTE_LENGTH)
+def bench_state_machine_string_actions():
+    route = "lflfrfrffl" * (ROUTE_LENGTH // 10)
+
+    def run():
+        context = PositionStateMachineContext(NorthState())
+        status = "(0,0,N)"
+        for command in route:
+            if command == "l":
+                x, y, heading = context.left_action(status)
+            elif command == "r":
+                x, y, heading = context.right_action(status)
+            else:
+                x, y, heading, _, _ = context.forward_action(status, False)
+            status = f"({x},{y},{heading})"
+    return run
+
+
+# Construction sets up no hardware, the pins and I2C devices come up on first use
+@benchmark("robot.construction", budget=30)
+def bench_construction():
+    return CleaningRobot
+
+
+@benchmark("robot.startup", budget=150)
+def bench_startup():
+    def run():
+        robot = CleaningRobot()
+        robot.initialize_robot()
+        robot.ibs = FixedReading(90)
+        robot.manage_cleaning_system()
+    return run
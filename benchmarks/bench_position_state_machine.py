@@ -0,0 +1,82 @@
+"""
+Transitions per second of the table-driven state machine against the
+class-per-state design it replaced, taken verbatim from the baseline.
+
+Run with: python -m benchmarks.bench_position_state_machine
+"""
+import timeit
+
+from src.position_state_manager import PositionStateMachineContext, NorthState, Pose
+
+from . import baseline_position_state_manager as baseline
+from .runner import benchmark
+
+ROUTE = "lflfrfrffl" * 100
+
+
+def _run_status_route(context) -> None:
+    # The string API the robot used before the integer Pose, supported by both designs
+    status = "(0,0,N)"
+    for command in ROUTE:
+        if command == "l":
+            x, y, heading = context.left_action(status)
+        elif command == "r":
+            x, y, heading = context.right_action(status)
+        else:
+            x, y, heading, _, _ = context.forward_action(status, False)
+        status = f"({x},{y},{heading})"
+
+
+@benchmark("state_machine.baseline_class_per_state", operations=len(ROUTE))
+def bench_baseline():
+    return run_baseline
+
+
+def run_baseline() -> None:
+    _run_status_route(baseline.PositionStateMachineContext(baseline.NorthState()))
+
+
+@benchmark("state_machine.table_driven_status", operations=len(ROUTE))
+def bench_table_status():
+    return run_table_status
+
+
+def run_table_status() -> None:
+    _run_status_route(PositionStateMachineContext(NorthState()))
+
+
+@benchmark("state_machine.table_driven", operations=len(ROUTE))
+def bench_table():
+    return run_table
+
+
+def run_table() -> None:
+    context = PositionStateMachineContext(NorthState())
+    pose = Pose(0, 0, "N")
+    for command in ROUTE:
+        if command == "l":
+            context.left_pose(pose)
+        elif command == "r":
+            context.right_pose(pose)
+        else:
+            context.forward_pose(pose, False)
+
+
+def transitions_per_second(function, repeat: int = 5, number: int = 200) -> float:
+    best = min(timeit.repeat(function, repeat=repeat, number=number))
+    return len(ROUTE) * number / best
+
+
+def main() -> None:
+    baseline_rate = transitions_per_second(run_baseline)
+    status_rate = transitions_per_second(run_table_status)
+    table_rate = transitions_per_second(run_table)
+    print(f"baseline class-per-state, status strings: {baseline_rate:,.0f} transitions/s")
+    print(f"table-driven, status strings:             {status_rate:,.0f} transitions/s "
+          f"({status_rate / baseline_rate:.2f}x)")
+    print(f"table-driven, integer pose:               {table_rate:,.0f} transitions/s "
+          f"({table_rate / baseline_rate:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,26 @@
+"""
+Commands pipelined to a RobotServer over a local TCP connection.
+"""
+import asyncio
+
+from src.robot_server import RobotClient, RobotServer
+
+from .bench_execute_command import make_robot
+from .runner import benchmark
+
+ROUTE_LENGTH = 1000
+ROBOTS = 4
+
+
+async def _session(route: str) -> None:
+    async with RobotServer({robot_id: make_robot() for robot_id in range(ROBOTS)}) as server:
+        address = await server.start_tcp()
+        async with await RobotClient.connect_tcp(*address) as client:
+            await asyncio.gather(*(client.execute_commands(robot_id, route) for robot_id in range(ROBOTS)))
+
+
+# Server and connection setup included, so this is a lower bound of the sustained rate
+@benchmark("robot_server.pipelined", operations=ROBOTS * ROUTE_LENGTH, budget=400)
+def bench_pipelined():
+    route = "ffrfl" * (ROUTE_LENGTH // 5)
+    return lambda: asyncio.run(_session(route))
@@ -0,0 +1,183 @@
+"""
+Minimal benchmark harness: registered benchmarks are timed with timeit and the
+results are written as JSON, so that runs can be compared against each other.
+"""
+import json
+import os
+import platform
+import subprocess
+import sys
+import timeit
+from dataclasses import dataclass, asdict
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional
+
+BENCHMARKS: Dict[str, "Benchmark"] = {}
+# Import time allowed for a module in a fresh interpreter, imports included, as a multiple of IMPORT_REFERENCE
+IMPORT_BUDGETS: Dict[str, float] = {}
+
+# Budgets are multiples of these references, timed on the same machine, so that they hold on any machine
+REFERENCE = "runner.reference"
+IMPORT_REFERENCE = "asyncio"
+
+# Root of the repository, so that the modules are importable by the interpreters started for the imports
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@dataclass
+class Benchmark:
+    name: str
+    setup: Callable[[], Callable[[], None]]
+    operations: int = 1
+    # Time allowed per operation as a multiple of the REFERENCE operation, None for no limit
+    budget: Optional[float] = None
+
+
+@dataclass
+class BenchmarkResult:
+    name: str
+    ops_per_second: float
+    best_seconds: float
+    number: int
+    repeat: int
+
+
+def benchmark(name: str, operations: int = 1, budget: Optional[float] = None):
+    """
+    Register a benchmark. The decorated function prepares the fixture and returns
+    the callable to time; `operations` is how many operations one call performs and
+    `budget` how many REFERENCE operations one operation may take at most.
+    """
+    def register(setup: Callable[[], Callable[[], None]]):
+        BENCHMARKS[name] = Benchmark(name, setup, operations, budget)
+        return setup
+    return register
+
+
+def import_budget(module: str, ratio: float) -> None:
+    """
+    :param ratio: import time allowed, as a multiple of the import time of IMPORT_REFERENCE
+    """
+    IMPORT_BUDGETS[module] = ratio
+
+
+class _Pose:
+    __slots__ = ("x", "y", "heading")
+
+    def __init__(self, x: int, y: int, heading: str) -> None:
+        self.x = x
+        self.y = y
+        self.heading = heading
+
+
+@benchmark(REFERENCE)
+def bench_reference():
+    """
+    A plain Python pose and its status, the yardstick of the benchmark budgets
+    """
+    def run():
+        pose = _Pose(0, 0, "N")
+        return f"({pose.x},{pose.y},{pose.heading})"
+    return run
+
+
+def run(names: Optional[List[str]] = None, repeat: int = 5, min_time: float = 0.2) -> List[BenchmarkResult]:
+    results = []
+    for name, bench in BENCHMARKS.items():
+        if names and name not in names:
+            continue
+        function = bench.setup()
+        timer = timeit.Timer(function)
+        number, _ = timer.autorange()
+        number = max(1, int(number * min_time / 0.2))
+        best = min(timer.repeat(repeat=repeat, number=number)) / number
+        results.append(BenchmarkResult(name, bench.operations / best, best, number, repeat))
+    return results
+
+
+def write(results: List[BenchmarkResult], path: str) -> None:
+    document = {
+        "created": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "results": {result.name: asdict(result) for result in results},
+    }
+    with open(path, "w") as output:
+        json.dump(document, output, indent=2, sort_keys=True)
+
+
+def compare(results: List[BenchmarkResult], baseline_path: str, tolerance: float = 0.1) -> List[str]:
+    """
+    :return: a description of every benchmark slower than the baseline by more than `tolerance`
+    """
+    with open(baseline_path) as baseline_file:
+        baseline = json.load(baseline_file)["results"]
+    regressions = []
+    for result in results:
+        previous = baseline.get(result.name)
+        if previous is None:
+            continue
+        ratio = result.ops_per_second / previous["ops_per_second"]
+        if ratio < 1 - tolerance:
+            regressions.append(f"{result.name}: {ratio:.2f}x of baseline "
+                               f"({result.ops_per_second:,.0f} vs {previous['ops_per_second']:,.0f} ops/s)")
+    return regressions
+
+
+def over_budget(results: List[BenchmarkResult]) -> List[str]:
+    """
+    :return: a description of every benchmark slower than its budget; the REFERENCE
+        benchmark is run if it is not part of the results
+    """
+    reference = next((result for result in results if result.name == REFERENCE), None)
+    if reference is None:
+        reference, = run([REFERENCE])
+    violations = []
+    for result in results:
+        budget = BENCHMARKS[result.name].budget
+        if budget is None:
+            continue
+        ratio = reference.ops_per_second / result.ops_per_second
+        if ratio > budget:
+            violations.append(f"{result.name}: {1e6 / result.ops_per_second:,.1f} us per operation, "
+                              f"{ratio:,.1f}x the reference, budget {budget:,.1f}x")
+    return violations
+
+
+def import_seconds(module: str, repeat: int = 3) -> float:
+    """
+    Cumulative time to import a module in a fresh interpreter, as reported by python -X importtime
+    :param repeat: interpreters to start, the fastest import is reported
+    """
+    environment = dict(os.environ)
+    environment["PYTHONPATH"] = os.pathsep.join(filter(None, (ROOT, environment.get("PYTHONPATH"))))
+    best = None
+    for _ in range(repeat):
+        completed = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                                   capture_output=True, text=True, check=True, cwd=ROOT, env=environment)
+        for line in completed.stderr.splitlines():
+            # import time: self [us] | cumulative | imported package
+            fields = line.split("|")
+            if len(fields) == 3 and fields[2].strip() == module:
+                seconds = int(fields[1]) / 1e6
+                best = seconds if best is None else min(best, seconds)
+                break
+        else:
+            raise ValueError(f"No import time reported for {module}")
+    return best
+
+
+def check_import_budgets() -> List[str]:
+    """
+    :return: a description of every module slower to import than its budget
+    """
+    if not IMPORT_BUDGETS:
+        return []
+    reference = import_seconds(IMPORT_REFERENCE)
+    violations = []
+    for module, budget in IMPORT_BUDGETS.items():
+        seconds = import_seconds(module)
+        if seconds > budget * reference:
+            violations.append(f"import {module}: {seconds * 1e3:,.1f} ms, {seconds / reference:,.1f}x "
+                              f"import {IMPORT_REFERENCE}, budget {budget:,.1f}x")
+    return violations
@@ -4,6 +4,8 @@ Mock Library for RPi.GPIO
 
 import logging
 import os
+import time
+from array import array
 
 logger = logging.getLogger(__name__)
 
@@ -56,6 +58,143 @@ channel_config = {}
 #flags
 setModeDone = False
 
+# Simulation state: pin levels, scripted inputs and an optional transition trace
+MAX_CHANNEL = 64
+_levels = bytearray(MAX_CHANNEL)
+_scripts = {}
+_clock = time.perf_counter
+_trace = None
+_events = {}
+
+
+class Trace:
+    """
+    Preallocated ring buffer of (timestamp, channel, level) pin transitions
+    """
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.timestamps = array('d', bytes(8 * capacity))
+        self.channels = array('B', bytes(capacity))
+        self.levels = array('B', bytes(capacity))
+        self.count = 0
+
+    def record(self, timestamp, channel, level):
+        index = self.count % self.capacity
+        self.timestamps[index] = timestamp
+        self.channels[index] = channel
+        self.levels[index] = level
+        self.count += 1
+
+    def transitions(self):
+        """
+        Recorded transitions, oldest first, as (timestamp, channel, level) tuples
+        """
+        stored = min(self.count, self.capacity)
+        start = self.count - stored
+        return [(self.timestamps[i % self.capacity], self.channels[i % self.capacity], self.levels[i % self.capacity])
+                for i in range(start, self.count)]
+
+
+class EventDetect:
+    """
+    Edge detection enabled on a channel by add_event_detect
+    """
+    def __init__(self, edge, bouncetime):
+        self.edge = edge
+        self.bouncetime = bouncetime
+        self.callbacks = []
+        self.detected = False
+        self.last_callback = None
+
+    def matches(self, level):
+        return self.edge == BOTH or (self.edge == RISING) == (level == HIGH)
+
+
+def reset():
+    """
+    Simulation only: drop pin levels, scripted inputs, edge detection and the trace
+    """
+    global _trace
+    _levels[:] = bytes(MAX_CHANNEL)
+    _scripts.clear()
+    _events.clear()
+    channel_config.clear()
+    _trace = None
+
+
+def set_clock(clock):
+    """
+    Simulation only: time source used to timestamp the trace
+    """
+    global _clock
+    _clock = clock
+
+
+def enable_trace(capacity=65536):
+    """
+    Simulation only: start recording pin transitions into a buffer of the given capacity
+    """
+    global _trace
+    _trace = Trace(capacity)
+    return _trace
+
+
+def disable_trace():
+    global _trace
+    _trace = None
+
+
+def get_trace():
+    return _trace
+
+
+def set_input(channel, value):
+    """
+    Simulation only: drive the level seen by input() on a channel; a level change
+    is an edge for add_event_detect
+    """
+    _scripts.pop(channel, None)
+    _write(channel, value)
+
+
+def script_input(channel, values):
+    """
+    Simulation only: successive input() calls on the channel return the given levels;
+    the last level is kept once the script is exhausted
+    """
+    _scripts[channel] = iter(values)
+
+
+def get_level(channel):
+    """
+    Simulation only: current level of a channel
+    """
+    return _levels[channel]
+
+
+def _write(channel, value):
+    level = 1 if value else 0
+    if _levels[channel] != level:
+        _levels[channel] = level
+        if _trace is not None:
+            _trace.record(_clock(), channel, level)
+        event = _events.get(channel)
+        if event is not None and event.matches(level):
+            _fire(channel, event)
+
+
+def _fire(channel, event):
+    event.detected = True
+    if event.bouncetime:
+        now = _clock()
+        if event.last_callback is not None and (now - event.last_callback) * 1000 < event.bouncetime:
+            return
+        event.last_callback = now
+    # Callbacks run synchronously here, while RPi.GPIO runs them on its own thread
+    for callback in list(event.callbacks):
+        callback(channel)
+
+
 class Channel:
     def __init__(self,channel, direction, initial=0,pull_up_down=PUD_OFF):
         self.channel = channel
@@ -92,7 +231,7 @@ def setwarnings(flag):
     """
     Enable or disable warning messages
     """
-    logger.info("Set warnings as {}".format(flag))
+    logger.info("Set warnings as %s", flag)
 
 def setup(channel, direction, initial=0,pull_up_down=PUD_OFF):
     """
@@ -103,9 +242,13 @@ def setup(channel, direction, initial=0,pull_up_down=PUD_OFF):
     [initial]      - Initial value for an output channel
 
     """
-    logger.info("Setup channel : {} as {} with initial :{} and pull_up_down {}".format(channel,direction,initial,pull_up_down))
+    logger.info("Setup channel : %s as %s with initial :%s and pull_up_down %s", channel,direction,initial,pull_up_down)
     global channel_config
-    channel_config[channel] = Channel(channel, direction, initial, pull_up_down)
+    channels = channel if isinstance(channel, (list, tuple)) else [channel]
+    for single_channel in channels:
+        channel_config[single_channel] = Channel(single_channel, direction, initial, pull_up_down)
+        if direction == OUT:
+            _write(single_channel, initial)
 
 def output(channel, value):
     """
@@ -114,14 +257,33 @@ def output(channel, value):
     value   - 0/1 or False/True or LOW/HIGH
 
     """
-    logger.info("Output channel : {} with value : {}".format(channel, value))
+    logger.info("Output channel : %s with value : %s", channel, value)
+    if isinstance(channel, (list, tuple)):
+        if isinstance(value, (list, tuple)):
+            if len(channel) != len(value):
+                raise RuntimeError("Number of channels != number of values")
+            for single_channel, single_value in zip(channel, value):
+                _write(single_channel, single_value)
+        else:
+            for single_channel in channel:
+                _write(single_channel, value)
+    else:
+        _write(channel, value)
 
 def input(channel):
     """
     Input from a GPIO channel.  Returns HIGH=1=True or LOW=0=False
     channel - either board pin number or BCM number depending on which mode is set.
     """
-    logger.info("Reading from channel {}".format(channel))
+    logger.info("Reading from channel %s", channel)
+    script = _scripts.get(channel)
+    if script is not None:
+        for value in script:
+            _write(channel, value)
+            break
+        else:
+            del _scripts[channel]
+    return _levels[channel]
 
 def wait_for_edge(channel,edge,bouncetime,timeout):
     """
@@ -131,10 +293,10 @@ def wait_for_edge(channel,edge,bouncetime,timeout):
     [bouncetime] - time allowed between calls to allow for switchbounce
     [timeout]    - timeout in ms
     """
-    logger.info("Waiting for edge : {} on channel : {} with bounce time : {} and Timeout :{}".format(edge,channel,bouncetime,timeout))
+    logger.info("Waiting for edge : %s on channel : %s with bounce time : %s and Timeout :%s", edge,channel,bouncetime,timeout)
 
 
-def add_event_detect(channel,edge,callback,bouncetime):
+def add_event_detect(channel,edge,callback=None,bouncetime=None):
     """
     Enable edge detection events for a particular GPIO channel.
     channel      - either board pin number or BCM number depending on which mode is set.
@@ -142,14 +304,26 @@ def add_event_detect(channel,edge,callback,bouncetime):
     [callback]   - A callback function for the event (optional)
     [bouncetime] - Switch bounce timeout in ms for callback
     """
-    logger.info("Event detect added for edge : {} on channel : {} with bounce time : {} and callback {}".format(edge,channel,bouncetime,callback))
+    logger.info("Event detect added for edge : %s on channel : %s with bounce time : %s and callback %s", edge,channel,bouncetime,callback)
+    if edge not in (RISING, FALLING, BOTH):
+        raise ValueError("The edge must be set to RISING, FALLING or BOTH")
+    if channel in _events:
+        raise RuntimeError("Conflicting edge detection already enabled for this GPIO channel")
+    event = _events[channel] = EventDetect(edge, bouncetime)
+    if callback is not None:
+        event.callbacks.append(callback)
 
 def event_detected(channel):
     """
     Returns True if an edge has occurred on a given GPIO.  You need to enable edge detection using add_event_detect() first.
     channel - either board pin number or BCM number depending on which mode is set.
     """
-    logger.info("Waiting for even detection on channel :{}".format(channel))
+    logger.info("Waiting for even detection on channel :%s", channel)
+    event = _events.get(channel)
+    if event is None or not event.detected:
+        return False
+    event.detected = False
+    return True
 
 def add_event_callback(channel,callback):
     """
@@ -157,21 +331,26 @@ def add_event_callback(channel,callback):
     channel      - either board pin number or BCM number depending on which mode is set.
     callback     - a callback function
     """
-    logger.info("Event callback : {} added for channel : {}".format(callback,channel))
+    logger.info("Event callback : %s added for channel : %s", callback,channel)
+    event = _events.get(channel)
+    if event is None:
+        raise RuntimeError("Add event detection using add_event_detect first before adding a callback")
+    event.callbacks.append(callback)
 
 def remove_event_detect(channel):
     """
     Remove edge detection for a particular GPIO channel
     channel - either board pin number or BCM number depending on which mode is set.
     """
-    logger.info("Event detect removed for channel : {}".format(channel))
+    logger.info("Event detect removed for channel : %s", channel)
+    _events.pop(channel, None)
 
 def gpio_function(channel):
     """
     Return the current GPIO function (IN, OUT, PWM, SERIAL, I2C, SPI)
     channel - either board pin number or BCM number depending on which mode is set.
     """
-    logger.info("GPIO function of channel : {} is {}".format(channel,channel_config[channel].direction))
+    logger.info("GPIO function of channel : %s is %s", channel,channel_config[channel].direction)
 
 
 class PWM:
@@ -185,7 +364,7 @@ class PWM:
         self.dutycycle = 0
         global channel_config
         channel_config[channel] = Channel(channel,PWM,)
-        logger.info("Initialized PWM for channel : {} at frequency : {}".format(channel,frequency))
+        logger.info("Initialized PWM for channel : %s at frequency : %s", channel,frequency)
 
     # where dc is the duty cycle (0.0 <= dc <= 100.0)
     def start(self, dutycycle):
@@ -194,7 +373,7 @@ class PWM:
         dutycycle - the duty cycle (0.0 to 100.0)
         """
         self.dutycycle = dutycycle
-        logger.info("Start pwm on channel : {} with duty cycle : {}".format(self.channel,dutycycle))
+        logger.info("Start pwm on channel : %s with duty cycle : %s", self.channel,dutycycle)
 
     # where freq is the new frequency in Hz
     def ChangeFrequency(self, frequency):
@@ -202,7 +381,7 @@ class PWM:
         Change the frequency
         frequency - frequency in Hz (freq > 1.0)
         """
-        logger.info("Freqency changed for channel : {} from : {} -> to : {}".format(self.channel,self.frequency,frequency))
+        logger.info("Freqency changed for channel : %s from : %s -> to : %s", self.channel,self.frequency,frequency)
         self.frequency = frequency
 
     # where 0.0 <= dc <= 100.0
@@ -212,11 +391,11 @@ class PWM:
         dutycycle - between 0.0 and 100.0
         """
         self.dutycycle = dutycycle
-        logger.info("Dutycycle changed for channel : {} from : {} -> to : {}".format(self.channel,self.dutycycle,dutycycle))
+        logger.info("Dutycycle changed for channel : %s from : %s -> to : %s", self.channel,self.dutycycle,dutycycle)
 
     # stop PWM generation
     def stop(self):
-        logger.info("Stop PWM on channel : {} with duty cycle : {}".format(self.channel,self.dutycycle))
+        logger.info("Stop PWM on channel : %s with duty cycle : %s", self.channel,self.dutycycle)
 
 
 def cleanup(channel=None):
@@ -225,6 +404,9 @@ def cleanup(channel=None):
     [channel] - individual channel or list/tuple of channels to clean up.  Default - clean every channel that has been used.
     """
     if channel is not None:
-        logger.info("Cleaning up channel : {}".format(channel))
+        logger.info("Cleaning up channel : %s", channel)
+        for single_channel in channel if isinstance(channel, (list, tuple)) else [channel]:
+            _events.pop(single_channel, None)
     else:
-        logger.info("Cleaning up all channels")
\ No newline at end of file
+        logger.info("Cleaning up all channels")
+        _events.clear()
\ No newline at end of file
@@ -0,0 +1,95 @@
+from __future__ import annotations
+
+import asyncio
+from typing import Callable, Iterable, Optional
+
+from . import cleaning_robot
+from .cleaning_robot import MOTOR_WAIT, CleaningRobot, CommandBatchResult, Steps, T
+from .position_state_manager import Pose
+
+
+class AsyncCleaningRobot:
+    """
+    asyncio driver for a CleaningRobot: motor waits are awaited instead of blocking
+    the thread, so many robots, status queries and other peripherals can share one event loop.
+    """
+
+    def __init__(self, robot: Optional[CleaningRobot] = None, offload_io: Optional[bool] = None) -> None:
+        """
+        :param robot: the robot to drive, a new one is created if omitted
+        :param offload_io: run blocking I2C and GPIO calls in a worker thread;
+            defaults to True only when deploying on the actual hardware
+        """
+        self.robot = robot if robot is not None else CleaningRobot()
+        self.offload_io = cleaning_robot.is_deployment() if offload_io is None else offload_io
+        # One motor activation at a time per robot
+        self._lock = asyncio.Lock()
+
+    @property
+    def pose(self) -> Pose:
+        return self.robot.pose
+
+    def initialize_robot(self) -> None:
+        self.robot.initialize_robot()
+
+    def robot_status(self) -> str:
+        return self.robot.robot_status()
+
+    async def _io(self, function: Callable[..., T], *args) -> T:
+        if self.offload_io:
+            return await asyncio.to_thread(function, *args)
+        return function(*args)
+
+    async def _motor_wait(self) -> None:
+        # Without real hardware this still yields to the other tasks of the loop
+        await asyncio.sleep(self.robot._book_motor_activation())
+
+    async def execute_command(self, command: str) -> str:
+        async with self._lock:
+            return await self._run(self.robot._command_steps(command))
+
+    async def execute_commands(self, commands: Iterable[str], check_every: int = 1,
+                               fuse_forward: bool = False, optimize: bool = False) -> CommandBatchResult:
+        """
+        Async counterpart of CleaningRobot.execute_commands
+        """
+        async with self._lock:
+            return await self._run(self.robot._batch_steps(commands, check_every, fuse_forward, optimize))
+
+    async def manage_cleaning_system(self) -> None:
+        async with self._lock:
+            await self._run(self.robot._manage_cleaning_system_steps())
+
+    async def activate_wheel_motor(self) -> None:
+        await self._io(self.robot._start_wheel_motor)
+        await self._motor_wait()
+        await self._io(self.robot._stop_wheel_motor)
+
+    async def activate_rotation_motor(self, direction: str) -> None:
+        await self._io(self.robot._start_rotation_motor, direction)
+        await self._motor_wait()
+        await self._io(self.robot._stop_rotation_motor)
+
+    async def _run(self, steps: Steps[T]) -> T:
+        """
+        Async counterpart of CleaningRobot._run: the same command steps, with the motor
+        activations awaited and the hardware access offloaded if needed
+        """
+        robot = self.robot
+        result = None
+        try:
+            while True:
+                effect = steps.send(result)
+                if effect.__class__ is str:
+                    if effect == robot.FORWARD:
+                        result = await self.activate_wheel_motor()
+                    elif effect == MOTOR_WAIT:
+                        result = await self._motor_wait()
+                    else:
+                        result = await self.activate_rotation_motor(effect)
+                else:
+                    result = await self._io(effect)
+        except StopIteration as done:
+            return done.value
+        finally:
+            steps.close()
@@ -1,21 +1,111 @@
+from __future__ import annotations
+
+import os
+import threading
 import time
-from typing import Optional
+from dataclasses import dataclass, field
+from functools import partial
+from types import ModuleType
+from typing import Any, Callable, Generator, Iterable, List, NoReturn, Optional, Sequence, TypeVar, Union
 
 from mock.ltc2990 import LTC2990
-from .position_state_manager import PositionStateMachineContext, NorthState
-
-DEPLOYMENT = False  # This variable is to understand whether you are deploying on the actual hardware
-
-try:
-    import RPi.GPIO as GPIO
-    import board
-    import IBS
-
-    DEPLOYMENT = True
-except:
-    import mock.GPIO as GPIO
-    import mock.board as board
-    import mock.ibs as IBS
+from .command_optimizer import CommandOptimizer
+from .position_state_manager import PositionStateMachineContext, NorthState, Pose
+
+# Logic levels, the same in RPi.GPIO and in the mock
+HIGH = 1
+LOW = 0
+
+# Hardware backends
+RPI = "rpi"
+MOCK = "mock"
+AUTO = "auto"
+BACKEND_VARIABLE = "CLEANING_ROBOT_BACKEND"
+
+# Command steps yield their hardware access, see CleaningRobot._run
+T = TypeVar("T")
+Steps = Generator[Union[Callable[[], Any], str], Any, T]
+MOTOR_WAIT = "wait"
+
+
+@dataclass(frozen=True)
+class HardwareBackend:
+    name: str
+    gpio: ModuleType
+    board: ModuleType
+    ibs: ModuleType
+    deployment: bool
+
+
+_backend: Optional[HardwareBackend] = None
+
+
+def select_backend(name: Optional[str] = None) -> HardwareBackend:
+    """
+    Choose the GPIO and I2C libraries used by every robot from now on
+    :param name: "rpi", "mock" or "auto" to use the Raspberry Pi libraries when they can be
+        imported; defaults to $CLEANING_ROBOT_BACKEND, else "auto"
+    """
+    global _backend
+    if name is None:
+        name = os.environ.get(BACKEND_VARIABLE, AUTO)
+    if name == AUTO:
+        try:
+            backend = _load_backend(RPI)
+        except (ImportError, RuntimeError):  # RPi.GPIO raises RuntimeError when not on a Raspberry Pi
+            backend = _load_backend(MOCK)
+    else:
+        backend = _load_backend(name)
+    _backend = backend
+    return backend
+
+
+def get_backend() -> HardwareBackend:
+    """
+    The selected hardware backend, selected with the defaults on the first call if needed
+    """
+    return _backend if _backend is not None else select_backend()
+
+
+def is_deployment() -> bool:
+    """
+    Whether the hardware backend, selected with the defaults if needed, drives the actual hardware
+    """
+    return get_backend().deployment
+
+
+def _load_backend(name: str) -> HardwareBackend:
+    if name == RPI:
+        import RPi.GPIO as GPIO
+        import board
+        import IBS
+        return HardwareBackend(RPI, GPIO, board, IBS, deployment=True)
+    if name == MOCK:
+        import mock.GPIO as GPIO
+        import mock.board as board
+        import mock.ibs as IBS
+        return HardwareBackend(MOCK, GPIO, board, IBS, deployment=False)
+    raise CleaningRobotError(f"Unknown hardware backend {name}, expected {RPI}, {MOCK} or {AUTO}")
+
+
+class PinGroup:
+    """
+    A set of output pins written together with a single GPIO call
+    """
+    __slots__ = ("gpio", "pins")
+
+    def __init__(self, gpio: ModuleType, *pins: int) -> None:
+        self.gpio = gpio
+        self.pins = list(pins)
+
+    def setup(self, direction: int) -> None:
+        self.gpio.setup(self.pins, direction)
+
+    def apply(self, values: Sequence[int]) -> None:
+        """
+        :param values: one level per pin, in the order the pins were given
+        """
+        self.gpio.output(self.pins, values)
 
 
 class CleaningRobot:
@@ -43,86 +133,504 @@ class CleaningRobot:
     RIGHT = 'r'
     FORWARD = 'f'
 
+    # Duration of a single motor activation on the hardware
+    MOTOR_SECONDS = 1
+
+    # Motor state vectors, in the pin order of the wheel and rotation pin groups
+    WHEEL_FORWARD = (HIGH, LOW, HIGH, HIGH)  # AIN1, AIN2, PWMA, STBY
+    ROTATION_LEFT = (HIGH, LOW, HIGH, HIGH)  # BIN1, BIN2, PWMB, STBY
+    ROTATION_RIGHT = (LOW, HIGH, HIGH, HIGH)
+    MOTOR_STOP = (LOW, LOW, LOW, LOW)
+
+    # Peripherals brought up on first use instead of by the constructor, see __getattr__
+    PIN_ATTRIBUTES = frozenset(("gpio", "wheel_motor_pins", "rotation_motor_pins", "output_pins"))
+    I2C_ATTRIBUTES = frozenset(("ibs", "ltc2990"))
+
     def __init__(self):
-        GPIO.setmode(GPIO.BOARD)
-        GPIO.setwarnings(False)
-        GPIO.setup(self.INFRARED_PIN, GPIO.IN)
-        GPIO.setup(self.RECHARGE_LED_PIN, GPIO.OUT)
-        GPIO.setup(self.CLEANING_SYSTEM_PIN, GPIO.OUT)
-
-        GPIO.setup(self.PWMA, GPIO.OUT)
-        GPIO.setup(self.AIN2, GPIO.OUT)
-        GPIO.setup(self.AIN1, GPIO.OUT)
-        GPIO.setup(self.PWMB, GPIO.OUT)
-        GPIO.setup(self.BIN2, GPIO.OUT)
-        GPIO.setup(self.BIN1, GPIO.OUT)
-        GPIO.setup(self.STBY, GPIO.OUT)
-
-        ic2 = board.I2C()
-        self.ibs = IBS.IBS(ic2)
-        self.ltc2990 = LTC2990(ic2)
-
-        self.pos_x = None
-        self.pos_y = None
-        self.heading = None
+        # Pins and I2C devices are set up on first use, so that pose logic alone costs no hardware access
+        self._hardware_lock = threading.Lock()
+
+        self.pose = Pose(None, None, None)
         self.position_state_machine = PositionStateMachineContext(NorthState())
 
         self.recharge_led_on = False
         self.cleaning_system_on = False
 
+        # Optional SensorSampler serving recent readings instead of the I2C bus
+        self.sensor_sampler = None
+        # Optional VirtualClock advanced by motor activations instead of sleeping
+        self.clock = None
+        # Instrumentation filled by instrumentation.instrument(), None while not profiling
+        self.instrumentation = None
+        # Optional CommandJournal recording every executed command
+        self.journal = None
+        # Optional ObstacleMemory answering forward moves towards known obstacles
+        self.obstacle_memory = None
+        # Optional ThresholdWatch replacing the sensor reads of every safety check
+        self.threshold_watch = None
+        # Optional CoverageTracker of the cells cleaned
+        self.coverage = None
+        # Readings of the latest safety check, i.e. the ones that gated the latest command
+        self.last_temperature = None
+        self.last_charge = None
+
+        # Edge-triggered obstacle detection, see enable_edge_detection
+        self.edge_detection = False
+        self._obstacle_latched = threading.Event()
+        self._obstacle_present = False
+        self._obstacle_reported = False
+        self._obstacle_lock = threading.Lock()
+        self._wheel_running = False
+
+    def __getattr__(self, name: str):
+        # Only reached for attributes not set yet, i.e. peripherals before their first use
+        if name in CleaningRobot.PIN_ATTRIBUTES:
+            self._init_pins()
+        elif name in CleaningRobot.I2C_ATTRIBUTES:
+            self._init_i2c_devices()
+        else:
+            raise AttributeError(f"{type(self).__name__!r} object has no attribute {name!r}")
+        return self.__dict__[name]
+
+    def initialize_hardware(self) -> None:
+        """
+        Set up the pins and open the I2C devices now rather than on first use, e.g. to fail fast
+        """
+        self._init_pins()
+        self._init_i2c_devices()
+
+    @property
+    def hardware_initialized(self) -> bool:
+        return "gpio" in self.__dict__ and "ibs" in self.__dict__ and "ltc2990" in self.__dict__
+
+    def _init_pins(self) -> None:
+        with self._hardware_lock:
+            if "gpio" in self.__dict__:
+                return
+            gpio = get_backend().gpio
+            self.wheel_motor_pins = PinGroup(gpio, self.AIN1, self.AIN2, self.PWMA, self.STBY)
+            self.rotation_motor_pins = PinGroup(gpio, self.BIN1, self.BIN2, self.PWMB, self.STBY)
+            self.output_pins = PinGroup(gpio, self.RECHARGE_LED_PIN, self.CLEANING_SYSTEM_PIN,
+                                        self.PWMA, self.AIN2, self.AIN1,
+                                        self.PWMB, self.BIN2, self.BIN1, self.STBY)
+
+            gpio.setmode(gpio.BOARD)
+            gpio.setwarnings(False)
+            gpio.setup(self.INFRARED_PIN, gpio.IN)
+            self.output_pins.setup(gpio.OUT)
+            # Set last: the pins count as initialized only once the setup went through
+            self.gpio = gpio
+
+    def _init_i2c_devices(self) -> None:
+        with self._hardware_lock:
+            # Devices assigned by the caller, e.g. simulated ones, are kept
+            if "ibs" in self.__dict__ and "ltc2990" in self.__dict__:
+                return
+            backend = get_backend()
+            ic2 = backend.board.I2C()
+            if "ibs" not in self.__dict__:
+                self.ibs = backend.ibs.IBS(ic2)
+            if "ltc2990" not in self.__dict__:
+                self.ltc2990 = LTC2990(ic2)
+
+    @property
+    def pos_x(self) -> Optional[int]:
+        return self.pose.x
+
+    @pos_x.setter
+    def pos_x(self, value) -> None:
+        self.pose.x = None if value is None else int(value)
+
+    @property
+    def pos_y(self) -> Optional[int]:
+        return self.pose.y
+
+    @pos_y.setter
+    def pos_y(self, value) -> None:
+        self.pose.y = None if value is None else int(value)
+
+    @property
+    def heading(self) -> Optional[str]:
+        return self.pose.heading
+
+    @heading.setter
+    def heading(self, value: Optional[str]) -> None:
+        self.pose.heading = value
+
     def initialize_robot(self) -> None:
-        self.pos_x = "0"
-        self.pos_y = "0"
-        self.heading = "N"
+        self.pose = Pose(0, 0, "N")
         self.position_state_machine = PositionStateMachineContext(NorthState())
 
     def robot_status(self, obstacle_x: Optional[int] = None,
                      obstacle_y: Optional[int] = None) -> str:
-        current_status = f"({self.pos_x},{self.pos_y},{self.heading})"
+        pose = self.pose
+        current_status = f"({pose.x},{pose.y},{pose.heading})"
         if obstacle_x is not None and obstacle_y is not None:
             obstacle_pos = f"({obstacle_x},{obstacle_y})"
             return f"{current_status}{obstacle_pos}"
         return current_status
 
     def execute_command(self, command: str) -> str:
-        current_status = self.robot_status()
-        current_temp = self.ltc2990.get_temperature()
-        obstacle_x, obstacle_y = None, None
+        return self._run(self._command_steps(command))
+
+    def execute_commands(self, commands: Iterable[str], check_every: int = 1,
+                         fuse_forward: bool = False, optimize: bool = False) -> CommandBatchResult:
+        """
+        Execute a whole route, e.g. "ffrfl", in one call
+        :param commands: a command string or any iterable of single commands
+        :param check_every: run the temperature and battery checks once every `check_every` commands
+        :param fuse_forward: keep the wheel motor running across consecutive forward commands
+        :param optimize: replace wasteful turn sequences with the shortest equivalent ones first;
+            the final pose is the same, but there is no status for the removed turns
+        :return: the status after each executed command and the final status
+        """
+        return self._run(self._batch_steps(commands, check_every, fuse_forward, optimize))
+
+    def _run(self, steps: Steps[T]) -> T:
+        """
+        Drive command steps to completion, blocking on every motor activation.
+        AsyncCleaningRobot drives the same steps and awaits the motors instead.
+        """
+        result = None
+        try:
+            while True:
+                effect = steps.send(result)
+                if effect.__class__ is str:
+                    if effect == self.FORWARD:
+                        result = self.activate_wheel_motor()
+                    elif effect == MOTOR_WAIT:
+                        result = self._wait_for_motor()
+                    else:
+                        result = self.activate_rotation_motor(effect)
+                else:
+                    result = effect()
+        except StopIteration as done:
+            return done.value
+        finally:
+            steps.close()  # Runs the cleanup of the steps if an effect raised
+
+    # Command steps: generators holding the command logic shared with AsyncCleaningRobot.
+    # They yield their hardware access and get its result back:
+    #   - a callable: a GPIO or I2C call, e.g. self.obstacle_found
+    #   - FORWARD, LEFT or RIGHT: a whole motor activation
+    #   - MOTOR_WAIT: the wait of a motor started by a previous effect
+
+    def _command_steps(self, command: str) -> Steps[str]:
+        status = yield from self._check_safety_steps()
+        if status is None:
+            status = yield from self._move_steps(command)
+        self._record_command(command, status)
+        return status
+
+    def _batch_steps(self, commands: Iterable[str], check_every: int, fuse_forward: bool,
+                     optimize: bool) -> Steps[CommandBatchResult]:
+        if check_every < 1:
+            raise CleaningRobotError(f"check_every must be at least 1, got {check_every}")
+        optimizer = CommandOptimizer(self.heading) if optimize else None
+        if optimizer is not None:
+            commands = optimizer.optimize(commands)
+
+        if fuse_forward:
+            result = yield from self._execute_fused(commands, check_every)
+        else:
+            result = yield from self._execute_each(commands, check_every)
+        if optimizer is not None:
+            result.motor_activations_saved = optimizer.saved
+        return result
+
+    def _execute_each(self, commands: Iterable[str], check_every: int) -> Steps[CommandBatchResult]:
+        result = CommandBatchResult()
+        statuses = result.statuses
+        record_command = self._record_command
+        for step, command in enumerate(commands):
+            if step % check_every == 0:
+                low_battery_status = yield from self._check_safety_steps()
+                if low_battery_status is not None:
+                    statuses.append(low_battery_status)
+                    result.low_battery = True
+                    record_command(command, low_battery_status)
+                    break
+            status = yield from self._move_steps(command)
+            statuses.append(status)
+            record_command(command, status)
+
+        result.final_status = statuses[-1] if statuses else self.robot_status()
+        return result
+
+    def _execute_fused(self, commands: Iterable[str], check_every: int) -> Steps[CommandBatchResult]:
+        """
+        execute_commands where a run of forward commands is a single wheel motor activation.
+        The infrared sensor is still read before every cell and the motor stops as soon as
+        an obstacle shows up, so the statuses are the same as with one activation per command.
+        """
+        result = CommandBatchResult()
+        statuses = result.statuses
+        record_command = self._record_command
+        wheel_running = False
+        try:
+            for step, command in enumerate(commands):
+                if step % check_every == 0:
+                    low_battery_status = yield from self._check_safety_steps()
+                    if low_battery_status is not None:
+                        statuses.append(low_battery_status)
+                        result.low_battery = True
+                        record_command(command, low_battery_status)
+                        break
+                if command == self.FORWARD:
+                    status = None
+                    if self.obstacle_memory is not None:
+                        status = self._known_obstacle_status()
+                    if status is not None:
+                        has_obstacle_ahead = True
+                    elif self.edge_detection and not wheel_running:
+                        has_obstacle_ahead = yield self._start_wheel_motor_if_clear
+                        wheel_running = not has_obstacle_ahead
+                    else:
+                        has_obstacle_ahead = yield self.obstacle_found
+                        if not has_obstacle_ahead and not wheel_running:
+                            yield self._start_wheel_motor
+                            wheel_running = True
+                    if not has_obstacle_ahead:
+                        yield MOTOR_WAIT
+                        if self.edge_detection:  # The motor was cut out if an obstacle showed up meanwhile
+                            has_obstacle_ahead = yield self.obstacle_found
+                    if has_obstacle_ahead and wheel_running:
+                        yield self._stop_wheel_motor
+                        wheel_running = False
+                    if status is None:
+                        status = self._update_pose(command, has_obstacle_ahead)
+                else:
+                    if wheel_running:
+                        yield self._stop_wheel_motor
+                        wheel_running = False
+                    status = yield from self._move_steps(command)
+                statuses.append(status)
+                record_command(command, status)
+        finally:
+            if wheel_running:
+                # Not yielded: the steps may be closing, e.g. after a failed effect
+                self._stop_wheel_motor()
+
+        result.final_status = statuses[-1] if statuses else self.robot_status()
+        return result
+
+    def _record_command(self, command: str, status: str) -> None:
+        """
+        Report an executed command, whichever of the execute methods ran it
+        """
+        if self.journal is not None:
+            self.journal.record(command, status, self.last_temperature, self.last_charge, self.pose)
+        if self.instrumentation is not None:
+            self.instrumentation.count_command(command, status)
 
+    def _check_safety_steps(self) -> Steps[Optional[str]]:
+        """
+        Check temperature and battery before a move
+        :return: the low battery status if the robot cannot move, None otherwise
+        """
+        if self.threshold_watch is not None:
+            return (yield partial(self.threshold_watch.check_safety, self))
+        self.last_temperature = yield self._read_temperature
+        self._check_temperature(self.last_temperature)
+        self.last_charge = yield self._read_charge
+        return self._battery_status(self.last_charge)
+
+    def _read_temperature(self) -> int:
+        if self.sensor_sampler is not None:
+            current_temp = self.sensor_sampler.latest_temperature()
+            if current_temp is not None:
+                return current_temp
+        return self.ltc2990.get_temperature()
+
+    def _read_charge(self) -> int:
+        if self.sensor_sampler is not None:
+            charge_percentage = self.sensor_sampler.latest_charge()
+            if charge_percentage is not None:
+                return charge_percentage
+        return self.ibs.get_charge_left()
+
+    def _check_temperature(self, current_temp: int) -> None:
         if current_temp >= 70:
-            raise CleaningRobotError(f"Temperature exceeded safe limit! Current: {current_temp}°C")
-        if self.ibs.get_charge_left() <= 10:
-            return f"!{self.robot_status(obstacle_x, obstacle_y)}"
-
-        if command == "f":
-            has_obstacle_ahead = self.obstacle_found()
-            self.activate_wheel_motor()
-            self.pos_x, self.pos_y, self.heading, obstacle_x, obstacle_y = self.position_state_machine.forward_action(
-                current_status, has_obstacle_ahead)
-        elif command == "r":
-            self.activate_rotation_motor(command)
-            self.pos_x, self.pos_y, self.heading = self.position_state_machine.right_action(
-                current_status)
-        elif command == "l":
-            self.activate_rotation_motor(command)
-            self.pos_x, self.pos_y, self.heading = self.position_state_machine.left_action(
-                current_status)
-
-        return self.robot_status(obstacle_x=obstacle_x, obstacle_y=obstacle_y)
+            self._temperature_error(current_temp)
+
+    def _temperature_error(self, current_temp: int) -> NoReturn:
+        """
+        Raise the error of an unsafe temperature, once the journal is on disk
+        """
+        if self.journal is not None:
+            self.journal.flush()
+        raise CleaningRobotError(f"Temperature exceeded safe limit! Current: {current_temp}°C")
+
+    def _battery_status(self, charge_percentage: int) -> Optional[str]:
+        if charge_percentage <= 10:
+            return f"!{self.robot_status()}"
+        return None
+
+    def _move_steps(self, command: str) -> Steps[str]:
+        if command == self.FORWARD:
+            if self.obstacle_memory is not None:
+                known_obstacle_status = self._known_obstacle_status()
+                if known_obstacle_status is not None:
+                    return known_obstacle_status
+            if self.edge_detection:
+                return (yield from self._move_forward_latched())
+            has_obstacle_ahead = yield self.obstacle_found
+            yield self.FORWARD
+            return self._update_pose(command, has_obstacle_ahead)
+        if command == self.RIGHT or command == self.LEFT:
+            yield command
+            if self.edge_detection:
+                # An obstacle latched under the previous heading is not ahead anymore
+                yield self._arm_obstacle_latch
+        return self._update_pose(command)
+
+    def _update_pose(self, command: str, has_obstacle_ahead: bool = False) -> str:
+        """
+        Apply a command to the pose once its motor activation is over
+        :return: the new status of the robot
+        """
+        if command == self.FORWARD:
+            obstacle = self.position_state_machine.forward_pose(self.pose, has_obstacle_ahead)
+            if obstacle is not None:
+                if self.obstacle_memory is not None:
+                    self.obstacle_memory.remember(obstacle)
+                return self.robot_status(obstacle[0], obstacle[1])
+            if self.coverage is not None:
+                self.coverage.record_move(self.pose.x, self.pose.y, self.cleaning_system_on)
+        elif command == self.RIGHT:
+            self.position_state_machine.right_pose(self.pose)
+        elif command == self.LEFT:
+            self.position_state_machine.left_pose(self.pose)
+        return self.robot_status()
+
+    def _known_obstacle_status(self) -> Optional[str]:
+        """
+        :return: the obstacle status if the cell ahead is a remembered obstacle, None otherwise
+        """
+        cell = self.position_state_machine.cell_ahead(self.pose)
+        if self.obstacle_memory.known(cell):
+            return self.robot_status(cell[0], cell[1])
+        return None
+
+    def _move_forward_latched(self) -> Steps[str]:
+        """
+        Forward move with edge detection: the motor does not start towards a latched
+        obstacle, and an obstacle showing up mid-move cuts it out and keeps the robot in its cell
+        """
+        if (yield self._start_wheel_motor_if_clear):
+            return self._update_pose(self.FORWARD, True)
+        yield MOTOR_WAIT
+        yield self._stop_wheel_motor
+        return self._update_pose(self.FORWARD, (yield self.obstacle_found))
+
+    def _start_wheel_motor_if_clear(self) -> bool:
+        """
+        Start the wheel motor unless an obstacle is latched. The check and the start are atomic
+        with respect to _on_infrared_edge: an edge either shows up in the check or stops the motor.
+        :return: True if an obstacle was latched, in which case the motor stays off
+        """
+        with self._obstacle_lock:
+            if self._consume_latched_obstacle():
+                return True
+            self._start_wheel_motor()
+        return False
 
     def obstacle_found(self) -> bool:
-        return GPIO.input(self.INFRARED_PIN)
+        if self.edge_detection:
+            return self._take_latched_obstacle()
+        return self.gpio.input(self.INFRARED_PIN)
+
+    def enable_edge_detection(self, bouncetime: Optional[int] = None) -> None:
+        """
+        Track the infrared sensor with GPIO edge events instead of polling it before every move.
+        A rising edge latches the obstacle flag and cuts out the wheel motor immediately.
+        :param bouncetime: switch bounce timeout in ms, see GPIO.add_event_detect
+        """
+        if self.edge_detection:
+            return
+        self._arm_obstacle_latch()
+        if bouncetime is None:
+            self.gpio.add_event_detect(self.INFRARED_PIN, self.gpio.BOTH, callback=self._on_infrared_edge)
+        else:
+            self.gpio.add_event_detect(self.INFRARED_PIN, self.gpio.BOTH, callback=self._on_infrared_edge,
+                                       bouncetime=bouncetime)
+        self.edge_detection = True
+
+    def _arm_obstacle_latch(self) -> None:
+        """
+        Latch the obstacle flag from the current sensor level, dropping what was latched before.
+        Unlike after a rising edge, the flag is only latched as long as the obstacle stays.
+        """
+        with self._obstacle_lock:
+            self._obstacle_present = bool(self.gpio.input(self.INFRARED_PIN))
+            self._obstacle_reported = self._obstacle_present
+            if self._obstacle_present:
+                self._obstacle_latched.set()
+            else:
+                self._obstacle_latched.clear()
+
+    def disable_edge_detection(self) -> None:
+        if self.edge_detection:
+            self.gpio.remove_event_detect(self.INFRARED_PIN)
+            self.edge_detection = False
+
+    def _on_infrared_edge(self, channel: int) -> None:
+        present = bool(self.gpio.input(channel))
+        with self._obstacle_lock:
+            self._obstacle_present = present
+            if present:
+                self._obstacle_latched.set()
+                self._obstacle_reported = False
+            elif self._obstacle_reported:
+                # Already reported while it was there, nothing left to latch
+                self._obstacle_latched.clear()
+            if present and self._wheel_running:
+                self._stop_wheel_motor()
+
+    def _take_latched_obstacle(self) -> bool:
+        """
+        :return: True if an obstacle was seen since the last call; the flag stays
+            latched while the obstacle is still there
+        """
+        with self._obstacle_lock:
+            return self._consume_latched_obstacle()
+
+    def _consume_latched_obstacle(self) -> bool:
+        # Called with _obstacle_lock held
+        latched = self._obstacle_latched.is_set()
+        if latched:
+            if self._obstacle_present:
+                self._obstacle_reported = True
+            else:
+                self._obstacle_latched.clear()
+        return latched
 
     def manage_cleaning_system(self) -> None:
-        charge_percentage = self.ibs.get_charge_left()
-        if charge_percentage > 10:
-            GPIO.output(self.CLEANING_SYSTEM_PIN, GPIO.HIGH)
-            GPIO.output(self.RECHARGE_LED_PIN, GPIO.LOW)
+        self._run(self._manage_cleaning_system_steps())
+
+    def _manage_cleaning_system_steps(self) -> Steps[None]:
+        if self.threshold_watch is not None:
+            battery_low = yield self.threshold_watch.battery_low
+            yield partial(self._switch_cleaning_system, not battery_low)
+        else:
+            charge_percentage = yield self._read_charge
+            yield partial(self._set_cleaning_system, charge_percentage)
+
+    def _set_cleaning_system(self, charge_percentage: int) -> None:
+        self._switch_cleaning_system(charge_percentage > 10)
+
+    def _switch_cleaning_system(self, on: bool) -> None:
+        """
+        Turn the cleaning system on and the recharge LED off, or the other way around
+        """
+        if on:
+            self.gpio.output(self.CLEANING_SYSTEM_PIN, HIGH)
+            self.gpio.output(self.RECHARGE_LED_PIN, LOW)
             self.cleaning_system_on = True
             self.recharge_led_on = False
         else:
-            GPIO.output(self.CLEANING_SYSTEM_PIN, GPIO.LOW)
-            GPIO.output(self.RECHARGE_LED_PIN, GPIO.HIGH)
+            self.gpio.output(self.CLEANING_SYSTEM_PIN, LOW)
+            self.gpio.output(self.RECHARGE_LED_PIN, HIGH)
             self.cleaning_system_on = False
             self.recharge_led_on = True
 
@@ -130,46 +638,65 @@ class CleaningRobot:
         """
         Let the robot move forward by activating its wheel motor
         """
-        # Drive the motor clockwise
-        GPIO.output(self.AIN1, GPIO.HIGH)
-        GPIO.output(self.AIN2, GPIO.LOW)
-        # Set the motor speed
-        GPIO.output(self.PWMA, GPIO.HIGH)
-        # Disable STBY
-        GPIO.output(self.STBY, GPIO.HIGH)
-
-        if DEPLOYMENT:  # Sleep only if you are deploying on the actual hardware
-            time.sleep(1)  # Wait for the motor to actually move
-
-        # Stop the motor
-        GPIO.output(self.AIN1, GPIO.LOW)
-        GPIO.output(self.AIN2, GPIO.LOW)
-        GPIO.output(self.PWMA, GPIO.LOW)
-        GPIO.output(self.STBY, GPIO.LOW)
+        self._start_wheel_motor()
+        self._wait_for_motor()
+        self._stop_wheel_motor()
 
     def activate_rotation_motor(self, direction) -> None:
         """
         Let the robot rotate towards a given direction
         :param direction: "l" to turn left, "r" to turn right
         """
+        self._start_rotation_motor(direction)
+        self._wait_for_motor()
+        self._stop_rotation_motor()
+
+    def _wait_for_motor(self) -> None:
+        seconds = self._book_motor_activation()
+        if seconds:
+            time.sleep(seconds)  # Wait for the motor to actually move
+
+    def _book_motor_activation(self) -> float:
+        """
+        Account for a motor activation
+        :return: the seconds to actually wait for the motor
+        """
+        if self.coverage is not None:
+            self.coverage.record_motor(self.MOTOR_SECONDS)
+        if self.clock is not None:  # Simulated time: advance the virtual clock instead of sleeping
+            self.clock.advance(self.MOTOR_SECONDS, motor_running=True)
+            return 0
+        # Sleep only if you are deploying on the actual hardware
+        return self.MOTOR_SECONDS if is_deployment() else 0
+
+    def _start_wheel_motor(self) -> None:
+        # Drive the motor clockwise at full speed, with STBY disabled
+        self.wheel_motor_pins.apply(self.WHEEL_FORWARD)
+        self._wheel_running = True
+
+    def _stop_wheel_motor(self) -> None:
+        self.wheel_motor_pins.apply(self.MOTOR_STOP)
+        self._wheel_running = False
+
+    def _start_rotation_motor(self, direction) -> None:
         if direction == self.LEFT:
-            GPIO.output(self.BIN1, GPIO.HIGH)
-            GPIO.output(self.BIN2, GPIO.LOW)
+            self.rotation_motor_pins.apply(self.ROTATION_LEFT)
         elif direction == self.RIGHT:
-            GPIO.output(self.BIN1, GPIO.LOW)
-            GPIO.output(self.BIN2, GPIO.HIGH)
+            self.rotation_motor_pins.apply(self.ROTATION_RIGHT)
+        else:
+            self.gpio.output([self.PWMB, self.STBY], [HIGH, HIGH])
 
-        GPIO.output(self.PWMB, GPIO.HIGH)
-        GPIO.output(self.STBY, GPIO.HIGH)
+    def _stop_rotation_motor(self) -> None:
+        self.rotation_motor_pins.apply(self.MOTOR_STOP)
 
-        if DEPLOYMENT:  # Sleep only if you are deploying on the actual hardware
-            time.sleep(1)  # Wait for the motor to actually move
 
-        # Stop the motor
-        GPIO.output(self.BIN1, GPIO.LOW)
-        GPIO.output(self.BIN2, GPIO.LOW)
-        GPIO.output(self.PWMB, GPIO.LOW)
-        GPIO.output(self.STBY, GPIO.LOW)
+@dataclass
+class CommandBatchResult:
+    statuses: List[str] = field(default_factory=list)
+    final_status: str = ""
+    low_battery: bool = False
+    # Turns removed by the command optimizer
+    motor_activations_saved: int = 0
 
 
 class CleaningRobotError(Exception):
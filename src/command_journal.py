@@ -0,0 +1,234 @@
+from __future__ import annotations
+
+import os
+import struct
+import time
+from typing import Callable, Iterator, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from .cleaning_robot import CleaningRobot, CleaningRobotError
+from .position_state_manager import STATE_BY_HEADING, PositionStateMachineContext, Pose
+from .room_map import RoomMap
+
+MAGIC = b"CRJ1"
+HEADER = struct.Struct("<4sHH")  # magic, record size, reserved
+
+# One fixed-width little-endian record per executed command
+RECORD = struct.Struct("<dIiiiihhccBx")
+RECORD_DTYPE = np.dtype([
+    ("timestamp", "<f8"),
+    ("sequence", "<u4"),
+    ("x", "<i4"),
+    ("y", "<i4"),
+    ("obstacle_x", "<i4"),
+    ("obstacle_y", "<i4"),
+    ("temperature", "<i2"),
+    ("charge", "<i2"),
+    ("command", "S1"),
+    ("heading", "S1"),
+    ("flags", "u1"),
+    ("reserved", "u1"),
+])
+
+# Record flags
+OBSTACLE = 1
+LOW_BATTERY = 2
+
+# Stored instead of a reading that was not taken, e.g. with a ThresholdWatch
+MISSING_READING = -32768
+# Stored instead of a command that is not a single ASCII character
+UNKNOWN_COMMAND = b"?"
+
+
+class JournalRecord(NamedTuple):
+    timestamp: float
+    sequence: int
+    command: str
+    temperature: Optional[int]
+    charge: Optional[int]
+    pose: Pose
+    obstacle: Optional[Tuple[int, int]]
+    low_battery: bool
+
+
+class CommandJournal:
+    """
+    Append-only binary journal of executed commands, the readings that gated them
+    and the resulting pose. Records are packed into a buffer and written in blocks:
+    when the buffer is full, once the oldest buffered record is max_age seconds old,
+    right after a low battery refusal and on close.
+    """
+
+    def __init__(self, path, buffer_records: int = 4096, max_age: float = 1.0,
+                 clock: Callable[[], float] = time.time) -> None:
+        """
+        :param max_age: seconds of the journal clock a record may stay buffered; checked
+            whenever a record is written, 0 writes every record right away
+        """
+        if buffer_records < 1:
+            raise CleaningRobotError(f"Journal buffer must hold at least 1 record, got {buffer_records}")
+        self.path = path
+        self.clock = clock
+        self.max_age = max_age
+        self._buffer = bytearray(buffer_records * RECORD.size)
+        self._offset = 0
+        self._oldest = 0.0
+        self._file = open(path, "ab")
+        size = self._file.tell()
+        if size == 0:
+            self._file.write(HEADER.pack(MAGIC, RECORD.size, 0))
+            self._file.flush()
+            self.sequence = 0
+        else:
+            try:
+                _check_header(path)
+            except CleaningRobotError:
+                self._file.close()
+                raise
+            # A torn record left by a crash is dropped before appending
+            complete = (size - HEADER.size) // RECORD.size
+            self._file.truncate(HEADER.size + complete * RECORD.size)
+            self._file.seek(0, os.SEEK_END)
+            self.sequence = complete
+
+    @classmethod
+    def for_robot(cls, robot: CleaningRobot, path, **kwargs) -> CommandJournal:
+        """
+        Create a journal and let the robot write every executed command to it
+        """
+        if robot.clock is not None:
+            kwargs.setdefault("clock", robot.clock)
+        journal = cls(path, **kwargs)
+        robot.journal = journal
+        return journal
+
+    def record(self, command: str, status: str, temperature: Optional[int], charge: Optional[int],
+               pose: Pose) -> None:
+        """
+        Append one command and the status execute_command returned for it
+        :param temperature: None if it was not read, likewise for the charge
+        """
+        flags = 0
+        obstacle_x = obstacle_y = 0
+        if status[0] == "!":
+            flags = LOW_BATTERY
+        else:
+            split_at = status.find(")(")
+            if split_at >= 0:
+                flags = OBSTACLE
+                obstacle_x, obstacle_y = map(int, status[split_at + 2:-1].split(","))
+        heading = pose.heading.encode() if pose.heading is not None else b"\0"
+        command_byte = command.encode() if len(command) == 1 and command.isascii() else UNKNOWN_COMMAND
+
+        if self._offset == len(self._buffer):
+            self.flush()
+        timestamp = self.clock()
+        if not self._offset:
+            self._oldest = timestamp
+        RECORD.pack_into(self._buffer, self._offset, timestamp, self.sequence,
+                         pose.x or 0, pose.y or 0, obstacle_x, obstacle_y,
+                         MISSING_READING if temperature is None else int(temperature),
+                         MISSING_READING if charge is None else int(charge),
+                         command_byte, heading, flags)
+        self._offset += RECORD.size
+        self.sequence += 1
+        if flags & LOW_BATTERY or timestamp - self._oldest >= self.max_age:
+            self.flush()
+
+    def flush(self) -> None:
+        if self._offset:
+            self._file.write(memoryview(self._buffer)[:self._offset])
+            self._offset = 0
+        self._file.flush()
+
+    def close(self) -> None:
+        if not self._file.closed:
+            self.flush()
+            self._file.close()
+
+    def __enter__(self) -> CommandJournal:
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def _check_header(path) -> None:
+    with open(path, "rb") as journal_file:
+        header = journal_file.read(HEADER.size)
+    if len(header) < HEADER.size:
+        raise CleaningRobotError(f"{path} is not a command journal")
+    magic, record_size, _ = HEADER.unpack(header)
+    if magic != MAGIC or record_size != RECORD.size:
+        raise CleaningRobotError(f"{path} is not a command journal")
+
+
+def _reading(value: np.int16) -> Optional[int]:
+    return None if value == MISSING_READING else int(value)
+
+
+class JournalReader:
+    """
+    Memory-mapped view of a command journal; `records` is a NumPy structured array,
+    so scans over millions of records run vectorized without loading the file.
+    """
+
+    def __init__(self, path) -> None:
+        _check_header(path)
+        count = (os.path.getsize(path) - HEADER.size) // RECORD.size
+        if count:
+            self.records = np.memmap(path, dtype=RECORD_DTYPE, mode="r", offset=HEADER.size, shape=(count,))
+        else:
+            self.records = np.zeros(0, dtype=RECORD_DTYPE)
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def __iter__(self) -> Iterator[JournalRecord]:
+        for record in self.records:
+            obstacle = (int(record["obstacle_x"]), int(record["obstacle_y"])) if record["flags"] & OBSTACLE else None
+            heading = record["heading"].decode() or None
+            yield JournalRecord(float(record["timestamp"]), int(record["sequence"]), record["command"].decode(),
+                                _reading(record["temperature"]), _reading(record["charge"]),
+                                Pose(int(record["x"]), int(record["y"]), heading),
+                                obstacle, bool(record["flags"] & LOW_BATTERY))
+
+    def commands(self) -> str:
+        """
+        Every journaled command, low battery refusals included, e.g. "ffrfl"
+        """
+        return self.records["command"].tobytes().decode()
+
+    def last_pose(self) -> Optional[Pose]:
+        if not len(self.records):
+            return None
+        last = self.records[-1]
+        return Pose(int(last["x"]), int(last["y"]), last["heading"].decode() or None)
+
+    def obstacles(self) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        :return: the x and y coordinates of every distinct obstacle found
+        """
+        found = self.records[(self.records["flags"] & OBSTACLE) != 0]
+        cells = np.unique(np.stack([found["obstacle_x"], found["obstacle_y"]], axis=1), axis=0)
+        return cells[:, 0].astype(np.int64), cells[:, 1].astype(np.int64)
+
+    def replay(self, robot: CleaningRobot) -> CleaningRobot:
+        """
+        Restore the pose a robot had when the last record was written
+        """
+        pose = self.last_pose()
+        if pose is None or pose.heading is None:
+            raise CleaningRobotError("The journal holds no pose to restore")
+        robot.pose = pose
+        robot.position_state_machine = PositionStateMachineContext(STATE_BY_HEADING[pose.heading])
+        return robot
+
+    def rebuild_map(self, room_map: RoomMap) -> int:
+        """
+        Store every journaled obstacle in the map
+        :return: the number of obstacles that were not known yet
+        """
+        xs, ys = self.obstacles()
+        return room_map.add_obstacles(xs, ys)
@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+from typing import Iterable, Iterator, Optional, Tuple
+
+from .position_state_manager import LEFT_TO, RIGHT_TO, STATE_BY_HEADING, TURNS
+
+
+class CommandOptimizer:
+    """
+    Peephole optimizer for command streams. Every run of turns between two other commands
+    is replaced by the shortest turn sequence reaching the same heading. The robot's turns are
+    not plain rotations (e.g. "r" while heading S keeps heading S, "lr" only cancels out from
+    N and W), so runs are rewritten from the heading they start at rather than by fixed patterns.
+    """
+
+    def __init__(self, heading: Optional[str]) -> None:
+        """
+        :param heading: heading of the robot when the first command runs; without one the
+            stream is passed through unchanged
+        """
+        state = STATE_BY_HEADING.get(heading) if heading is not None else None
+        self.heading = state.index if state is not None else None
+        self.commands_in = 0
+        self.commands_out = 0
+
+    @property
+    def saved(self) -> int:
+        """
+        Motor activations removed from the part of the stream produced so far
+        """
+        return self.commands_in - self.commands_out
+
+    def optimize(self, commands: Iterable[str]) -> Iterator[str]:
+        """
+        Lazily rewrite a command stream; the final pose of the robot is unchanged
+        """
+        if self.heading is None:
+            for command in commands:
+                self.commands_in += 1
+                self.commands_out += 1
+                yield command
+            return
+
+        heading = run_start = self.heading
+        run_length = 0
+        for command in commands:
+            if command == "l":
+                heading = LEFT_TO[heading]
+                run_length += 1
+            elif command == "r":
+                heading = RIGHT_TO[heading]
+                run_length += 1
+            else:
+                if run_length:
+                    yield from self._turns(run_start, heading, run_length)
+                    run_length = 0
+                self.commands_in += 1
+                self.commands_out += 1
+                self.heading = run_start = heading
+                yield command
+        if run_length:
+            yield from self._turns(run_start, heading, run_length)
+        self.heading = heading
+
+    def _turns(self, source: int, target: int, run_length: int) -> Iterator[str]:
+        turns = TURNS[source][target]
+        self.commands_in += run_length
+        self.commands_out += len(turns)
+        return iter(turns)
+
+
+def optimize_route(route: str, heading: str) -> Tuple[str, int]:
+    """
+    :return: the optimized route and the number of motor activations saved
+    """
+    optimizer = CommandOptimizer(heading)
+    optimized = "".join(optimizer.optimize(route))
+    return optimized, optimizer.saved
@@ -0,0 +1,451 @@
+from __future__ import annotations
+
+import re
+from bisect import bisect_left
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+import numpy as np
+
+from .cleaning_robot import CleaningRobotError
+from .path_planner import PathPlanner
+from .position_state_manager import FORWARD_STEP, LEFT_TO, RIGHT_TO, STATES, STATE_BY_HEADING, TURNS, Pose
+from .room_map import RoomMap
+
+# Every motor activation, forward or rotation, lasts one second on the hardware
+MOTOR_SECONDS_PER_COMMAND = 1.0
+
+# Sweeping heading W moves towards larger x, heading E towards smaller x
+TOWARDS_LARGER_X = STATE_BY_HEADING["W"].index
+TOWARDS_SMALLER_X = STATE_BY_HEADING["E"].index
+TOWARDS_LARGER_Y = STATE_BY_HEADING["N"].index
+TOWARDS_SMALLER_Y = STATE_BY_HEADING["S"].index
+
+# A turn, or a run of forward moves
+_RUNS = re.compile("f+|[lr]")
+
+
+@dataclass
+class CoverageCell:
+    """
+    Boustrophedon cell: one free interval [x0, x1] per row, starting at row y0
+    """
+    index: int
+    y0: int
+    intervals: List[Tuple[int, int]] = field(default_factory=list)
+    neighbours: Set[int] = field(default_factory=set)
+
+    @property
+    def area(self) -> int:
+        return sum(x1 - x0 + 1 for x0, x1 in self.intervals)
+
+
+@dataclass
+class CoverageReport:
+    free_cells: int = 0
+    reachable_cells: int = 0
+    covered_cells: int = 0
+    forward_moves: int = 0
+    turns: int = 0
+    revisits: int = 0
+
+    @property
+    def expected_coverage(self) -> float:
+        """
+        Percentage of the free cells the robot can reach from its start cell
+        """
+        return 100.0 * self.reachable_cells / self.free_cells if self.free_cells else 0.0
+
+    @property
+    def coverage(self) -> float:
+        """
+        Percentage of the free cells covered by the commands generated so far
+        """
+        return 100.0 * self.covered_cells / self.free_cells if self.free_cells else 0.0
+
+    @property
+    def motor_seconds(self) -> float:
+        return (self.forward_moves + self.turns) * MOTOR_SECONDS_PER_COMMAND
+
+
+class CoveragePlanner:
+    """
+    Full-room coverage: the free space of the RoomMap is split into boustrophedon cells,
+    each cell is swept row by row and the robot is driven between cells with a PathPlanner.
+    Commands are streamed in chunks, so no giant route string is ever built.
+    """
+
+    def __init__(self, room_map: RoomMap, turn_cost: float = 2.0, transit_weight: float = 1.5) -> None:
+        """
+        :param transit_weight: heuristic weight of the searches between distant cells, see PathPlanner;
+            1 for the cheapest transits at the price of much slower planning in cluttered rooms
+        """
+        self.room_map = room_map
+        self.path_planner = PathPlanner(room_map, turn_cost=turn_cost, heuristic_weight=transit_weight)
+        self.report = CoverageReport()
+        self._covered: Optional[np.ndarray] = None
+        # Free runs along the rows and along the columns, see _free_runs
+        self._row_runs: Optional[Tuple[np.ndarray, np.ndarray]] = None
+        self._column_runs: Optional[Tuple[np.ndarray, np.ndarray]] = None
+        self._x = self._y = self._heading = 0
+
+    def decompose(self) -> Tuple[List[CoverageCell], Dict[Tuple[int, int], int]]:
+        """
+        :return: the cells and, for every row interval (y, x0), the index of the cell it belongs to
+        """
+        free = ~self.room_map.grid
+        padded = np.zeros((free.shape[0], free.shape[1] + 2), dtype=np.int8)
+        padded[:, 1:-1] = free
+        changes = np.diff(padded, axis=1)
+        start_rows, start_xs = np.nonzero(changes == 1)
+        _, end_xs = np.nonzero(changes == -1)
+        row_bounds = np.searchsorted(start_rows, np.arange(free.shape[0] + 1))
+
+        cells: List[CoverageCell] = []
+        cell_of: Dict[Tuple[int, int], int] = {}
+        previous: List[Tuple[int, int, int]] = []
+        for y in range(free.shape[0]):
+            begin, end = row_bounds[y], row_bounds[y + 1]
+            current = list(zip(start_xs[begin:end].tolist(), (end_xs[begin:end] - 1).tolist()))
+            overlaps_previous: List[List[int]] = [[] for _ in current]
+            overlap_counts = [0] * len(previous)
+            i = j = 0
+            while i < len(previous) and j < len(current):
+                if max(previous[i][0], current[j][0]) <= min(previous[i][1], current[j][1]):
+                    overlaps_previous[j].append(i)
+                    overlap_counts[i] += 1
+                if previous[i][1] < current[j][1]:
+                    i += 1
+                else:
+                    j += 1
+
+            row: List[Tuple[int, int, int]] = []
+            for (x0, x1), overlapping in zip(current, overlaps_previous):
+                if len(overlapping) == 1 and overlap_counts[overlapping[0]] == 1:
+                    cell = cells[previous[overlapping[0]][2]]
+                else:
+                    cell = CoverageCell(len(cells), y)
+                    cells.append(cell)
+                    for i in overlapping:
+                        neighbour = previous[i][2]
+                        cell.neighbours.add(neighbour)
+                        cells[neighbour].neighbours.add(cell.index)
+                cell.intervals.append((x0, x1))
+                cell_of[(y, x0)] = cell.index
+                row.append((x0, x1, cell.index))
+            previous = row
+        return cells, cell_of
+
+    def commands(self, start: Pose) -> Iterator[str]:
+        """
+        Stream the coverage route from the start pose; self.report is updated as chunks are produced
+        """
+        room_map = self.room_map
+        if not room_map.is_free(start.x, start.y):
+            raise CleaningRobotError(f"Start cell ({start.x},{start.y}) is not free")
+
+        cells, cell_of = self.decompose()
+        start_cell = self._cell_containing(cells, cell_of, start.x, start.y)
+        reachable = self._reachable(cells, start_cell)
+
+        self.report = report = CoverageReport()
+        report.free_cells = room_map.width * room_map.height - room_map.obstacle_count()
+        report.reachable_cells = sum(cells[index].area for index in reachable)
+        self._covered = np.zeros(room_map.grid.shape, dtype=bool)
+        self._covered[start.y, start.x] = True
+        self._row_runs = _free_runs(room_map.grid)
+        self._column_runs = _free_runs(room_map.grid.T)
+        report.covered_cells = 1
+        self._x, self._y, self._heading = start.x, start.y, STATE_BY_HEADING[start.heading].index
+
+        frontier = _Frontier(cells, reachable)
+        cell = cells[start_cell]
+        while True:
+            frontier.discard(cell)
+            yield from self._sweep(cell)
+            # Nearest unvisited neighbour first, the nearest unvisited cell anywhere otherwise
+            neighbours = [cells[index] for index in cell.neighbours if index in frontier]
+            if neighbours:
+                cell = min(neighbours, key=self._distance_to)
+            elif frontier:
+                cell = cells[frontier.nearest(self._x, self._y)]
+            else:
+                return
+
+    def plan_report(self, start: Pose) -> CoverageReport:
+        """
+        Consume the whole stream and return the final report
+        """
+        for _ in self.commands(start):
+            pass
+        return self.report
+
+    @staticmethod
+    def _cell_containing(cells: List[CoverageCell], cell_of: Dict[Tuple[int, int], int], x: int, y: int) -> int:
+        for (row, x0), index in cell_of.items():
+            if row == y and x0 <= x:
+                cell = cells[index]
+                x1 = cell.intervals[y - cell.y0][1]
+                if x <= x1:
+                    return index
+        raise CleaningRobotError(f"Cell ({x},{y}) is not part of any coverage cell")
+
+    @staticmethod
+    def _reachable(cells: List[CoverageCell], start_cell: int) -> Set[int]:
+        reachable = {start_cell}
+        queue = deque([start_cell])
+        while queue:
+            for neighbour in cells[queue.popleft()].neighbours:
+                if neighbour not in reachable:
+                    reachable.add(neighbour)
+                    queue.append(neighbour)
+        return reachable
+
+    def _distance_to(self, cell: CoverageCell) -> int:
+        x0, x1 = cell.intervals[0]
+        return abs(cell.y0 - self._y) + min(abs(x0 - self._x), abs(x1 - self._x))
+
+    def _sweep(self, cell: CoverageCell) -> Iterator[str]:
+        for row, (x0, x1) in enumerate(cell.intervals):
+            y = cell.y0 + row
+            if abs(self._x - x0) <= abs(self._x - x1):
+                entry, exit_x, heading = x0, x1, TOWARDS_LARGER_X
+            else:
+                entry, exit_x, heading = x1, x0, TOWARDS_SMALLER_X
+            chunk = self._transit(entry, y)
+            if entry != exit_x:
+                chunk += TURNS[self._heading][heading]
+                self.report.turns += len(TURNS[self._heading][heading])
+                self._heading = heading
+                chunk += self._forward_run(entry, exit_x, y)
+            if chunk:
+                yield chunk
+
+    def _forward_run(self, entry: int, exit_x: int, y: int) -> str:
+        low, high = min(entry, exit_x), max(entry, exit_x)
+        covered_row = self._covered[y]
+        already_covered = int(np.count_nonzero(covered_row[low:high + 1])) - int(covered_row[entry])
+        steps = high - low
+        covered_row[low:high + 1] = True
+        self.report.forward_moves += steps
+        self.report.revisits += already_covered
+        self.report.covered_cells += steps - already_covered
+        self._x = exit_x
+        return "f" * steps
+
+    def _transit(self, x: int, y: int) -> str:
+        """
+        Commands that bring the robot to cell (x, y), whatever its final heading
+        """
+        if x == self._x and y == self._y:
+            return ""
+        route = self._straight_route(x, y)
+        if route is None:
+            route = self._dogleg_route(x, y)
+        if route is None:
+            route = self.path_planner.plan(Pose(self._x, self._y, STATES[self._heading].heading), (x, y))
+            if route is None:
+                raise CleaningRobotError(f"Cell ({x},{y}) is not reachable")
+        self._follow(route)
+        return route
+
+    def _straight_route(self, x: int, y: int) -> Optional[str]:
+        """
+        Route with at most one corner if the cells along it are free; avoids a full search for short hops
+        """
+        from_x, from_y = self._x, self._y
+        heading_x = TOWARDS_LARGER_X if x > from_x else TOWARDS_SMALLER_X
+        heading_y = TOWARDS_LARGER_Y if y > from_y else TOWARDS_SMALLER_Y
+        low_x, high_x = min(x, from_x), max(x, from_x)
+        low_y, high_y = min(y, from_y), max(y, from_y)
+
+        routes = []
+        # Along y first, turning at (from_x, y)
+        if (_spans(self._column_runs, from_x, from_y, low_y, high_y)
+                and _spans(self._row_runs, y, from_x, low_x, high_x)):
+            routes.append(self._legs_route(((heading_y, high_y - low_y), (heading_x, high_x - low_x))))
+        # Along x first, turning at (x, from_y)
+        if (_spans(self._row_runs, from_y, from_x, low_x, high_x)
+                and _spans(self._column_runs, x, from_y, low_y, high_y)):
+            routes.append(self._legs_route(((heading_x, high_x - low_x), (heading_y, high_y - low_y))))
+        return min(routes, key=len) if routes else None
+
+    def _dogleg_route(self, x: int, y: int) -> Optional[str]:
+        """
+        Shortest route with two corners, e.g. along the current row to a free column, along that
+        column to row y, then along row y. Takes the hops between the rows of a cell and around
+        single obstacles that _straight_route cannot, so the path planner only runs in mazes.
+        """
+        from_x, from_y = self._x, self._y
+        routes = []
+        column = _dogleg(self._row_runs, self._column_runs, from_x, from_y, x, y)
+        if column is not None:
+            routes.append(self._legs_route(((_towards_x(from_x, column), abs(column - from_x)),
+                                            (_towards_y(from_y, y), abs(y - from_y)),
+                                            (_towards_x(column, x), abs(x - column)))))
+        row = _dogleg(self._column_runs, self._row_runs, from_y, from_x, y, x)
+        if row is not None:
+            routes.append(self._legs_route(((_towards_y(from_y, row), abs(row - from_y)),
+                                            (_towards_x(from_x, x), abs(x - from_x)),
+                                            (_towards_y(row, y), abs(y - row)))))
+        return min(routes, key=len) if routes else None
+
+    def _legs_route(self, legs: Tuple[Tuple[int, int], ...]) -> str:
+        """
+        Commands for straight legs of (heading, steps), starting from the current heading
+        """
+        route, heading = "", self._heading
+        for leg_heading, steps in legs:
+            if steps:
+                route += TURNS[heading][leg_heading] + "f" * steps
+                heading = leg_heading
+        return route
+
+    def _follow(self, route: str) -> None:
+        report, covered = self.report, self._covered
+        x, y, heading = self._x, self._y, self._heading
+        # Straight runs are applied a whole row or column slice at a time
+        for command in _RUNS.findall(route):
+            if command == "l":
+                heading = LEFT_TO[heading]
+                report.turns += 1
+            elif command == "r":
+                heading = RIGHT_TO[heading]
+                report.turns += 1
+            else:
+                steps = len(command)
+                dx, dy = FORWARD_STEP[heading]
+                to_x, to_y = x + dx * steps, y + dy * steps
+                if dy == 0:
+                    cells = covered[y, min(x + dx, to_x):max(x + dx, to_x) + 1]
+                else:
+                    cells = covered[min(y + dy, to_y):max(y + dy, to_y) + 1, x]
+                already_covered = int(np.count_nonzero(cells))
+                cells[:] = True
+                report.forward_moves += steps
+                report.revisits += already_covered
+                report.covered_cells += steps - already_covered
+                x, y = to_x, to_y
+        self._x, self._y, self._heading = x, y, heading
+
+
+class _Frontier:
+    """
+    Cells still to sweep, bucketed by the row of their entry interval: the nearest one is found
+    by walking the non-empty rows outwards from the robot, instead of scanning every cell
+    """
+
+    def __init__(self, cells: List[CoverageCell], pending: Set[int]) -> None:
+        self._pending = set(pending)
+        # entry row -> sorted (x, cell index) of both ends of the entry interval
+        self._rows: Dict[int, List[Tuple[int, int]]] = {}
+        for index in pending:
+            cell = cells[index]
+            self._rows.setdefault(cell.y0, []).extend((x, index) for x in set(cell.intervals[0]))
+        for row in self._rows.values():
+            row.sort()
+        self._row_ys = sorted(self._rows)
+
+    def __contains__(self, index: int) -> bool:
+        return index in self._pending
+
+    def __bool__(self) -> bool:
+        return bool(self._pending)
+
+    def discard(self, cell: CoverageCell) -> None:
+        if cell.index not in self._pending:
+            return
+        self._pending.discard(cell.index)
+        row = self._rows[cell.y0]
+        for x in set(cell.intervals[0]):
+            del row[bisect_left(row, (x, cell.index))]
+        if not row:
+            del self._rows[cell.y0]
+            del self._row_ys[bisect_left(self._row_ys, cell.y0)]
+
+    def nearest(self, x: int, y: int) -> int:
+        """
+        :return: the index of the pending cell whose entry interval has the end nearest to (x, y),
+            the lowest index among equally near cells
+        """
+        row_ys = self._row_ys
+        below = bisect_left(row_ys, y) - 1
+        above = below + 1
+        best = (float("inf"), -1)
+        while below >= 0 or above < len(row_ys):
+            # Take the nearer of the next rows below and above; stop once no row can beat the best
+            if above >= len(row_ys) or (below >= 0 and y - row_ys[below] <= row_ys[above] - y):
+                row_y = row_ys[below]
+                below -= 1
+            else:
+                row_y = row_ys[above]
+                above += 1
+            dy = abs(row_y - y)
+            if dy > best[0]:
+                break
+            row = self._rows[row_y]
+            position = bisect_left(row, (x, -1))
+            # The nearest ends on either side of x, each with the lowest index among the cells ending there
+            if position < len(row):
+                best = min(best, (dy + row[position][0] - x, row[position][1]))
+            if position > 0:
+                end_x = row[position - 1][0]
+                best = min(best, (dy + x - end_x, row[bisect_left(row, (end_x, -1))][1]))
+        return best[1]
+
+
+def _towards_x(from_x: int, x: int) -> int:
+    return TOWARDS_LARGER_X if x > from_x else TOWARDS_SMALLER_X
+
+
+def _towards_y(from_y: int, y: int) -> int:
+    return TOWARDS_LARGER_Y if y > from_y else TOWARDS_SMALLER_Y
+
+
+def _free_runs(grid: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    :return: for every cell of the grid, the first and last x of the obstacle-free run of its row
+        that contains it
+    """
+    xs = np.arange(grid.shape[1], dtype=np.int32)
+    low = np.maximum.accumulate(np.where(grid, xs, -1), axis=1) + 1
+    high = np.minimum.accumulate(np.where(grid, xs, grid.shape[1])[:, ::-1], axis=1)[:, ::-1] - 1
+    return low, high
+
+
+def _spans(runs: Tuple[np.ndarray, np.ndarray], line: int, at: int, low: int, high: int) -> bool:
+    """
+    :return: whether the free run of the line (row or column) through `at` spans [low, high]
+    """
+    lows, highs = runs
+    return lows[line, at] <= low and highs[line, at] >= high
+
+
+def _dogleg(runs: Tuple[np.ndarray, np.ndarray], cross_runs: Tuple[np.ndarray, np.ndarray],
+            from_x: int, from_y: int, x: int, y: int) -> Optional[int]:
+    """
+    Column of the route along row from_y, then along that column to row y, then along row y,
+    with the shortest legs along the rows; pass the column runs as `runs` and the row runs as
+    `cross_runs`, with x and y swapped, for the route along columns instead
+    :param runs: the _free_runs of the rows, indexed [y, x]
+    :param cross_runs: the _free_runs of the columns, indexed [x, y]
+    :return: the column, None if every such route is blocked
+    """
+    lows, highs = runs
+    low = max(int(lows[from_y, from_x]), int(lows[y, x]))
+    high = min(int(highs[from_y, from_x]), int(highs[y, x]))
+    if low > high:
+        return None
+    # The free run of the column through row from_y must reach row y
+    low_y, high_y = min(y, from_y), max(y, from_y)
+    # Every column between from_x and x gives the shortest legs, the first clear one is taken
+    first = max(low, min(from_x, x))
+    if first <= min(high, max(from_x, x)) and _spans(cross_runs, first, from_y, low_y, high_y):
+        return first
+    column_lows, column_highs = cross_runs
+    clear = (column_lows[low:high + 1, from_y] <= low_y) & (column_highs[low:high + 1, from_y] >= high_y)
+    columns = np.flatnonzero(clear) + low
+    if not columns.size:
+        return None
+    return int(columns[np.argmin(np.abs(columns - from_x) + np.abs(columns - x))])
@@ -0,0 +1,121 @@
+from __future__ import annotations
+
+from dataclasses import asdict, dataclass
+from typing import Dict, Optional
+
+from .cleaning_robot import CleaningRobot, CleaningRobotError
+from .tiled_map import TiledRoomMap
+
+
+@dataclass(frozen=True)
+class CoverageSnapshot:
+    cells_cleaned: int
+    revisits: int
+    cleaning_moves: int
+    idle_moves: int
+    motor_seconds: float
+    target_cells: Optional[int]
+
+    @property
+    def coverage(self) -> Optional[float]:
+        """
+        Percentage of the target cells cleaned, None without a target
+        """
+        if not self.target_cells:
+            return None
+        return 100.0 * self.cells_cleaned / self.target_cells
+
+    @property
+    def motor_seconds_per_new_cell(self) -> Optional[float]:
+        return self.motor_seconds / self.cells_cleaned if self.cells_cleaned else None
+
+    def to_dict(self) -> Dict[str, Optional[float]]:
+        exported = asdict(self)
+        exported["coverage"] = self.coverage
+        exported["motor_seconds_per_new_cell"] = self.motor_seconds_per_new_cell
+        return exported
+
+
+class CoverageTracker:
+    """
+    Coverage statistics of the robot: the cleaned cells are the CLEANED flags of a
+    TiledRoomMap, set on every successful forward move while the cleaning system is on.
+    All totals are maintained incrementally.
+    """
+
+    def __init__(self, room_map: TiledRoomMap, target_cells: Optional[int] = None) -> None:
+        """
+        :param room_map: map holding the cleaned cells; cells it already flags as cleaned count as revisits
+        :param target_cells: cells to clean in total, e.g. CoverageReport.reachable_cells,
+            used for the coverage ratio
+        """
+        if target_cells is not None and target_cells < 0:
+            raise CleaningRobotError(f"Target cells cannot be negative, got {target_cells}")
+        self.room_map = room_map
+        self.target_cells = target_cells
+        self.cells_cleaned = 0
+        self.revisits = 0
+        self.cleaning_moves = 0
+        self.idle_moves = 0
+        self.motor_seconds = 0.0
+
+    @classmethod
+    def for_robot(cls, robot: CleaningRobot, room_map: TiledRoomMap, **kwargs) -> CoverageTracker:
+        """
+        Create a tracker and let the robot report its moves and motor time to it;
+        the cell the robot stands on counts as cleaned
+        """
+        tracker = cls(room_map, **kwargs)
+        if robot.pose.x is not None:
+            tracker.mark_cleaned(robot.pose.x, robot.pose.y)
+        robot.coverage = tracker
+        return tracker
+
+    def record_move(self, x: int, y: int, cleaning: bool) -> bool:
+        """
+        The robot entered cell (x, y)
+        :return: True if the cell was cleaned for the first time
+        """
+        if not cleaning:
+            self.idle_moves += 1
+            return False
+        self.cleaning_moves += 1
+        if self.mark_cleaned(x, y):
+            return True
+        self.revisits += 1
+        return False
+
+    def mark_cleaned(self, x: int, y: int) -> bool:
+        """
+        Count cell (x, y) as cleaned without a move, e.g. the start cell
+        :return: True if the cell was cleaned for the first time
+        """
+        if not self.room_map.mark_cleaned(x, y):
+            return False
+        self.cells_cleaned += 1
+        return True
+
+    def record_motor(self, seconds: float) -> None:
+        self.motor_seconds += seconds
+
+    def is_cleaned(self, x: int, y: int) -> bool:
+        return self.room_map.is_cleaned(x, y)
+
+    @property
+    def coverage(self) -> Optional[float]:
+        return self.snapshot().coverage
+
+    def snapshot(self) -> CoverageSnapshot:
+        """
+        Current totals; constant time, whatever the size of the cleaned area
+        """
+        return CoverageSnapshot(self.cells_cleaned, self.revisits, self.cleaning_moves, self.idle_moves,
+                                self.motor_seconds, self.target_cells)
+
+    def reset(self) -> None:
+        """
+        Start over: the totals are zeroed and the cleaned flags of the map cleared
+        """
+        self.room_map.clear_cleaned()
+        self.cells_cleaned = self.revisits = self.cleaning_moves = self.idle_moves = 0
+        self.motor_seconds = 0.0
@@ -0,0 +1,126 @@
+from __future__ import annotations
+
+from typing import List, Optional, Sequence, Union
+
+import numpy as np
+
+from .cleaning_robot import CleaningRobotError
+from .position_state_manager import STATES, STATE_BY_HEADING, TRANSITIONS
+
+# Command codes used in the vectorized tables; anything else is a no-op,
+# just like CleaningRobot.execute_command ignores unknown commands
+FORWARD, LEFT, RIGHT, NOOP = 0, 1, 2, 3
+# Padding after the end of a shorter route: unlike NOOP, it keeps the obstacle of the last command
+PAD = 4
+COMMAND_CODES = {"f": FORWARD, "l": LEFT, "r": RIGHT}
+
+HEADINGS = np.array([state.heading for state in STATES])
+
+
+def _build_tables():
+    next_state = np.empty((5, len(STATES)), dtype=np.uint8)
+    dx = np.zeros((5, len(STATES)), dtype=np.int64)
+    dy = np.zeros((5, len(STATES)), dtype=np.int64)
+    for command, code in COMMAND_CODES.items():
+        for state, (new_state, step_x, step_y) in TRANSITIONS[command].items():
+            next_state[code, state.index] = new_state.index
+            dx[code, state.index] = step_x
+            dy[code, state.index] = step_y
+    next_state[NOOP] = next_state[PAD] = np.arange(len(STATES))
+    return next_state, dx, dy
+
+
+NEXT_STATE, DX, DY = _build_tables()
+
+
+def encode_commands(commands: str) -> np.ndarray:
+    """
+    Turn a command string into an array of command codes
+    """
+    return np.array([COMMAND_CODES.get(command, NOOP) for command in commands], dtype=np.uint8)
+
+
+class FleetSimulator:
+    """
+    Motion model of N robots stored in NumPy arrays, stepped all at once.
+    Matches the semantics of CleaningRobot.execute_command without any hardware.
+    """
+
+    def __init__(self, size: int, x: Optional[Sequence[int]] = None, y: Optional[Sequence[int]] = None,
+                 headings: Optional[Sequence[str]] = None) -> None:
+        self.size = size
+        self.x = np.zeros(size, dtype=np.int64) if x is None else np.array(x, dtype=np.int64)
+        self.y = np.zeros(size, dtype=np.int64) if y is None else np.array(y, dtype=np.int64)
+        if headings is None:
+            self.state = np.zeros(size, dtype=np.uint8)
+        else:
+            self.state = np.array([STATE_BY_HEADING[heading].index for heading in headings], dtype=np.uint8)
+        self.obstacle_mask = np.zeros(size, dtype=bool)
+        self.obstacle_x = np.zeros(size, dtype=np.int64)
+        self.obstacle_y = np.zeros(size, dtype=np.int64)
+
+    @property
+    def headings(self) -> np.ndarray:
+        return HEADINGS[self.state]
+
+    def step(self, commands: Union[str, np.ndarray], obstacle_ahead: Optional[np.ndarray] = None) -> None:
+        """
+        Apply one command to every robot
+        :param commands: a single command for the whole fleet, or an array of command codes, one per robot
+        :param obstacle_ahead: boolean array, True where the infrared sensor of a robot sees an obstacle
+        """
+        if isinstance(commands, str):
+            codes = np.full(self.size, COMMAND_CODES.get(commands, NOOP), dtype=np.uint8)
+        else:
+            codes = np.asarray(commands, dtype=np.uint8)
+
+        state = self.state
+        step_x = DX[codes, state]
+        step_y = DY[codes, state]
+        self.state = NEXT_STATE[codes, state]
+
+        if obstacle_ahead is None:
+            blocked = np.zeros(self.size, dtype=bool)
+        else:
+            blocked = (codes == FORWARD) & np.asarray(obstacle_ahead, dtype=bool)
+        target_x = self.x + step_x
+        target_y = self.y + step_y
+
+        moving = ~blocked
+        self.x = np.where(moving, target_x, self.x)
+        self.y = np.where(moving, target_y, self.y)
+
+        # Robots whose route is over keep the status of their last command
+        padded = codes == PAD
+        self.obstacle_mask = np.where(padded, self.obstacle_mask, blocked)
+        self.obstacle_x = np.where(padded, self.obstacle_x, target_x)
+        self.obstacle_y = np.where(padded, self.obstacle_y, target_y)
+
+    def run(self, routes: Sequence[str], obstacles: Optional[np.ndarray] = None) -> None:
+        """
+        Replay one route per robot; robots with shorter routes stay put once theirs is over
+        :param obstacles: optional (robots, steps) boolean array of infrared readings
+        """
+        if len(routes) != self.size:
+            raise CleaningRobotError(f"Expected {self.size} routes, got {len(routes)}")
+        length = max((len(route) for route in routes), default=0)
+        codes = np.full((self.size, length), PAD, dtype=np.uint8)
+        for robot, route in enumerate(routes):
+            codes[robot, :len(route)] = encode_commands(route)
+
+        for step in range(length):
+            obstacle_ahead = None if obstacles is None else obstacles[:, step]
+            self.step(codes[:, step], obstacle_ahead)
+
+    def statuses(self) -> List[str]:
+        """
+        Status strings in the same format execute_command returns, including the obstacle suffix
+        """
+        headings = self.headings
+        statuses = []
+        for robot in range(self.size):
+            status = f"({self.x[robot]},{self.y[robot]},{headings[robot]})"
+            if self.obstacle_mask[robot]:
+                status += f"({self.obstacle_x[robot]},{self.obstacle_y[robot]})"
+            statuses.append(status)
+        return statuses
@@ -0,0 +1,177 @@
+from __future__ import annotations
+
+import time
+from functools import wraps
+from typing import Callable, Dict, List, Optional
+
+from .cleaning_robot import CleaningRobot
+
+# Each power of two is split into 16 linear sub-buckets: at most 6.25% relative error
+SUB_BUCKET_BITS = 4
+SUB_BUCKETS = 1 << SUB_BUCKET_BITS
+BUCKETS = 2 * SUB_BUCKETS + 64 * SUB_BUCKETS
+
+# Robot methods timed by the instrumentation, and the phase they are reported under
+PHASES = {
+    "execute_command": "execute_command",
+    "manage_cleaning_system": "manage_cleaning_system",
+    "activate_wheel_motor": "activate_wheel_motor",
+    "activate_rotation_motor": "activate_rotation_motor",
+    "_read_temperature": "sensor.temperature",
+    "_read_charge": "sensor.charge",
+    "obstacle_found": "gpio.infrared",
+    "_start_wheel_motor": "gpio.motor",
+    "_stop_wheel_motor": "gpio.motor",
+    "_start_rotation_motor": "gpio.motor",
+    "_stop_rotation_motor": "gpio.motor",
+    "_wait_for_motor": "motor.wait",
+    "_switch_cleaning_system": "gpio.cleaning_system",
+    "_update_pose": "state_machine",
+}
+
+Listener = Callable[[str, int], None]
+
+
+class LatencyHistogram:
+    """
+    HDR-style log-linear histogram of durations in nanoseconds with constant-time recording
+    """
+    __slots__ = ("counts", "count", "total", "minimum", "maximum")
+
+    def __init__(self) -> None:
+        self.counts = [0] * BUCKETS
+        self.count = 0
+        self.total = 0
+        self.minimum: Optional[int] = None
+        self.maximum: Optional[int] = None
+
+    @staticmethod
+    def bucket_of(value: int) -> int:
+        if value < 2 * SUB_BUCKETS:
+            return value
+        shift = value.bit_length() - SUB_BUCKET_BITS - 1
+        return 2 * SUB_BUCKETS + (shift - 1) * SUB_BUCKETS + (value >> shift) - SUB_BUCKETS
+
+    @staticmethod
+    def bucket_upper_bound(bucket: int) -> int:
+        if bucket < 2 * SUB_BUCKETS:
+            return bucket
+        shift = (bucket - 2 * SUB_BUCKETS) // SUB_BUCKETS + 1
+        top = (bucket - 2 * SUB_BUCKETS) % SUB_BUCKETS + SUB_BUCKETS
+        return ((top + 1) << shift) - 1
+
+    def record(self, value: int) -> None:
+        if value < 0:
+            value = 0
+        self.counts[self.bucket_of(value)] += 1
+        self.count += 1
+        self.total += value
+        if self.minimum is None or value < self.minimum:
+            self.minimum = value
+        if self.maximum is None or value > self.maximum:
+            self.maximum = value
+
+    def percentile(self, percentile: float) -> Optional[int]:
+        """
+        :return: an upper bound of the given percentile (0-100), or None if nothing was recorded
+        """
+        if not self.count:
+            return None
+        threshold = max(1, int(self.count * percentile / 100 + 0.5))
+        seen = 0
+        for bucket, bucket_count in enumerate(self.counts):
+            seen += bucket_count
+            if seen >= threshold:
+                return min(self.bucket_upper_bound(bucket), self.maximum)
+        return self.maximum
+
+    def snapshot(self) -> Dict[str, Optional[float]]:
+        return {
+            "count": self.count,
+            "min_ns": self.minimum,
+            "max_ns": self.maximum,
+            "mean_ns": self.total / self.count if self.count else None,
+            "p50_ns": self.percentile(50),
+            "p90_ns": self.percentile(90),
+            "p99_ns": self.percentile(99),
+        }
+
+
+class Instrumentation:
+    """
+    Latency histograms per phase plus counters, filled by an instrumented CleaningRobot.
+    Listeners receive every (phase, duration in ns) and can forward them to a profiler or exporter.
+    """
+
+    def __init__(self) -> None:
+        self.histograms: Dict[str, LatencyHistogram] = {}
+        self.counters: Dict[str, int] = {}
+        self.listeners: List[Listener] = []
+
+    def add_listener(self, listener: Listener) -> None:
+        self.listeners.append(listener)
+
+    def record(self, phase: str, duration_ns: int) -> None:
+        histogram = self.histograms.get(phase)
+        if histogram is None:
+            histogram = self.histograms[phase] = LatencyHistogram()
+        histogram.record(duration_ns)
+        for listener in self.listeners:
+            listener(phase, duration_ns)
+
+    def increment(self, counter: str, amount: int = 1) -> None:
+        self.counters[counter] = self.counters.get(counter, 0) + amount
+
+    def count_command(self, command: str, status: str) -> None:
+        """
+        Count an executed command and its outcome, see CleaningRobot._record_command
+        """
+        self.increment(f"command.{command}")
+        if status.startswith("!"):
+            self.increment("low_battery")
+        elif ")(" in status:
+            self.increment("obstacle")
+
+    def snapshot(self) -> Dict[str, object]:
+        return {
+            "phases": {phase: histogram.snapshot() for phase, histogram in self.histograms.items()},
+            "counters": dict(self.counters),
+        }
+
+    def reset(self) -> None:
+        self.histograms.clear()
+        self.counters.clear()
+
+
+def _timed(instrumentation: Instrumentation, phase: str, method: Callable) -> Callable:
+    clock = time.perf_counter_ns
+    record = instrumentation.record
+
+    @wraps(method)
+    def timed(*args, **kwargs):
+        started = clock()
+        try:
+            return method(*args, **kwargs)
+        finally:
+            record(phase, clock() - started)
+    return timed
+
+
+def instrument(robot: CleaningRobot, instrumentation: Optional[Instrumentation] = None) -> Instrumentation:
+    """
+    Time every phase of the robot. The timed wrappers are installed on the instance only,
+    so a robot that is not instrumented runs the plain methods at no extra cost.
+    """
+    if instrumentation is None:
+        instrumentation = Instrumentation()
+    uninstrument(robot)
+    for name, phase in PHASES.items():
+        setattr(robot, name, _timed(instrumentation, phase, getattr(robot, name)))
+    robot.instrumentation = instrumentation
+    return instrumentation
+
+
+def uninstrument(robot: CleaningRobot) -> None:
+    for name in PHASES:
+        robot.__dict__.pop(name, None)
+    robot.instrumentation = None
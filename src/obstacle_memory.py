@@ -0,0 +1,110 @@
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, Optional, Tuple
+
+from .cleaning_robot import CleaningRobot, CleaningRobotError
+
+Cell = Tuple[int, int]
+
+
+@dataclass
+class ObstacleMemoryStats:
+    hits: int
+    misses: int
+    expired: int
+    size: int
+    motor_seconds_saved: float
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+class ObstacleMemory:
+    """
+    Obstacles reported by the infrared sensor, keyed by cell. While an entry is younger than
+    the TTL, a forward move towards it is answered from memory without reading the sensor
+    or running the wheel motor; older entries are dropped and the sensor is asked again.
+    """
+
+    def __init__(self, ttl: Optional[float] = 300.0, clock: Callable[[], float] = time.monotonic,
+                 motor_seconds_per_hit: float = CleaningRobot.MOTOR_SECONDS) -> None:
+        """
+        :param ttl: seconds an obstacle is trusted for, None to trust it forever
+        :param motor_seconds_per_hit: motor time a short-circuited forward move saves
+        """
+        if ttl is not None and ttl <= 0:
+            raise CleaningRobotError(f"Obstacle TTL must be positive, got {ttl}")
+        self.ttl = ttl
+        self.clock = clock
+        self.motor_seconds_per_hit = motor_seconds_per_hit
+        self._seen: Dict[Cell, float] = {}
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+
+    @classmethod
+    def for_robot(cls, robot: CleaningRobot, **kwargs) -> ObstacleMemory:
+        """
+        Create an obstacle memory and let the robot short-circuit forward moves with it
+        """
+        if robot.clock is not None:
+            kwargs.setdefault("clock", robot.clock)
+        kwargs.setdefault("motor_seconds_per_hit", robot.MOTOR_SECONDS)
+        memory = cls(**kwargs)
+        robot.obstacle_memory = memory
+        return memory
+
+    def __len__(self) -> int:
+        return len(self._seen)
+
+    def __contains__(self, cell: Cell) -> bool:
+        seen = self._seen.get(cell)
+        return seen is not None and not self._is_expired(seen)
+
+    def remember(self, cell: Cell) -> None:
+        self._seen[cell] = self.clock()
+
+    def forget(self, cell: Cell) -> bool:
+        """
+        :return: True if the cell was remembered
+        """
+        return self._seen.pop(cell, None) is not None
+
+    def known(self, cell: Cell) -> bool:
+        """
+        Look a cell up, counting a hit or a miss
+        """
+        seen = self._seen.get(cell)
+        if seen is not None:
+            if not self._is_expired(seen):
+                self.hits += 1
+                return True
+            del self._seen[cell]
+            self.expired += 1
+        self.misses += 1
+        return False
+
+    def prune(self) -> int:
+        """
+        Drop every expired entry
+        :return: the number of entries dropped
+        """
+        stale = [cell for cell, seen in self._seen.items() if self._is_expired(seen)]
+        for cell in stale:
+            del self._seen[cell]
+        self.expired += len(stale)
+        return len(stale)
+
+    def clear(self) -> None:
+        self._seen.clear()
+
+    def stats(self) -> ObstacleMemoryStats:
+        return ObstacleMemoryStats(self.hits, self.misses, self.expired, len(self._seen),
+                                   self.hits * self.motor_seconds_per_hit)
+
+    def _is_expired(self, seen: float) -> bool:
+        return self.ttl is not None and self.clock() - seen > self.ttl
@@ -0,0 +1,146 @@
+from __future__ import annotations
+
+import heapq
+from typing import Dict, List, Optional, Tuple
+
+from .cleaning_robot import CleaningRobot, CleaningRobotError, CommandBatchResult
+from .position_state_manager import FORWARD_STEP, LEFT_TO, RIGHT_TO, STATE_BY_HEADING, Pose
+from .room_map import RoomMap, parse_obstacle
+
+
+class PathPlanner:
+    """
+    A* planner over (x, y, heading) producing a command string for execute_command.
+    Turns cost more than moving forward since each rotation takes a full motor cycle.
+    """
+
+    def __init__(self, room_map: RoomMap, forward_cost: float = 1.0, turn_cost: float = 2.0,
+                 cache_size: int = 1024, heuristic_weight: float = 1.0) -> None:
+        """
+        :param heuristic_weight: above 1, the estimate is inflated: routes may cost up to that
+            factor more than the cheapest one, but far fewer nodes are expanded on long routes
+        """
+        if heuristic_weight < 1:
+            raise CleaningRobotError(f"The heuristic weight must be at least 1, got {heuristic_weight}")
+        self.room_map = room_map
+        self.heuristic_weight = heuristic_weight
+        self.forward_cost = forward_cost
+        self.turn_cost = turn_cost
+        self.cache_size = cache_size
+        self._cache: Dict[Tuple[int, int, str, int, int], Optional[str]] = {}
+        self._cache_version = room_map.version
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    def plan(self, start: Pose, goal: Tuple[int, int]) -> Optional[str]:
+        """
+        Plan a route from the start pose to the goal cell, with any final heading
+        :return: the commands to execute, or None if the goal cannot be reached
+        """
+        if self._cache_version != self.room_map.version:
+            self._cache.clear()
+            self._cache_version = self.room_map.version
+        key = (start.x, start.y, start.heading, goal[0], goal[1])
+        if key in self._cache:
+            self.cache_hits += 1
+            return self._cache[key]
+
+        self.cache_misses += 1
+        route = self._search(start.x, start.y, STATE_BY_HEADING[start.heading].index, goal)
+        if len(self._cache) >= self.cache_size:
+            self._cache.pop(next(iter(self._cache)))
+        self._cache[key] = route
+        return route
+
+    def drive(self, robot: CleaningRobot, goal: Tuple[int, int]) -> CommandBatchResult:
+        """
+        Drive the robot to the goal cell through a partly known room: every obstacle that
+        execute_command reports is added to the map and the route is planned again from there
+        :return: the status after each executed command; the robot stops short of the goal
+            if the battery runs low or the goal turns out to be unreachable
+        """
+        result = CommandBatchResult()
+        route = self.plan(robot.pose, goal)
+        while route:
+            for command in route:
+                status = robot.execute_command(command)
+                result.statuses.append(status)
+                if status[0] == "!":
+                    result.low_battery = True
+                    route = None
+                    break
+                obstacle = parse_obstacle(status)
+                if obstacle is not None:
+                    # An obstacle the map already knew would only lead to the same route again
+                    route = self.plan(robot.pose, goal) if self.room_map.add_obstacle(*obstacle) else None
+                    break
+            else:
+                route = None
+        result.final_status = result.statuses[-1] if result.statuses else robot.robot_status()
+        return result
+
+    def route_cost(self, route: str) -> float:
+        forwards = route.count("f")
+        return forwards * self.forward_cost + (len(route) - forwards) * self.turn_cost
+
+    def _search(self, start_x: int, start_y: int, start_heading: int, goal: Tuple[int, int]) -> Optional[str]:
+        goal_x, goal_y = goal
+        room_map = self.room_map
+        if not room_map.is_free(goal_x, goal_y):
+            return None
+        grid = room_map.grid
+        width, height = room_map.width, room_map.height
+        forward_cost, turn_cost = self.forward_cost, self.turn_cost
+        weight = self.heuristic_weight
+
+        def estimate(x: int, y: int, heading: int) -> float:
+            # Manhattan distance, plus one turn unless the goal is straight ahead
+            to_x, to_y = goal_x - x, goal_y - y
+            lower_bound = (abs(to_x) + abs(to_y)) * forward_cost
+            if to_x or to_y:
+                step_x, step_y = FORWARD_STEP[heading]
+                if not ((to_x == 0 and to_y * step_y > 0) or (to_y == 0 and to_x * step_x > 0)):
+                    lower_bound += turn_cost
+            return lower_bound * weight
+
+        start = (start_x, start_y, start_heading)
+        best: Dict[Tuple[int, int, int], float] = {start: 0.0}
+        parents: Dict[Tuple[int, int, int], Tuple[Tuple[int, int, int], str]] = {}
+        counter = 0
+        # Ties on the estimate are broken towards the deepest node, which keeps
+        # the search narrow on open floors
+        frontier: List[Tuple[float, float, int, Tuple[int, int, int]]] = [
+            (estimate(start_x, start_y, start_heading), 0.0, counter, start)]
+
+        while frontier:
+            _, negative_cost, _, node = heapq.heappop(frontier)
+            cost = -negative_cost
+            if cost > best[node]:
+                continue
+            x, y, heading = node
+            if x == goal_x and y == goal_y:
+                return self._reconstruct(parents, node)
+
+            dx, dy = FORWARD_STEP[heading]
+            next_x, next_y = x + dx, y + dy
+            successors = [((x, y, LEFT_TO[heading]), "l", turn_cost),
+                          ((x, y, RIGHT_TO[heading]), "r", turn_cost)]
+            if 0 <= next_x < width and 0 <= next_y < height and not grid[next_y, next_x]:
+                successors.append(((next_x, next_y, heading), "f", forward_cost))
+
+            for successor, command, step_cost in successors:
+                new_cost = cost + step_cost
+                if new_cost < best.get(successor, float("inf")):
+                    best[successor] = new_cost
+                    parents[successor] = (node, command)
+                    counter += 1
+                    heapq.heappush(frontier, (new_cost + estimate(*successor), -new_cost, counter, successor))
+        return None
+
+    @staticmethod
+    def _reconstruct(parents, node) -> str:
+        commands = []
+        while node in parents:
+            node, command = parents[node]
+            commands.append(command)
+        return "".join(reversed(commands))
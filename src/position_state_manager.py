@@ -1,9 +1,9 @@
 from __future__ import annotations
 
 import logging
-from abc import ABC, abstractmethod
+from collections import deque
 from dataclasses import dataclass
-from typing import Tuple, Optional
+from typing import Dict, Tuple, Optional
 
 
 @dataclass
@@ -32,6 +32,36 @@ class PositionStatus:
         return self.pos_x, self.pos_y, self.heading, self.obstacle_x, self.obstacle_y
 
 
+class Pose:
+    """
+    Integer robot pose, mutated in place by the state machine
+    """
+    __slots__ = ("x", "y", "heading")
+
+    def __init__(self, x: Optional[int], y: Optional[int], heading: Optional[str]) -> None:
+        self.x = x
+        self.y = y
+        self.heading = heading
+
+    @classmethod
+    def from_status(cls, current_status: str) -> Pose:
+        splitted = current_status.strip("(").strip(")").split(",")
+        return cls(int(splitted[0]), int(splitted[1]), splitted[2])
+
+    def __str__(self):
+        return f"({self.x},{self.y},{self.heading})"
+
+    def __repr__(self):
+        return f"Pose({self.x!r}, {self.y!r}, {self.heading!r})"
+
+    def __eq__(self, other):
+        if not isinstance(other, Pose):
+            return NotImplemented
+        return self.x == other.x and self.y == other.y and self.heading == other.heading
+
+    def get_tuple(self) -> Tuple[int, int, str]:
+        return self.x, self.y, self.heading
+
 
 class PositionStateMachineContext:
     _state = None
@@ -40,132 +70,162 @@ class PositionStateMachineContext:
         self.transition_to(state)
 
     def transition_to(self, state: State):
-        logging.info(f"Context: Transition to {type(state).__name__}")
+        logging.info("Context: Transition to %s", type(state).__name__)
         self._state = state
-        self._state.context = self
+
+    @property
+    def state(self) -> State:
+        return self._state
 
     def left_action(self, current_status: str) -> Tuple[int, int, str]:
-        position_status = PositionStatus(current_status)
-        return self._state.handle_left_action(position_status)
+        pose = Pose.from_status(current_status)
+        self.left_pose(pose)
+        return pose.get_tuple()
 
     def right_action(self, current_status: str) -> Tuple[int, int, str]:
-        position_status = PositionStatus(current_status)
-        return self._state.handle_right_action(position_status)
+        pose = Pose.from_status(current_status)
+        self.right_pose(pose)
+        return pose.get_tuple()
 
     def forward_action(self, current_status: str, has_obstacle_ahead: bool) -> Tuple[int, int, str, Optional[int], Optional[int]]:
-        position_status = PositionStatus(current_status)
-        return self._state.handle_forward_action(position_status, has_obstacle_ahead)
-
-
-class State(ABC):
-
-    @property
-    def context(self) -> PositionStateMachineContext:
-        return self._context
-
-    @context.setter
-    def context(self, context: PositionStateMachineContext) -> None:
-        self._context = context
-
-    @abstractmethod
-    def handle_left_action(self, position_status: PositionStatus) -> Tuple[
-        int, int, str]:
-        pass
-
-    @abstractmethod
-    def handle_right_action(self, position_status: PositionStatus) -> Tuple[
-        int, int, str]:
-        pass
-
-    @abstractmethod
-    def handle_forward_action(self, position_status: PositionStatus, has_obstacle_ahead: bool) -> Tuple[int, int, str, Optional[int], Optional[int]]:
-        pass
-
+        pose = Pose.from_status(current_status)
+        obstacle = self.forward_pose(pose, has_obstacle_ahead)
+        if obstacle is None:
+            return pose.x, pose.y, pose.heading, None, None
+        return pose.x, pose.y, pose.heading, obstacle[0], obstacle[1]
+
+    def left_pose(self, pose: Pose) -> None:
+        state = _LEFT_TRANSITIONS[self._state][0]
+        self.transition_to(state)
+        pose.heading = state.heading
 
-class NorthState(State):
-    def handle_left_action(self, position_status: PositionStatus) -> Tuple[
-        int, int, str]:
-        self.context.transition_to(EastState())
-        position_status.heading = "E"
+    def right_pose(self, pose: Pose) -> None:
+        state = _RIGHT_TRANSITIONS[self._state][0]
+        self.transition_to(state)
+        pose.heading = state.heading
+
+    def cell_ahead(self, pose: Pose) -> Tuple[int, int]:
+        """
+        :return: the cell a forward move would reach
+        """
+        _, dx, dy = _FORWARD_TRANSITIONS[self._state]
+        return pose.x + dx, pose.y + dy
+
+    def forward_pose(self, pose: Pose, has_obstacle_ahead: bool) -> Optional[Tuple[int, int]]:
+        """
+        Move `pose` one cell ahead unless an obstacle is there
+        :return: the obstacle cell if one was found, None otherwise
+        """
+        _, dx, dy = _FORWARD_TRANSITIONS[self._state]
+        if has_obstacle_ahead:
+            return pose.x + dx, pose.y + dy
+        pose.x += dx
+        pose.y += dy
+        return None
+
+
+class State:
+    """
+    Flyweight heading state: every subclass has exactly one instance, shared by all
+    contexts, so it holds no context itself. The handle_* methods are the original
+    per-state API, backed by the TRANSITIONS table, with the context to transition passed in.
+    """
+    heading: str = ""
+    index: int = -1
+
+    def __new__(cls):
+        instance = cls.__dict__.get("_instance")
+        if instance is None:
+            instance = super().__new__(cls)
+            cls._instance = instance
+        return instance
+
+    def handle_left_action(self, context: PositionStateMachineContext,
+                           position_status: PositionStatus) -> Tuple[int, int, str]:
+        state = _LEFT_TRANSITIONS[self][0]
+        context.transition_to(state)
+        position_status.heading = state.heading
         return position_status.get_tuple()
 
-    def handle_right_action(self, position_status: PositionStatus) -> Tuple[
-        int, int, str]:
-        self.context.transition_to(WestState())
-        position_status.heading = "W"
+    def handle_right_action(self, context: PositionStateMachineContext,
+                            position_status: PositionStatus) -> Tuple[int, int, str]:
+        state = _RIGHT_TRANSITIONS[self][0]
+        context.transition_to(state)
+        position_status.heading = state.heading
         return position_status.get_tuple()
 
     def handle_forward_action(self, position_status: PositionStatus, has_obstacle_ahead: bool) -> Tuple[int, int, str, Optional[int], Optional[int]]:
+        _, dx, dy = _FORWARD_TRANSITIONS[self]
         if has_obstacle_ahead:
-            position_status.obstacle_x = position_status.pos_x
-            position_status.obstacle_y = position_status.pos_y + 1
+            position_status.obstacle_x = position_status.pos_x + dx
+            position_status.obstacle_y = position_status.pos_y + dy
         else:
-            position_status.pos_y = position_status.pos_y + 1
+            position_status.pos_x = position_status.pos_x + dx
+            position_status.pos_y = position_status.pos_y + dy
         return position_status.get_tuple_with_obstacle()
 
 
-class EastState(State):
-    def handle_left_action(self, position_status: PositionStatus) -> Tuple[
-        int, int, str]:
-        self.context.transition_to(SouthState())
-        position_status.heading = "S"
-        return position_status.get_tuple()
+class NorthState(State):
+    heading = "N"
+    index = 0
 
-    def handle_right_action(self, position_status: PositionStatus) -> Tuple[
-        int, int, str]:
-        self.context.transition_to(NorthState())
-        position_status.heading = "N"
-        return position_status.get_tuple()
 
-    def handle_forward_action(self, position_status: PositionStatus, has_obstacle_ahead: bool) -> Tuple[int, int, str, Optional[int], Optional[int]]:
-        if has_obstacle_ahead:
-            position_status.obstacle_x = position_status.pos_x - 1
-            position_status.obstacle_y = position_status.pos_y
-        else:
-            position_status.pos_x = position_status.pos_x - 1
-        return position_status.get_tuple_with_obstacle()
+class EastState(State):
+    heading = "E"
+    index = 1
 
 
 class WestState(State):
-    def handle_left_action(self, position_status: PositionStatus) -> Tuple[
-        int, int, str]:
-        self.context.transition_to(NorthState())
-        position_status.heading = "N"
-        return position_status.get_tuple()
-
-    def handle_right_action(self, position_status: PositionStatus) -> Tuple[
-        int, int, str]:
-        self.context.transition_to(SouthState())
-        position_status.heading = "S"
-        return position_status.get_tuple()
-
-    def handle_forward_action(self, position_status: PositionStatus, has_obstacle_ahead: bool) -> Tuple[int, int, str, Optional[int], Optional[int]]:
-        if has_obstacle_ahead:
-            position_status.obstacle_x = position_status.pos_x + 1
-            position_status.obstacle_y = position_status.pos_y
-        else:
-            position_status.pos_x = position_status.pos_x + 1
-        return position_status.get_tuple_with_obstacle()
+    heading = "W"
+    index = 2
 
 
 class SouthState(State):
-    def handle_left_action(self, position_status: PositionStatus) -> Tuple[
-        int, int, str]:
-        self.context.transition_to(NorthState())
-        position_status.heading = "N"
-        return position_status.get_tuple()
-
-    def handle_right_action(self, position_status: PositionStatus) -> Tuple[
-        int, int, str]:
-        self.context.transition_to(SouthState())
-        position_status.heading = "S"
-        return position_status.get_tuple()
-
-    def handle_forward_action(self, position_status: PositionStatus, has_obstacle_ahead: bool) -> Tuple[int, int, str, Optional[int], Optional[int]]:
-        if has_obstacle_ahead:
-            position_status.obstacle_x = position_status.pos_x
-            position_status.obstacle_y = position_status.pos_y - 1
-        else:
-            position_status.pos_y = position_status.pos_y - 1
-
-        return position_status.get_tuple_with_obstacle()
+    heading = "S"
+    index = 3
+
+
+STATES: Tuple[State, ...] = (NorthState(), EastState(), WestState(), SouthState())
+STATE_BY_HEADING: Dict[str, State] = {state.heading: state for state in STATES}
+
+# Heading semantics of the robot, as established by the original per-state
+# handlers (note that turning right while heading S keeps the robot heading S)
+LEFT_OF: Dict[str, str] = {"N": "E", "E": "S", "W": "N", "S": "N"}
+RIGHT_OF: Dict[str, str] = {"N": "W", "E": "N", "W": "S", "S": "S"}
+FORWARD_DELTA: Dict[str, Tuple[int, int]] = {"N": (0, 1), "E": (-1, 0), "W": (1, 0), "S": (0, -1)}
+
+# command -> state -> (new state, dx, dy)
+TRANSITIONS: Dict[str, Dict[State, Tuple[State, int, int]]] = {
+    "l": {state: (STATE_BY_HEADING[LEFT_OF[state.heading]], 0, 0) for state in STATES},
+    "r": {state: (STATE_BY_HEADING[RIGHT_OF[state.heading]], 0, 0) for state in STATES},
+    "f": {state: (state, *FORWARD_DELTA[state.heading]) for state in STATES},
+}
+
+
+def _shortest_turns() -> Tuple[Tuple[str, ...], ...]:
+    table = []
+    for source in STATES:
+        turns = {source: ""}
+        queue = deque([source])
+        while queue:
+            state = queue.popleft()
+            for command in ("l", "r"):
+                target = TRANSITIONS[command][state][0]
+                if target not in turns:
+                    turns[target] = turns[state] + command
+                    queue.append(target)
+        table.append(tuple(turns[target] for target in STATES))
+    return tuple(table)
+
+
+# TURNS[from state index][to state index] -> the shortest rotation sequence
+TURNS = _shortest_turns()
+
+# Per state index: the state index reached by each turn and the forward step
+LEFT_TO: Tuple[int, ...] = tuple(TRANSITIONS["l"][state][0].index for state in STATES)
+RIGHT_TO: Tuple[int, ...] = tuple(TRANSITIONS["r"][state][0].index for state in STATES)
+FORWARD_STEP: Tuple[Tuple[int, int], ...] = tuple(TRANSITIONS["f"][state][1:] for state in STATES)
+
+_LEFT_TRANSITIONS = TRANSITIONS["l"]
+_RIGHT_TRANSITIONS = TRANSITIONS["r"]
+_FORWARD_TRANSITIONS = TRANSITIONS["f"]
@@ -0,0 +1,328 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import struct
+from typing import Dict, Iterable, List, NamedTuple, Optional, Set, Tuple, Union
+
+from .async_cleaning_robot import AsyncCleaningRobot
+from .cleaning_robot import CleaningRobot, CleaningRobotError
+from .position_state_manager import Pose
+
+# Client to server: request id, robot id, opcode, reserved
+REQUEST = struct.Struct("<IHcx")
+# Server to client: request id, robot id, flags, heading, x, y, obstacle x, obstacle y
+RESPONSE = struct.Struct("<IHBciiii")
+
+# Opcodes, besides the robot commands 'f', 'l' and 'r'
+INITIALIZE = b"i"
+STATUS = b"s"
+MOVES = frozenset((b"f", b"l", b"r"))
+
+# Response flags
+OBSTACLE = 1
+LOW_BATTERY = 2
+# The command failed, e.g. the temperature is too high or a sensor read raised; the pose is the current one
+ERROR = 4
+# Unknown robot or opcode, or a move of a robot that was not initialized; nothing was executed
+REJECTED = 8
+
+# Bytes of responses buffered for a connection before the server stops reading its requests
+HIGH_WATER = 64 * 1024
+
+
+class StatusFrame(NamedTuple):
+    request_id: int
+    robot_id: int
+    flags: int
+    pose: Pose
+    obstacle: Optional[Tuple[int, int]]
+
+    @property
+    def low_battery(self) -> bool:
+        return bool(self.flags & LOW_BATTERY)
+
+    @property
+    def ok(self) -> bool:
+        return not self.flags & (ERROR | REJECTED)
+
+    def status(self) -> str:
+        """
+        The status as execute_command would have returned it, e.g. "(0,0,N)(0,1)"
+        """
+        status = f"({self.pose.x},{self.pose.y},{self.pose.heading})"
+        if self.obstacle is not None:
+            status += f"({self.obstacle[0]},{self.obstacle[1]})"
+        return f"!{status}" if self.low_battery else status
+
+
+def encode_request(request_id: int, robot_id: int, opcode: Union[str, bytes]) -> bytes:
+    if isinstance(opcode, str):
+        opcode = opcode.encode("ascii")
+    return REQUEST.pack(request_id, robot_id, opcode)
+
+
+def encode_response(request_id: int, robot_id: int, flags: int, pose: Pose,
+                    obstacle: Optional[Tuple[int, int]] = None) -> bytes:
+    heading = pose.heading.encode("ascii") if pose.heading is not None else b"?"
+    obstacle_x, obstacle_y = obstacle if obstacle is not None else (0, 0)
+    return RESPONSE.pack(request_id, robot_id, flags, heading, pose.x or 0, pose.y or 0, obstacle_x, obstacle_y)
+
+
+def decode_response(frame: bytes) -> StatusFrame:
+    request_id, robot_id, flags, heading, x, y, obstacle_x, obstacle_y = RESPONSE.unpack(frame)
+    obstacle = (obstacle_x, obstacle_y) if flags & OBSTACLE else None
+    return StatusFrame(request_id, robot_id, flags, Pose(x, y, heading.decode("ascii")), obstacle)
+
+
+class _Connection:
+    """
+    Response side of a client connection: frames are gathered and written once per loop iteration
+    """
+
+    def __init__(self, writer: asyncio.StreamWriter) -> None:
+        self.writer = writer
+        self._buffer = bytearray()
+        self._flush_scheduled = False
+
+    def send(self, frame: bytes) -> None:
+        if self.writer.is_closing():
+            return
+        self._buffer += frame
+        if not self._flush_scheduled:
+            self._flush_scheduled = True
+            asyncio.get_running_loop().call_soon(self._flush)
+
+    def _flush(self) -> None:
+        self._flush_scheduled = False
+        if self._buffer and not self.writer.is_closing():
+            self.writer.write(bytes(self._buffer))
+        self._buffer.clear()
+
+
+class RobotServer:
+    """
+    Serves the commands of the RMS for several robots over TCP or Unix sockets.
+    Clients pipeline fixed-size REQUEST frames and get one RESPONSE frame back per request,
+    carrying the request id. Each robot executes its commands one at a time in arrival order,
+    while different robots run concurrently; a robot queue holds at most `max_pending`
+    requests, beyond which the server stops reading from the clients that feed it.
+    """
+
+    def __init__(self, robots: Optional[Dict[int, Union[AsyncCleaningRobot, CleaningRobot]]] = None,
+                 max_pending: int = 1024) -> None:
+        if max_pending < 1:
+            raise CleaningRobotError(f"max_pending must be at least 1, got {max_pending}")
+        self.max_pending = max_pending
+        self.robots: Dict[int, AsyncCleaningRobot] = {}
+        self.commands_executed = 0
+        self._queues: Dict[int, asyncio.Queue] = {}
+        self._workers: List[asyncio.Task] = []
+        self._servers: List[asyncio.AbstractServer] = []
+        self._writers: Set[asyncio.StreamWriter] = set()
+        for robot_id, robot in (robots or {}).items():
+            self.add_robot(robot_id, robot)
+
+    def add_robot(self, robot_id: int,
+                  robot: Optional[Union[AsyncCleaningRobot, CleaningRobot]] = None) -> AsyncCleaningRobot:
+        """
+        :param robot: the robot to serve, a new initialized one if omitted
+        """
+        if not 0 <= robot_id <= 0xFFFF:
+            raise CleaningRobotError(f"Robot ids range from 0 to 65535, got {robot_id}")
+        if robot_id in self.robots:
+            raise CleaningRobotError(f"Robot {robot_id} is already served")
+        if robot is None:
+            robot = AsyncCleaningRobot()
+            robot.initialize_robot()
+        elif isinstance(robot, CleaningRobot):
+            robot = AsyncCleaningRobot(robot)
+        self.robots[robot_id] = robot
+        return robot
+
+    async def start_tcp(self, host: str = "127.0.0.1", port: int = 0) -> Tuple[str, int]:
+        """
+        :param port: 0 to pick a free port
+        :return: the address the server listens on
+        """
+        server = await asyncio.start_server(self._serve, host, port)
+        self._servers.append(server)
+        return server.sockets[0].getsockname()[:2]
+
+    async def start_unix(self, path: str) -> None:
+        self._servers.append(await asyncio.start_unix_server(self._serve, path))
+
+    async def close(self) -> None:
+        for server in self._servers:
+            server.close()
+        for writer in list(self._writers):
+            writer.close()
+        for server in self._servers:
+            await server.wait_closed()
+        self._servers.clear()
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers.clear()
+        self._queues.clear()
+
+    async def __aenter__(self) -> RobotServer:
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
+
+    async def _serve(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        connection = _Connection(writer)
+        self._writers.add(writer)
+        pending = b""
+        try:
+            while True:
+                chunk = await reader.read(65536)
+                if not chunk:
+                    break
+                data = pending + chunk
+                complete = len(data) - len(data) % REQUEST.size
+                pending = data[complete:]
+                for request_id, robot_id, opcode in REQUEST.iter_unpack(data[:complete]):
+                    queue = self._queue(robot_id)
+                    if queue is None or (opcode not in MOVES and opcode != INITIALIZE and opcode != STATUS):
+                        connection.send(encode_response(request_id, robot_id, REJECTED, Pose(None, None, None)))
+                    else:
+                        await queue.put((connection, request_id, opcode))
+                if writer.transport.get_write_buffer_size() > HIGH_WATER:
+                    await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            self._writers.discard(writer)
+            writer.close()
+
+    def _queue(self, robot_id: int) -> Optional[asyncio.Queue]:
+        queue = self._queues.get(robot_id)
+        if queue is None:
+            robot = self.robots.get(robot_id)
+            if robot is None:
+                return None
+            queue = self._queues[robot_id] = asyncio.Queue(self.max_pending)
+            self._workers.append(asyncio.create_task(self._work(robot_id, robot, queue)))
+        return queue
+
+    async def _work(self, robot_id: int, robot: AsyncCleaningRobot, queue: asyncio.Queue) -> None:
+        while True:
+            connection, request_id, opcode = await queue.get()
+            if connection.writer.is_closing():
+                continue  # Nobody is left to answer, e.g. the client disconnected with requests queued
+            try:
+                response = await self._execute(request_id, robot_id, robot, opcode)
+            except Exception:
+                # Keep serving the robot: a failed request must not stall the ones queued after it
+                logging.exception("Robot %d failed to execute %r", robot_id, opcode)
+                response = encode_response(request_id, robot_id, ERROR, robot.pose)
+            connection.send(response)
+
+    async def _execute(self, request_id: int, robot_id: int, robot: AsyncCleaningRobot, opcode: bytes) -> bytes:
+        pose = robot.pose
+        if opcode == INITIALIZE:
+            robot.initialize_robot()
+            return encode_response(request_id, robot_id, 0, robot.pose)
+        if pose.heading is None:
+            return encode_response(request_id, robot_id, REJECTED if opcode != STATUS else 0, pose)
+        if opcode == STATUS:
+            return encode_response(request_id, robot_id, 0, pose)
+        try:
+            status = await robot.execute_command(opcode.decode("ascii"))
+        except CleaningRobotError:
+            return encode_response(request_id, robot_id, ERROR, robot.pose)
+        self.commands_executed += 1
+        pose = robot.pose
+        flags = 0
+        obstacle = None
+        if status[0] == "!":
+            flags = LOW_BATTERY
+        elif ")(" in status:
+            # The robot stayed in its cell, facing the obstacle
+            flags = OBSTACLE
+            obstacle = robot.robot.position_state_machine.cell_ahead(pose)
+        return encode_response(request_id, robot_id, flags, pose, obstacle)
+
+
+class RobotClient:
+    """
+    RMS side of a RobotServer connection. Requests are pipelined: send() returns at once
+    and the responses are matched back to their requests by id.
+    """
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.reader = reader
+        self.writer = writer
+        self._next_id = 0
+        self._pending: Dict[int, asyncio.Future] = {}
+        self._receiver = asyncio.create_task(self._receive())
+
+    @classmethod
+    async def connect_tcp(cls, host: str, port: int) -> RobotClient:
+        return cls(*await asyncio.open_connection(host, port))
+
+    @classmethod
+    async def connect_unix(cls, path: str) -> RobotClient:
+        return cls(*await asyncio.open_unix_connection(path))
+
+    def send(self, robot_id: int, opcode: Union[str, bytes]) -> asyncio.Future:
+        """
+        Queue a request without waiting for the server
+        :return: a future resolved with the StatusFrame of the request
+        """
+        request_id = self._next_id
+        self._next_id = (request_id + 1) & 0xFFFFFFFF
+        future = asyncio.get_running_loop().create_future()
+        self._pending[request_id] = future
+        self.writer.write(encode_request(request_id, robot_id, opcode))
+        return future
+
+    async def request(self, robot_id: int, opcode: Union[str, bytes]) -> StatusFrame:
+        future = self.send(robot_id, opcode)
+        await self.writer.drain()
+        return await future
+
+    async def execute_commands(self, robot_id: int, commands: Iterable[str]) -> List[StatusFrame]:
+        """
+        Pipeline a whole route, e.g. "ffrfl", and wait for all of its statuses
+        """
+        futures = [self.send(robot_id, command) for command in commands]
+        await self.writer.drain()
+        return list(await asyncio.gather(*futures))
+
+    async def close(self) -> None:
+        self.writer.close()
+        await self.writer.wait_closed()
+        self._receiver.cancel()
+        await asyncio.gather(self._receiver, return_exceptions=True)
+
+    async def __aenter__(self) -> RobotClient:
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
+
+    async def _receive(self) -> None:
+        pending = b""
+        try:
+            while True:
+                chunk = await self.reader.read(65536)
+                if not chunk:
+                    break
+                data = pending + chunk
+                complete = len(data) - len(data) % RESPONSE.size
+                pending = data[complete:]
+                for offset in range(0, complete, RESPONSE.size):
+                    frame = decode_response(data[offset:offset + RESPONSE.size])
+                    future = self._pending.pop(frame.request_id, None)
+                    if future is not None and not future.done():
+                        future.set_result(frame)
+        finally:
+            error = ConnectionError("Connection to the robot server closed")
+            for future in self._pending.values():
+                if not future.done():
+                    future.set_exception(error)
+            self._pending.clear()
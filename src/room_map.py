@@ -0,0 +1,128 @@
+from __future__ import annotations
+
+from typing import Optional, Tuple
+
+import numpy as np
+
+from .cleaning_robot import CleaningRobotError
+
+
+def parse_obstacle(status: str) -> Optional[Tuple[int, int]]:
+    """
+    Extract the obstacle cell from a status returned by execute_command, e.g. "(0,0,N)(0,1)"
+    :return: the obstacle coordinates, or None if the status carries no obstacle
+    """
+    split_at = status.find(")(")
+    if split_at < 0:
+        return None
+    obstacle_x, obstacle_y = status[split_at + 2:-1].split(",")
+    return int(obstacle_x), int(obstacle_y)
+
+
+class RoomMap:
+    """
+    Occupancy grid of the room, backed by a NumPy boolean array indexed [y, x].
+    The origin cell (0,0) is the bottom-left corner of the room.
+    """
+
+    def __init__(self, width: int, height: int) -> None:
+        if width <= 0 or height <= 0:
+            raise CleaningRobotError(f"Invalid room size {width}x{height}")
+        self.width = width
+        self.height = height
+        self.grid = np.zeros((height, width), dtype=bool)
+        # Bumped every time the set of known obstacles changes
+        self.version = 0
+        # Obstacles reported outside the room, e.g. the walls, which are not stored
+        self.outside_obstacles = 0
+
+    def in_bounds(self, x: int, y: int) -> bool:
+        return 0 <= x < self.width and 0 <= y < self.height
+
+    def is_obstacle(self, x: int, y: int) -> bool:
+        return bool(self.grid[y, x]) if self.in_bounds(x, y) else False
+
+    def is_free(self, x: int, y: int) -> bool:
+        return self.in_bounds(x, y) and not self.grid[y, x]
+
+    def add_obstacle(self, x: int, y: int) -> bool:
+        """
+        :return: True if the obstacle was not known yet; False for an obstacle outside the room,
+            which is only counted in outside_obstacles
+        """
+        if not self.in_bounds(x, y):
+            self.outside_obstacles += 1
+            return False
+        if self.grid[y, x]:
+            return False
+        self.grid[y, x] = True
+        self.version += 1
+        return True
+
+    def remove_obstacle(self, x: int, y: int) -> bool:
+        """
+        :return: True if an obstacle was removed
+        """
+        if not self.in_bounds(x, y) or not self.grid[y, x]:
+            return False
+        self.grid[y, x] = False
+        self.version += 1
+        return True
+
+    def record_status(self, status: str) -> Optional[Tuple[int, int]]:
+        """
+        Store the obstacle reported in a status string, if any
+        :return: the obstacle cell if the status carried one
+        """
+        obstacle = parse_obstacle(status)
+        if obstacle is not None:
+            self.add_obstacle(obstacle[0], obstacle[1])
+        return obstacle
+
+    def add_obstacles(self, xs: np.ndarray, ys: np.ndarray) -> int:
+        """
+        Bulk insert, e.g. from FleetSimulator.obstacle_x/obstacle_y masked by obstacle_mask;
+        obstacles outside the room are skipped and counted in outside_obstacles
+        :return: the number of obstacles that were not known yet
+        """
+        xs = np.asarray(xs, dtype=np.int64)
+        ys = np.asarray(ys, dtype=np.int64)
+        inside = (xs >= 0) & (xs < self.width) & (ys >= 0) & (ys < self.height)
+        self.outside_obstacles += int(inside.size - np.count_nonzero(inside))
+        before = self.obstacle_count()
+        self.grid[ys[inside], xs[inside]] = True
+        added = self.obstacle_count() - before
+        if added:
+            self.version += 1
+        return added
+
+    def obstacles_at(self, xs: np.ndarray, ys: np.ndarray) -> np.ndarray:
+        """
+        Bulk lookup; cells outside the room are reported as free
+        """
+        xs = np.asarray(xs, dtype=np.int64)
+        ys = np.asarray(ys, dtype=np.int64)
+        inside = (xs >= 0) & (xs < self.width) & (ys >= 0) & (ys < self.height)
+        result = np.zeros(xs.shape, dtype=bool)
+        result[inside] = self.grid[ys[inside], xs[inside]]
+        return result
+
+    def obstacle_count(self) -> int:
+        return int(np.count_nonzero(self.grid))
+
+    def obstacles(self) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        :return: the x and y coordinates of every known obstacle
+        """
+        ys, xs = np.nonzero(self.grid)
+        return xs, ys
+
+    def region(self, x0: int, y0: int, x1: int, y1: int) -> np.ndarray:
+        """
+        View of the obstacles in the rectangle [x0, x1) x [y0, y1)
+        """
+        return self.grid[max(y0, 0):min(y1, self.height), max(x0, 0):min(x1, self.width)]
+
+    def clear(self) -> None:
+        self.grid[:] = False
+        self.version += 1
@@ -0,0 +1,156 @@
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Optional, Tuple
+
+import numpy as np
+
+from mock.ibs import IBS
+from mock.ltc2990 import LTC2990
+from .cleaning_robot import CleaningRobotError
+
+
+@dataclass
+class SensorStats:
+    samples: int
+    latest: Optional[float]
+    mean: Optional[float]
+    minimum: Optional[float]
+    maximum: Optional[float]
+
+
+class RingBuffer:
+    """
+    Fixed-size buffer of timestamped readings; the oldest reading is overwritten when full
+    """
+
+    def __init__(self, size: int) -> None:
+        if size < 1:
+            raise CleaningRobotError(f"Ring buffer size must be at least 1, got {size}")
+        self.size = size
+        self._values = np.zeros(size, dtype=np.float64)
+        self._timestamps = np.zeros(size, dtype=np.float64)
+        self._next = 0
+        self._count = 0
+        self._lock = threading.Lock()
+        # Raw reading and timestamp, swapped in one assignment so readers never see a torn pair
+        self._latest: Optional[Tuple[object, float]] = None
+
+    def __len__(self) -> int:
+        return self._count
+
+    def append(self, value, timestamp: float) -> None:
+        with self._lock:
+            self._values[self._next] = value
+            self._timestamps[self._next] = timestamp
+            self._next = (self._next + 1) % self.size
+            self._count = min(self._count + 1, self.size)
+        self._latest = (value, timestamp)
+
+    def latest(self) -> Optional[Tuple[object, float]]:
+        return self._latest
+
+    def values(self) -> np.ndarray:
+        """
+        Buffered readings, oldest first
+        """
+        with self._lock:
+            if self._count < self.size:
+                return self._values[:self._count].copy()
+            return np.roll(self._values, -self._next)
+
+    def stats(self) -> SensorStats:
+        values = self.values()
+        latest = self._latest
+        if not len(values):
+            return SensorStats(0, None, None, None, None)
+        return SensorStats(len(values), float(latest[0]), float(values.mean()), float(values.min()),
+                           float(values.max()))
+
+
+class SensorSampler:
+    """
+    Background thread polling the temperature sensor and the IBS into ring buffers,
+    so that commands read the latest sample instead of going over the I2C bus.
+    """
+
+    def __init__(self, ltc2990: LTC2990, ibs: IBS, rate_hz: float = 10.0, buffer_size: int = 64,
+                 max_age: float = 0.5, clock: Callable[[], float] = time.monotonic) -> None:
+        """
+        :param rate_hz: how many times per second both sensors are read
+        :param max_age: samples older than this many seconds are considered stale
+        """
+        self.ltc2990 = ltc2990
+        self.ibs = ibs
+        self.period = 1.0 / rate_hz
+        self.max_age = max_age
+        self.clock = clock
+        self.temperature = RingBuffer(buffer_size)
+        self.charge = RingBuffer(buffer_size)
+        self.errors = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @classmethod
+    def for_robot(cls, robot, **kwargs) -> SensorSampler:
+        """
+        Create a sampler for the sensors of a CleaningRobot and let the robot read from it
+        """
+        sampler = cls(robot.ltc2990, robot.ibs, **kwargs)
+        robot.sensor_sampler = sampler
+        return sampler
+
+    def sample_once(self) -> None:
+        self.temperature.append(self.ltc2990.get_temperature(), self.clock())
+        self.charge.append(self.ibs.get_charge_left(), self.clock())
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="sensor-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+
+    def __enter__(self) -> SensorSampler:
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self.sample_once()
+            except Exception:
+                self.errors += 1
+                logging.exception("Sensor sampling failed")
+            self._stop.wait(self.period)
+
+    def _fresh(self, buffer: RingBuffer):
+        latest = buffer.latest()
+        if latest is None or self.clock() - latest[1] > self.max_age:
+            return None
+        return latest[0]
+
+    def latest_temperature(self) -> Optional[int]:
+        """
+        :return: the latest temperature, or None if there is no sample younger than max_age
+        """
+        return self._fresh(self.temperature)
+
+    def latest_charge(self) -> Optional[int]:
+        """
+        :return: the latest charge percentage, or None if there is no sample younger than max_age
+        """
+        return self._fresh(self.charge)
@@ -0,0 +1,214 @@
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, List, Optional
+
+from mock.ibs import IBS
+from mock.ltc2990 import LTC2990
+from .cleaning_robot import CleaningRobot, CleaningRobotError
+
+TEMPERATURE = "temperature"
+CHARGE = "charge"
+
+
+@dataclass
+class Threshold:
+    """
+    Trips when a value reaches `trip_at` and clears only once it is back past `clear_at`
+    """
+    trip_at: float
+    clear_at: float
+    # Distance from the next level beyond which the sensor is polled at the slowest rate
+    band: float
+    tripped: bool = False
+
+    def __post_init__(self) -> None:
+        if self.trip_at == self.clear_at or self.band <= 0:
+            raise CleaningRobotError(f"Invalid threshold {self}")
+
+    @property
+    def rising(self) -> bool:
+        return self.trip_at > self.clear_at
+
+    def update(self, value: float) -> bool:
+        """
+        :return: True if the threshold tripped or cleared with this value
+        """
+        if self.tripped:
+            changed = value <= self.clear_at if self.rising else value >= self.clear_at
+        else:
+            changed = value >= self.trip_at if self.rising else value <= self.trip_at
+        if changed:
+            self.tripped = not self.tripped
+        return changed
+
+    def margin(self, value: float) -> float:
+        """
+        How far the value is from the level that would change the state
+        """
+        return abs((self.clear_at if self.tripped else self.trip_at) - value)
+
+
+@dataclass
+class ThresholdEvent:
+    sensor: str
+    tripped: bool
+    value: float
+    timestamp: float
+
+
+class WatchedSensor:
+    """
+    A sensor reading, its threshold and when it is due to be read again
+    """
+
+    def __init__(self, name: str, read: Callable[[], float], threshold: Threshold) -> None:
+        self.name = name
+        self.read = read
+        self.threshold = threshold
+        self.value: Optional[float] = None
+        self.due = float("-inf")
+        self.reads = 0
+
+
+class ThresholdWatch:
+    """
+    Watches the LTC2990 temperature and the IBS charge against their limits, with hysteresis.
+    Each sensor is read again after an interval that shrinks as its value gets closer to a
+    limit, so the bus traffic follows the risk rather than the command rate. Crossing a limit
+    in either direction produces a ThresholdEvent for the listeners.
+    """
+
+    def __init__(self, ltc2990: LTC2990, ibs: IBS, temperature: Optional[Threshold] = None,
+                 charge: Optional[Threshold] = None, min_interval: float = 0.05, max_interval: float = 5.0,
+                 clock: Callable[[], float] = time.monotonic) -> None:
+        """
+        :param temperature: defaults to tripping at 70°C and clearing at 65°C
+        :param charge: defaults to tripping at 10% and clearing at 15%
+        :param min_interval: seconds between two reads of a sensor at a limit
+        :param max_interval: seconds between two reads of a sensor far from its limits
+        """
+        if not 0 < min_interval <= max_interval:
+            raise CleaningRobotError(f"Invalid polling intervals {min_interval}s to {max_interval}s")
+        self.temperature = WatchedSensor(TEMPERATURE, ltc2990.get_temperature,
+                                         temperature if temperature is not None else Threshold(70, 65, 20))
+        self.charge = WatchedSensor(CHARGE, ibs.get_charge_left,
+                                    charge if charge is not None else Threshold(10, 15, 40))
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.clock = clock
+        self.errors = 0
+        self._listeners: List[Callable[[ThresholdEvent], None]] = []
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @classmethod
+    def for_robot(cls, robot: CleaningRobot, **kwargs) -> ThresholdWatch:
+        """
+        Create a watch on the sensors of a CleaningRobot that gates its moves and
+        switches its cleaning system and recharge LED when the charge limit is crossed
+        """
+        if robot.clock is not None:
+            kwargs.setdefault("clock", robot.clock)
+        watch = cls(robot.ltc2990, robot.ibs, **kwargs)
+
+        def on_event(event: ThresholdEvent) -> None:
+            if event.sensor == CHARGE:
+                robot._switch_cleaning_system(not event.tripped)
+
+        watch.add_listener(on_event)
+        robot.threshold_watch = watch
+        return watch
+
+    def add_listener(self, listener: Callable[[ThresholdEvent], None]) -> None:
+        self._listeners.append(listener)
+
+    def poll(self) -> List[ThresholdEvent]:
+        """
+        Read the sensors that are due and report the thresholds crossed
+        """
+        events = []
+        with self._lock:
+            now = self.clock()
+            for sensor in (self.temperature, self.charge):
+                if now >= sensor.due:
+                    event = self._sample(sensor, now)
+                    if event is not None:
+                        events.append(event)
+        for event in events:
+            for listener in self._listeners:
+                listener(event)
+        return events
+
+    def next_due(self) -> float:
+        return min(self.temperature.due, self.charge.due)
+
+    def overheated(self) -> bool:
+        self.poll()
+        return self.temperature.threshold.tripped
+
+    def battery_low(self) -> bool:
+        self.poll()
+        return self.charge.threshold.tripped
+
+    def check_safety(self, robot: CleaningRobot) -> Optional[str]:
+        """
+        Safety check of a move, see CleaningRobot._check_safety_steps
+        """
+        self.poll()
+        robot.last_temperature = self.temperature.value
+        robot.last_charge = self.charge.value
+        if self.temperature.threshold.tripped:
+            robot._temperature_error(self.temperature.value)
+        if self.charge.threshold.tripped:
+            return f"!{robot.robot_status()}"
+        return None
+
+    def start(self) -> None:
+        """
+        Poll in a background thread, so that events fire while the robot is idle too
+        """
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="threshold-watch", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+
+    def __enter__(self) -> ThresholdWatch:
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self.poll()
+            except Exception:
+                self.errors += 1
+                logging.exception("Threshold watch polling failed")
+            self._stop.wait(min(max(self.next_due() - self.clock(), self.min_interval), self.max_interval))
+
+    def _sample(self, sensor: WatchedSensor, now: float) -> Optional[ThresholdEvent]:
+        value = sensor.read()
+        sensor.value = value
+        sensor.reads += 1
+        threshold = sensor.threshold
+        changed = threshold.update(value)
+        distance = min(threshold.margin(value) / threshold.band, 1.0)
+        sensor.due = now + self.min_interval + (self.max_interval - self.min_interval) * distance
+        if changed:
+            return ThresholdEvent(sensor.name, threshold.tripped, value, now)
+        return None
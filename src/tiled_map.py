@@ -0,0 +1,252 @@
+from __future__ import annotations
+
+import json
+import os
+from collections import OrderedDict
+from typing import Optional, Set, Tuple
+
+import numpy as np
+
+from .cleaning_robot import CleaningRobotError
+from .room_map import parse_obstacle
+
+# Cell flags
+OBSTACLE = 1
+CLEANED = 2
+
+METADATA_FILE = "map.json"
+FORMAT_VERSION = 1
+
+TileKey = Tuple[int, int]
+
+
+class TiledRoomMap:
+    """
+    Unbounded room map stored on disk as square tiles of one byte of flags per cell.
+    Tiles are memory-mapped when first touched and unmapped least recently used first,
+    so only the tiles around the robot take RAM. Coordinates may be negative.
+    """
+
+    def __init__(self, directory, tile_size: int = 256, max_open_tiles: int = 64,
+                 flush_after_writes: Optional[int] = 4096) -> None:
+        """
+        :param directory: where the tiles are stored, created if needed
+        :param tile_size: cells per tile side, a power of two; an existing map keeps its own
+        :param max_open_tiles: tiles kept mapped at the same time
+        :param flush_after_writes: flush the dirty tiles once this many cells changed,
+            None to flush only on eviction, flush() and close()
+        """
+        if tile_size < 1 or tile_size & (tile_size - 1):
+            raise CleaningRobotError(f"Tile size must be a power of two, got {tile_size}")
+        if max_open_tiles < 1:
+            raise CleaningRobotError(f"At least one tile must stay open, got {max_open_tiles}")
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        metadata_path = os.path.join(directory, METADATA_FILE)
+        if os.path.exists(metadata_path):
+            with open(metadata_path) as metadata_file:
+                metadata = json.load(metadata_file)
+            if metadata.get("format") != FORMAT_VERSION:
+                raise CleaningRobotError(f"{directory} is not a tiled room map")
+            tile_size = metadata["tile_size"]
+        else:
+            with open(metadata_path, "w") as metadata_file:
+                json.dump({"format": FORMAT_VERSION, "tile_size": tile_size}, metadata_file)
+
+        self.tile_size = tile_size
+        self._shift = tile_size.bit_length() - 1
+        self._mask = tile_size - 1
+        self.max_open_tiles = max_open_tiles
+        self.flush_after_writes = flush_after_writes
+        self._tiles: OrderedDict[TileKey, np.memmap] = OrderedDict()
+        self._missing: Set[TileKey] = set()
+        self._dirty: Set[TileKey] = set()
+        self._last_key: Optional[TileKey] = None
+        self._last_tile: Optional[np.memmap] = None
+        self.writes_since_flush = 0
+        self.tiles_loaded = 0
+        # Bumped every time a cell changes
+        self.version = 0
+
+    @property
+    def open_tiles(self) -> int:
+        return len(self._tiles)
+
+    @property
+    def dirty_tiles(self) -> int:
+        return len(self._dirty)
+
+    def flags(self, x: int, y: int) -> int:
+        tile = self._tile((x >> self._shift, y >> self._shift), create=False)
+        if tile is None:
+            return 0
+        return int(tile[y & self._mask, x & self._mask])
+
+    def is_obstacle(self, x: int, y: int) -> bool:
+        return bool(self.flags(x, y) & OBSTACLE)
+
+    def is_free(self, x: int, y: int) -> bool:
+        return not self.flags(x, y) & OBSTACLE
+
+    def is_cleaned(self, x: int, y: int) -> bool:
+        return bool(self.flags(x, y) & CLEANED)
+
+    def add_obstacle(self, x: int, y: int) -> bool:
+        """
+        :return: True if the obstacle was not known yet
+        """
+        return self._set(x, y, OBSTACLE)
+
+    def remove_obstacle(self, x: int, y: int) -> bool:
+        """
+        :return: True if an obstacle was removed
+        """
+        return self._clear(x, y, OBSTACLE)
+
+    def mark_cleaned(self, x: int, y: int) -> bool:
+        """
+        :return: True if the cell had not been cleaned yet
+        """
+        return self._set(x, y, CLEANED)
+
+    def clear_cleaned(self) -> int:
+        """
+        Clear the cleaned flag of every cell, the stored tiles included
+        :return: the number of cells that were flagged cleaned
+        """
+        cleared = 0
+        for name in os.listdir(self.directory):
+            if not (name.startswith("tile_") and name.endswith(".u8")):
+                continue
+            tile_x, tile_y = name[len("tile_"):-len(".u8")].split("_")
+            key = (int(tile_x), int(tile_y))
+            tile = self._tile(key, create=False)
+            count = int(np.count_nonzero(tile & CLEANED))
+            if count:
+                tile &= 0xFF ^ CLEANED
+                cleared += count
+                self._changed(key)
+        return cleared
+
+    def record_status(self, status: str) -> Optional[Tuple[int, int]]:
+        """
+        Store the obstacle reported in a status string, if any
+        :return: the obstacle cell if the status carried one
+        """
+        obstacle = parse_obstacle(status)
+        if obstacle is not None:
+            self.add_obstacle(obstacle[0], obstacle[1])
+        return obstacle
+
+    def preload(self, x: int, y: int, radius: int = 1) -> int:
+        """
+        Map the stored tiles within `radius` tiles of cell (x, y), e.g. around the robot's pose
+        :return: the number of tiles that are open afterwards among those
+        """
+        center_x, center_y = x >> self._shift, y >> self._shift
+        opened = 0
+        for tile_y in range(center_y - radius, center_y + radius + 1):
+            for tile_x in range(center_x - radius, center_x + radius + 1):
+                if self._tile((tile_x, tile_y), create=False) is not None:
+                    opened += 1
+        return opened
+
+    def region(self, x0: int, y0: int, x1: int, y1: int) -> np.ndarray:
+        """
+        Copy of the flags in the rectangle [x0, x1) x [y0, y1), indexed [y - y0, x - x0]
+        """
+        result = np.zeros((max(y1 - y0, 0), max(x1 - x0, 0)), dtype=np.uint8)
+        size = self.tile_size
+        for tile_y in range(y0 >> self._shift, ((y1 - 1) >> self._shift) + 1):
+            for tile_x in range(x0 >> self._shift, ((x1 - 1) >> self._shift) + 1):
+                tile = self._tile((tile_x, tile_y), create=False)
+                if tile is None:
+                    continue
+                low_x, low_y = max(x0, tile_x * size), max(y0, tile_y * size)
+                high_x, high_y = min(x1, (tile_x + 1) * size), min(y1, (tile_y + 1) * size)
+                result[low_y - y0:high_y - y0, low_x - x0:high_x - x0] = \
+                    tile[low_y - tile_y * size:high_y - tile_y * size, low_x - tile_x * size:high_x - tile_x * size]
+        return result
+
+    def flush(self) -> None:
+        for key in self._dirty:
+            self._tiles[key].flush()
+        self._dirty.clear()
+        self.writes_since_flush = 0
+
+    def close(self) -> None:
+        self.flush()
+        self._tiles.clear()
+        self._last_key = self._last_tile = None
+
+    def __enter__(self) -> TiledRoomMap:
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def _tile_path(self, key: TileKey) -> str:
+        return os.path.join(self.directory, f"tile_{key[0]}_{key[1]}.u8")
+
+    def _tile(self, key: TileKey, create: bool) -> Optional[np.memmap]:
+        if key == self._last_key:
+            return self._last_tile
+        tile = self._tiles.get(key)
+        if tile is None:
+            if not create and key in self._missing:
+                return None
+            path = self._tile_path(key)
+            if os.path.exists(path):
+                mode = "r+"
+            elif create:
+                mode = "w+"
+            else:
+                self._missing.add(key)
+                return None
+            self._missing.discard(key)
+            tile = np.memmap(path, dtype=np.uint8, mode=mode, shape=(self.tile_size, self.tile_size))
+            self._tiles[key] = tile
+            self.tiles_loaded += 1
+            if len(self._tiles) > self.max_open_tiles:
+                self._evict()
+        else:
+            self._tiles.move_to_end(key)
+        self._last_key, self._last_tile = key, tile
+        return tile
+
+    def _evict(self) -> None:
+        key, tile = self._tiles.popitem(last=False)
+        if key in self._dirty:
+            tile.flush()
+            self._dirty.discard(key)
+
+    def _set(self, x: int, y: int, flag: int) -> bool:
+        key = (x >> self._shift, y >> self._shift)
+        tile = self._tile(key, create=True)
+        row, column = y & self._mask, x & self._mask
+        cell = tile[row, column]
+        if cell & flag:
+            return False
+        tile[row, column] = cell | flag
+        self._changed(key)
+        return True
+
+    def _clear(self, x: int, y: int, flag: int) -> bool:
+        key = (x >> self._shift, y >> self._shift)
+        tile = self._tile(key, create=False)
+        if tile is None:
+            return False
+        row, column = y & self._mask, x & self._mask
+        cell = tile[row, column]
+        if not cell & flag:
+            return False
+        tile[row, column] = cell & (0xFF ^ flag)
+        self._changed(key)
+        return True
+
+    def _changed(self, key: TileKey) -> None:
+        self.version += 1
+        self._dirty.add(key)
+        self.writes_since_flush += 1
+        if self.flush_after_writes is not None and self.writes_since_flush >= self.flush_after_writes:
+            self.flush()
@@ -0,0 +1,151 @@
+from __future__ import annotations
+
+import heapq
+import math
+from array import array
+from typing import Callable, List, Optional, Tuple
+
+from .cleaning_robot import CleaningRobot, CleaningRobotError
+
+Listener = Callable[[float, bool], None]
+
+
+class VirtualClock:
+    """
+    Simulated time source. Motor activations advance it instead of sleeping, so hours
+    of operation replay in seconds; listeners integrate battery drain and heating over
+    every advance and periodic callbacks fire at their exact simulated times.
+    """
+
+    def __init__(self, start: float = 0.0) -> None:
+        self.now = start
+        self._listeners: List[Listener] = []
+        self._timers: List[Tuple[float, int, float, Callable[[], None]]] = []
+        self._sequence = 0
+
+    def __call__(self) -> float:
+        return self.now
+
+    def add_listener(self, listener: Listener) -> None:
+        """
+        :param listener: called with (elapsed seconds, motor running) for every stretch of simulated time
+        """
+        self._listeners.append(listener)
+
+    def every(self, period: float, callback: Callable[[], None]) -> None:
+        """
+        Call `callback` every `period` simulated seconds, starting one period from now
+        """
+        if period <= 0:
+            raise CleaningRobotError(f"Timer period must be positive, got {period}")
+        self._sequence += 1
+        heapq.heappush(self._timers, (self.now + period, self._sequence, period, callback))
+
+    def advance(self, seconds: float, motor_running: bool = False) -> None:
+        if seconds < 0:
+            raise CleaningRobotError(f"Cannot move the clock backwards by {seconds}s")
+        target = self.now + seconds
+        timers = self._timers
+        while timers and timers[0][0] <= target:
+            due, sequence, period, callback = heapq.heappop(timers)
+            self._integrate(due - self.now, motor_running)
+            heapq.heappush(timers, (due + period, sequence, period, callback))
+            callback()
+        self._integrate(target - self.now, motor_running)
+
+    def sleep(self, seconds: float) -> None:
+        """
+        Drop-in replacement for time.sleep while the robot is idle
+        """
+        self.advance(seconds)
+
+    def _integrate(self, seconds: float, motor_running: bool) -> None:
+        if seconds > 0:
+            for listener in self._listeners:
+                listener(seconds, motor_running)
+            self.now += seconds
+
+
+class SimulatedBattery:
+    """
+    IBS stand-in whose charge drains with simulated time, faster while a motor runs
+    """
+
+    def __init__(self, clock: VirtualClock, charge: float = 100.0, motor_drain_per_second: float = 0.002,
+                 idle_drain_per_second: float = 0.0002) -> None:
+        self.charge = charge
+        self.motor_drain_per_second = motor_drain_per_second
+        self.idle_drain_per_second = idle_drain_per_second
+        self.motor_seconds = 0.0
+        self.consumed = 0.0
+        clock.add_listener(self._on_advance)
+
+    def _on_advance(self, seconds: float, motor_running: bool) -> None:
+        drain = self.motor_drain_per_second if motor_running else self.idle_drain_per_second
+        if motor_running:
+            self.motor_seconds += seconds
+        used = min(self.charge, drain * seconds)
+        self.charge -= used
+        self.consumed += used
+
+    def get_charge_left(self) -> int:
+        return int(self.charge)
+
+
+class SimulatedThermalSensor:
+    """
+    LTC2990 stand-in: first-order thermal model heating while a motor runs and
+    cooling towards ambient otherwise, integrated exactly over each time step
+    """
+
+    def __init__(self, clock: VirtualClock, ambient: float = 25.0, motor_heating_per_second: float = 0.06,
+                 time_constant: float = 600.0) -> None:
+        self.temperature = ambient
+        self.ambient = ambient
+        self.motor_heating_per_second = motor_heating_per_second
+        self.time_constant = time_constant
+        clock.add_listener(self._on_advance)
+
+    def _on_advance(self, seconds: float, motor_running: bool) -> None:
+        equilibrium = self.ambient
+        if motor_running:
+            equilibrium += self.motor_heating_per_second * self.time_constant
+        self.temperature = equilibrium + (self.temperature - equilibrium) * math.exp(-seconds / self.time_constant)
+
+    def get_temperature(self) -> int:
+        return int(round(self.temperature))
+
+
+class VirtualHardware:
+    """
+    Virtual clock plus simulated battery and temperature sensor for faster-than-real-time replays
+    """
+
+    def __init__(self, clock: Optional[VirtualClock] = None, battery: Optional[SimulatedBattery] = None,
+                 thermal: Optional[SimulatedThermalSensor] = None) -> None:
+        self.clock = clock if clock is not None else VirtualClock()
+        self.battery = battery if battery is not None else SimulatedBattery(self.clock)
+        self.thermal = thermal if thermal is not None else SimulatedThermalSensor(self.clock)
+        self.times = array('d')
+        self.charges = array('d')
+        self.temperatures = array('d')
+
+    def attach(self, robot: CleaningRobot) -> CleaningRobot:
+        """
+        Make the robot use the virtual clock and the simulated sensors
+        """
+        robot.clock = self.clock
+        robot.ibs = self.battery
+        robot.ltc2990 = self.thermal
+        return robot
+
+    def record_every(self, period: float) -> None:
+        """
+        Sample time, charge and temperature every `period` simulated seconds
+        """
+        self.clock.every(period, self._record)
+
+    def _record(self) -> None:
+        self.times.append(self.clock.now)
+        self.charges.append(self.battery.charge)
+        self.temperatures.append(self.thermal.temperature)
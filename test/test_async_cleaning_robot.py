@@ -0,0 +1,95 @@
+import asyncio
+import time
+from unittest import IsolatedAsyncioTestCase
+from unittest.mock import Mock, patch
+
+from mock import GPIO
+from mock.ibs import IBS
+from mock.ltc2990 import LTC2990
+from src import cleaning_robot
+from src.async_cleaning_robot import AsyncCleaningRobot
+from src.cleaning_robot import CleaningRobot, CleaningRobotError
+
+
+@patch.object(GPIO, "input", return_value=False)
+@patch.object(IBS, "get_charge_left", return_value=90)
+@patch.object(LTC2990, "get_temperature", return_value=50)
+class TestAsyncCleaningRobot(IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.robot = AsyncCleaningRobot()
+        self.robot.initialize_robot()
+
+    async def test_execute_command_matches_sync(self, *mocks: Mock):
+        sync_robot = CleaningRobot()
+        sync_robot.initialize_robot()
+
+        for command in "flffrfl":
+            self.assertEqual(await self.robot.execute_command(command), sync_robot.execute_command(command))
+
+    async def test_execute_command_temperature_high(self, mock_temperature_sensor: Mock, *mocks: Mock):
+        mock_temperature_sensor.return_value = 75
+
+        with self.assertRaises(CleaningRobotError):
+            await self.robot.execute_command("f")
+
+    async def test_execute_commands_low_battery(self, mock_temperature_sensor: Mock, mock_battery: Mock,
+                                                *mocks: Mock):
+        mock_battery.side_effect = [90, 9]
+
+        result = await self.robot.execute_commands("fff")
+
+        self.assertEqual(result.statuses, ["(0,1,N)", "!(0,1,N)"])
+        self.assertTrue(result.low_battery)
+
+    async def test_execute_commands_fused_and_optimized_match_sync(self, *mocks: Mock):
+        sync_robot = CleaningRobot()
+        sync_robot.initialize_robot()
+
+        result = await self.robot.execute_commands("fffrrrff", fuse_forward=True, optimize=True)
+        expected = sync_robot.execute_commands("fffrrrff", fuse_forward=True, optimize=True)
+
+        self.assertEqual(result, expected)
+        self.assertGreater(result.motor_activations_saved, 0)
+
+    async def test_fused_run_stops_the_motor_when_a_read_fails(self, mock_temperature_sensor: Mock, *mocks: Mock):
+        mock_temperature_sensor.side_effect = [50, OSError("I2C bus error")]
+
+        with patch.object(CleaningRobot, "_stop_wheel_motor") as mock_stop:
+            with self.assertRaises(OSError):
+                await self.robot.execute_commands("ff", fuse_forward=True)
+
+        mock_stop.assert_called_once()
+        self.assertEqual(self.robot.pose.y, 1)
+
+    async def test_manage_cleaning_system(self, *mocks: Mock):
+        await self.robot.manage_cleaning_system()
+
+        self.assertTrue(self.robot.robot.cleaning_system_on)
+        self.assertFalse(self.robot.robot.recharge_led_on)
+
+    async def test_manage_cleaning_system_waits_for_running_command(self, mock_temperature_sensor: Mock,
+                                                                     mock_battery: Mock, *mocks: Mock):
+        mock_battery.side_effect = [90, 5]
+        command = asyncio.create_task(self.robot.execute_command("f"))
+        await asyncio.sleep(0)
+
+        await self.robot.manage_cleaning_system()
+
+        self.assertTrue(command.done())
+        self.assertEqual(command.result(), "(0,1,N)")
+        self.assertFalse(self.robot.robot.cleaning_system_on)
+
+    @patch.object(CleaningRobot, "MOTOR_SECONDS", 0.05)
+    @patch.object(cleaning_robot, "is_deployment", return_value=True)
+    async def test_motor_waits_run_concurrently(self, *mocks: Mock):
+        robots = [AsyncCleaningRobot(offload_io=False) for _ in range(10)]
+        for robot in robots:
+            robot.initialize_robot()
+
+        started = time.perf_counter()
+        results = await asyncio.gather(*(robot.execute_commands("ff") for robot in robots))
+        elapsed = time.perf_counter() - started
+
+        self.assertLess(elapsed, 10 * 2 * 0.05)
+        self.assertEqual({result.final_status for result in results}, {"(0,2,N)"})
@@ -0,0 +1,61 @@
+import json
+import os
+import tempfile
+from unittest import TestCase
+
+from benchmarks import bench_execute_command, bench_robot_server  # noqa: F401
+from benchmarks.runner import BENCHMARKS, REFERENCE, BenchmarkResult, check_import_budgets, compare, import_seconds, \
+    over_budget, run, write
+from mock import GPIO
+
+
+class TestBenchmarks(TestCase):
+
+    def tearDown(self):
+        GPIO.reset()
+
+    def test_every_benchmark_runs(self):
+        for name, bench in BENCHMARKS.items():
+            bench.setup()()
+
+    def test_results_round_trip_and_compare(self):
+        results = run(["execute_command.turn"], repeat=1, min_time=0.01)
+        self.assertEqual([result.name for result in results], ["execute_command.turn"])
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "bench.json")
+            write(results, path)
+            with open(path) as bench_file:
+                self.assertIn("execute_command.turn", json.load(bench_file)["results"])
+
+            slower = [BenchmarkResult(result.name, result.ops_per_second / 2, result.best_seconds * 2,
+                                      result.number, result.repeat) for result in results]
+            self.assertEqual(compare(results, path), [])
+            self.assertEqual(len(compare(slower, path)), 1)
+
+    def test_over_budget(self):
+        # Budgets scale with the reference: the same timings pass on a machine half as fast
+        for reference_ops in (1e6, 5e5):
+            results = [BenchmarkResult(REFERENCE, reference_ops, 1 / reference_ops, 1, 1),
+                       BenchmarkResult("robot.construction", reference_ops / 1000, 1000 / reference_ops, 1, 1),
+                       BenchmarkResult("robot.construction", reference_ops / 2, 2 / reference_ops, 1, 1),
+                       BenchmarkResult("execute_command.turn", 1, 1, 1, 1)]
+
+            violations = over_budget(results)
+
+            self.assertEqual(len(violations), 1)
+            self.assertTrue(violations[0].startswith("robot.construction"))
+
+    def test_over_budget_runs_the_reference(self):
+        self.assertEqual(over_budget([BenchmarkResult("robot.construction", 1e12, 1e-12, 1, 1)]), [])
+
+    def test_import_budgets(self):
+        # The interpreters started for the imports do not depend on the working directory of the tests
+        with tempfile.TemporaryDirectory() as directory:
+            working_directory = os.getcwd()
+            os.chdir(directory)
+            try:
+                self.assertGreater(import_seconds("src.cleaning_robot", repeat=1), 0)
+            finally:
+                os.chdir(working_directory)
+        self.assertEqual(check_import_budgets(), [])
@@ -1,12 +1,19 @@
+import os
+import subprocess
+import sys
+import threading
 from unittest import TestCase
 from unittest.mock import Mock, patch, call
 
 from mock import GPIO
 from mock.ibs import IBS
 from mock.ltc2990 import LTC2990
+from src import cleaning_robot
 from src.cleaning_robot import CleaningRobot, CleaningRobotError
 from src.position_state_manager import WestState
 
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
 
 class TestCleaningRobot(TestCase):
 
@@ -333,3 +340,339 @@ class TestCleaningRobot(TestCase):
         # Assert
         self.cleaning_robot.execute_command(command)
         mock_wheel_motor.assert_called_once()
+
+    @patch.object(LTC2990, "get_temperature", return_value=50)
+    @patch.object(CleaningRobot, "activate_wheel_motor")
+    @patch.object(CleaningRobot, "activate_rotation_motor")
+    @patch.object(GPIO, "input", return_value=False)
+    @patch.object(IBS, "get_charge_left", return_value=90)
+    def test_execute_commands_matches_execute_command(self, mock_charged_battery: Mock,
+                                                      infrared_sensor_mock: Mock,
+                                                      mock_rotation_motor: Mock,
+                                                      mock_wheel_motor: Mock,
+                                                      mock_temperature_sensor: Mock):
+        route = "ffrfflfrrf"
+        self.cleaning_robot.initialize_robot()
+        expected_statuses = [self.cleaning_robot.execute_command(command) for command in route]
+
+        self.cleaning_robot.initialize_robot()
+        result = self.cleaning_robot.execute_commands(route)
+
+        self.assertEqual(result.statuses, expected_statuses)
+        self.assertEqual(result.final_status, expected_statuses[-1])
+        self.assertFalse(result.low_battery)
+
+    @patch.object(LTC2990, "get_temperature", return_value=50)
+    @patch.object(CleaningRobot, "activate_wheel_motor")
+    @patch.object(GPIO, "input", return_value=False)
+    @patch.object(IBS, "get_charge_left", return_value=90)
+    def test_execute_commands_check_every(self, mock_charged_battery: Mock,
+                                          infrared_sensor_mock: Mock,
+                                          mock_wheel_motor: Mock,
+                                          mock_temperature_sensor: Mock):
+        self.cleaning_robot.initialize_robot()
+
+        result = self.cleaning_robot.execute_commands("ffffffffff", check_every=5)
+
+        self.assertEqual(result.final_status, "(0,10,N)")
+        self.assertEqual(mock_temperature_sensor.call_count, 2)
+        self.assertEqual(mock_charged_battery.call_count, 2)
+
+    @patch.object(LTC2990, "get_temperature", return_value=50)
+    @patch.object(CleaningRobot, "activate_wheel_motor")
+    @patch.object(GPIO, "input", return_value=False)
+    @patch.object(IBS, "get_charge_left")
+    def test_execute_commands_stops_on_low_battery(self, mock_battery: Mock,
+                                                   infrared_sensor_mock: Mock,
+                                                   mock_wheel_motor: Mock,
+                                                   mock_temperature_sensor: Mock):
+        mock_battery.side_effect = [90, 90, 9]
+        self.cleaning_robot.initialize_robot()
+
+        result = self.cleaning_robot.execute_commands("fffff")
+
+        self.assertEqual(result.statuses, ["(0,1,N)", "(0,2,N)", "!(0,2,N)"])
+        self.assertEqual(result.final_status, "!(0,2,N)")
+        self.assertTrue(result.low_battery)
+        self.assertEqual(mock_wheel_motor.call_count, 2)
+
+    @patch.object(CleaningRobot, "activate_wheel_motor")
+    @patch.object(IBS, "get_charge_left", return_value=90)
+    @patch.object(LTC2990, "get_temperature", return_value=75)
+    def test_execute_commands_temperature_high(self, mock_temperature_sensor: Mock,
+                                               mock_enough_battery: Mock,
+                                               mock_wheel_motor: Mock):
+        self.cleaning_robot.initialize_robot()
+
+        self.assertRaises(
+            CleaningRobotError, lambda: self.cleaning_robot.execute_commands("ff")
+        )
+        mock_wheel_motor.assert_not_called()
+
+    @patch.object(LTC2990, "get_temperature", return_value=50)
+    @patch.object(IBS, "get_charge_left", return_value=90)
+    def test_execute_commands_fused_forward(self, mock_charged_battery: Mock, mock_temperature_sensor: Mock):
+        route = "fffrfffffl"
+        readings = [False, False, False, False, True, True, False, False]
+        with patch.object(GPIO, "input", side_effect=readings):
+            self.cleaning_robot.initialize_robot()
+            expected_statuses = [self.cleaning_robot.execute_command(command) for command in route]
+
+        self.cleaning_robot.initialize_robot()
+        with patch.object(GPIO, "input", side_effect=readings), \
+                patch.object(CleaningRobot, "_start_wheel_motor") as mock_start_wheel_motor, \
+                patch.object(CleaningRobot, "_wait_for_motor") as mock_wait_for_motor:
+            result = self.cleaning_robot.execute_commands(route, fuse_forward=True)
+
+        self.assertEqual(result.statuses, expected_statuses)
+        self.assertEqual(result.final_status, expected_statuses[-1])
+        # "fff", then one cell before the obstacle and the last two cells after it
+        self.assertEqual(mock_start_wheel_motor.call_count, 3)
+        # Six free cells plus two turns
+        self.assertEqual(mock_wait_for_motor.call_count, 8)
+
+    @patch.object(LTC2990, "get_temperature", return_value=50)
+    @patch.object(GPIO, "input", return_value=False)
+    @patch.object(IBS, "get_charge_left")
+    def test_execute_commands_fused_forward_stops_motor_on_low_battery(self, mock_battery: Mock,
+                                                                       infrared_sensor_mock: Mock,
+                                                                       mock_temperature_sensor: Mock):
+        GPIO.reset()
+        mock_battery.side_effect = [90, 90, 9]
+        self.cleaning_robot.initialize_robot()
+
+        result = self.cleaning_robot.execute_commands("fffff", fuse_forward=True)
+
+        self.assertEqual(result.statuses, ["(0,1,N)", "(0,2,N)", "!(0,2,N)"])
+        self.assertTrue(result.low_battery)
+        self.assertEqual(GPIO.get_level(CleaningRobot.PWMA), GPIO.LOW)
+        GPIO.reset()
+
+    @patch.object(LTC2990, "get_temperature")
+    @patch.object(GPIO, "input", return_value=False)
+    @patch.object(IBS, "get_charge_left", return_value=90)
+    def test_execute_commands_fused_forward_stops_motor_on_overheating(self, mock_charged_battery: Mock,
+                                                                       infrared_sensor_mock: Mock,
+                                                                       mock_temperature_sensor: Mock):
+        GPIO.reset()
+        mock_temperature_sensor.side_effect = [50, 70]
+        self.cleaning_robot.initialize_robot()
+
+        self.assertRaises(CleaningRobotError,
+                          lambda: self.cleaning_robot.execute_commands("fff", fuse_forward=True))
+        self.assertEqual(self.cleaning_robot.robot_status(), "(0,1,N)")
+        self.assertEqual(GPIO.get_level(CleaningRobot.PWMA), GPIO.LOW)
+        GPIO.reset()
+
+    @patch.object(LTC2990, "get_temperature", return_value=50)
+    @patch.object(IBS, "get_charge_left", return_value=90)
+    def test_edge_detection_latches_obstacle(self, mock_charged_battery: Mock, mock_temperature_sensor: Mock):
+        GPIO.reset()
+        self.cleaning_robot.initialize_robot()
+        self.cleaning_robot.enable_edge_detection()
+
+        with patch.object(GPIO, "input", wraps=GPIO.input) as infrared_sensor_mock:
+            self.assertEqual(self.cleaning_robot.execute_command("f"), "(0,1,N)")
+            infrared_sensor_mock.assert_not_called()
+
+        # A short obstacle between two moves is still reported once it has gone
+        GPIO.set_input(CleaningRobot.INFRARED_PIN, True)
+        GPIO.set_input(CleaningRobot.INFRARED_PIN, False)
+        self.assertEqual(self.cleaning_robot.execute_command("f"), "(0,1,N)(0,2)")
+        self.assertEqual(self.cleaning_robot.execute_command("f"), "(0,2,N)")
+
+        # An obstacle that stays is reported until it goes away
+        GPIO.set_input(CleaningRobot.INFRARED_PIN, True)
+        self.assertEqual(self.cleaning_robot.execute_command("f"), "(0,2,N)(0,3)")
+        self.assertEqual(self.cleaning_robot.execute_command("f"), "(0,2,N)(0,3)")
+        GPIO.set_input(CleaningRobot.INFRARED_PIN, False)
+        self.assertEqual(self.cleaning_robot.execute_command("f"), "(0,3,N)")
+
+        self.cleaning_robot.disable_edge_detection()
+        GPIO.reset()
+
+    @patch.object(LTC2990, "get_temperature", return_value=50)
+    @patch.object(IBS, "get_charge_left", return_value=90)
+    def test_edge_detection_latch_does_not_survive_turns(self, mock_charged_battery: Mock,
+                                                         mock_temperature_sensor: Mock):
+        GPIO.reset()
+        self.cleaning_robot.initialize_robot()
+        self.cleaning_robot.enable_edge_detection()
+
+        # Seen while facing north, gone before the robot faces east
+        GPIO.set_input(CleaningRobot.INFRARED_PIN, True)
+        self.assertEqual(self.cleaning_robot.execute_command("l"), "(0,0,E)")
+        GPIO.set_input(CleaningRobot.INFRARED_PIN, False)
+        self.assertEqual(self.cleaning_robot.execute_command("f"), "(-1,0,E)")
+
+        # Still there after the turn: it is ahead in the new heading
+        GPIO.set_input(CleaningRobot.INFRARED_PIN, True)
+        self.assertEqual(self.cleaning_robot.execute_commands("rf", fuse_forward=True).final_status,
+                         "(-1,0,N)(-1,1)")
+
+        self.cleaning_robot.disable_edge_detection()
+        GPIO.reset()
+
+    @patch.object(LTC2990, "get_temperature", return_value=50)
+    @patch.object(IBS, "get_charge_left", return_value=90)
+    def test_edge_detection_cuts_out_wheel_motor(self, mock_charged_battery: Mock, mock_temperature_sensor: Mock):
+        GPIO.reset()
+        self.cleaning_robot.initialize_robot()
+        self.cleaning_robot.enable_edge_detection()
+        levels_at_edge = []
+
+        def obstacle_mid_move():
+            GPIO.set_input(CleaningRobot.INFRARED_PIN, True)
+            levels_at_edge.append(GPIO.get_level(CleaningRobot.PWMA))
+
+        with patch.object(CleaningRobot, "_wait_for_motor", side_effect=obstacle_mid_move):
+            self.assertEqual(self.cleaning_robot.execute_command("f"), "(0,0,N)(0,1)")
+        self.assertEqual(levels_at_edge, [GPIO.LOW])
+
+        GPIO.set_input(CleaningRobot.INFRARED_PIN, False)
+        with patch.object(CleaningRobot, "_wait_for_motor", side_effect=obstacle_mid_move):
+            result = self.cleaning_robot.execute_commands("ff", fuse_forward=True)
+        self.assertEqual(result.statuses, ["(0,0,N)(0,1)", "(0,0,N)(0,1)"])
+        self.assertEqual(GPIO.get_level(CleaningRobot.PWMA), GPIO.LOW)
+
+        self.cleaning_robot.disable_edge_detection()
+        GPIO.reset()
+
+    @patch.object(LTC2990, "get_temperature", return_value=50)
+    @patch.object(IBS, "get_charge_left", return_value=90)
+    def test_edge_between_obstacle_check_and_motor_start(self, mock_charged_battery: Mock,
+                                                         mock_temperature_sensor: Mock):
+        start_wheel_motor = CleaningRobot._start_wheel_motor
+        edges = []
+        levels_during_move = []
+
+        def edge_before_start(robot):
+            # The edge comes from the GPIO thread while the move is about to start the motor
+            edge = threading.Thread(target=GPIO.set_input, args=(CleaningRobot.INFRARED_PIN, True))
+            edge.start()
+            edge.join(0.05)
+            edges.append(edge)
+            start_wheel_motor(robot)
+
+        def wait_for_motor():
+            edges[-1].join()
+            levels_during_move.append(GPIO.get_level(CleaningRobot.PWMA))
+
+        for commands, fuse_forward in (("f", False), ("ff", True)):
+            GPIO.reset()
+            self.cleaning_robot.initialize_robot()
+            self.cleaning_robot.enable_edge_detection()
+            with patch.object(CleaningRobot, "_start_wheel_motor", edge_before_start), \
+                    patch.object(CleaningRobot, "_wait_for_motor", side_effect=wait_for_motor):
+                result = self.cleaning_robot.execute_commands(commands, fuse_forward=fuse_forward)
+
+            self.assertEqual(result.statuses, ["(0,0,N)(0,1)"] * len(commands))
+            self.assertEqual(levels_during_move, [GPIO.LOW])
+            self.cleaning_robot.disable_edge_detection()
+            levels_during_move.clear()
+        GPIO.reset()
+
+    def test_edge_leaves_idle_wheel_motor_alone(self):
+        GPIO.reset()
+        self.cleaning_robot.initialize_robot()
+        self.cleaning_robot.enable_edge_detection()
+
+        with patch.object(CleaningRobot, "_stop_wheel_motor") as mock_stop:
+            GPIO.set_input(CleaningRobot.INFRARED_PIN, True)
+
+        mock_stop.assert_not_called()
+        self.cleaning_robot.disable_edge_detection()
+        GPIO.reset()
+
+    def test_pose_setters_store_integers(self):
+        self.cleaning_robot.pos_x = "2"
+        self.cleaning_robot.pos_y = "-1"
+        self.cleaning_robot.heading = "S"
+
+        self.assertEqual(self.cleaning_robot.pose.get_tuple(), (2, -1, "S"))
+        self.assertEqual(self.cleaning_robot.robot_status(), "(2,-1,S)")
+
+    @patch.object(GPIO, "output")
+    def test_activate_wheel_motor_writes_pin_groups(self, mock_gpio_output: Mock):
+        self.cleaning_robot.activate_wheel_motor()
+
+        pins = [self.cleaning_robot.AIN1, self.cleaning_robot.AIN2, self.cleaning_robot.PWMA,
+                self.cleaning_robot.STBY]
+        mock_gpio_output.assert_has_calls([call(pins, (GPIO.HIGH, GPIO.LOW, GPIO.HIGH, GPIO.HIGH)),
+                                           call(pins, (GPIO.LOW, GPIO.LOW, GPIO.LOW, GPIO.LOW))])
+        self.assertEqual(mock_gpio_output.call_count, 2)
+
+    @patch.object(GPIO, "output")
+    def test_activate_rotation_motor_right_writes_pin_groups(self, mock_gpio_output: Mock):
+        self.cleaning_robot.activate_rotation_motor(self.cleaning_robot.RIGHT)
+
+        pins = [self.cleaning_robot.BIN1, self.cleaning_robot.BIN2, self.cleaning_robot.PWMB,
+                self.cleaning_robot.STBY]
+        mock_gpio_output.assert_has_calls([call(pins, (GPIO.LOW, GPIO.HIGH, GPIO.HIGH, GPIO.HIGH)),
+                                           call(pins, (GPIO.LOW, GPIO.LOW, GPIO.LOW, GPIO.LOW))])
+        self.assertEqual(mock_gpio_output.call_count, 2)
+
+    @patch.object(GPIO, "setup")
+    def test_first_pin_use_sets_up_output_pins_at_once(self, mock_gpio_setup: Mock):
+        robot = CleaningRobot()
+        robot.activate_wheel_motor()
+        robot.activate_wheel_motor()
+
+        self.assertEqual(mock_gpio_setup.call_count, 2)
+        mock_gpio_setup.assert_any_call(self.cleaning_robot.INFRARED_PIN, GPIO.IN)
+
+    @patch.object(LTC2990, "__init__", return_value=None)
+    @patch.object(GPIO, "setup")
+    def test_init_touches_no_hardware(self, mock_gpio_setup: Mock, mock_ltc2990_init: Mock):
+        robot = CleaningRobot()
+        robot.initialize_robot()
+        robot.robot_status()
+
+        mock_gpio_setup.assert_not_called()
+        mock_ltc2990_init.assert_not_called()
+        self.assertFalse(robot.hardware_initialized)
+
+    @patch.object(GPIO, "setup")
+    def test_initialize_hardware(self, mock_gpio_setup: Mock):
+        robot = CleaningRobot()
+        robot.initialize_hardware()
+        robot.initialize_hardware()
+
+        self.assertTrue(robot.hardware_initialized)
+        self.assertEqual(mock_gpio_setup.call_count, 2)
+
+    def test_assigned_sensor_is_kept_when_the_other_comes_up(self):
+        robot = CleaningRobot()
+        ibs = Mock()
+        robot.ibs = ibs
+
+        self.assertIsInstance(robot.ltc2990, LTC2990)
+        self.assertIs(robot.ibs, ibs)
+
+    def test_select_mock_backend(self):
+        backend = cleaning_robot.select_backend(cleaning_robot.MOCK)
+
+        self.assertIs(backend.gpio, GPIO)
+        self.assertFalse(backend.deployment)
+        self.assertFalse(cleaning_robot.is_deployment())
+        self.assertIs(cleaning_robot.get_backend(), backend)
+
+    def test_deployment_resolves_the_backend(self):
+        with patch.object(cleaning_robot, "_backend", None), \
+                patch.dict(os.environ, {cleaning_robot.BACKEND_VARIABLE: cleaning_robot.MOCK}):
+            self.assertFalse(cleaning_robot.is_deployment())
+            self.assertEqual(cleaning_robot.get_backend().name, cleaning_robot.MOCK)
+
+    def test_import_loads_no_hardware_library(self):
+        environment = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, (ROOT, os.environ.get("PYTHONPATH")))))
+        completed = subprocess.run([sys.executable, "-c", "import sys, src.cleaning_robot; "
+                                                          "print('mock.GPIO' in sys.modules)"],
+                                   capture_output=True, text=True, check=True, cwd=ROOT, env=environment)
+
+        self.assertEqual(completed.stdout.strip(), "False")
+
+    def test_select_unknown_backend(self):
+        self.assertRaises(CleaningRobotError, cleaning_robot.select_backend, "arduino")
+
+    def test_mock_gpio_output_list_length_mismatch(self):
+        self.assertRaises(RuntimeError, lambda: GPIO.output([1, 2], [GPIO.HIGH]))
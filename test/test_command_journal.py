@@ -0,0 +1,156 @@
+import gc
+import os
+import tempfile
+import warnings
+from unittest import TestCase
+from unittest.mock import patch
+
+from mock import GPIO
+from mock.ibs import IBS
+from mock.ltc2990 import LTC2990
+from src.cleaning_robot import CleaningRobot, CleaningRobotError
+from src.command_journal import RECORD, RECORD_DTYPE, CommandJournal, JournalReader
+from src.room_map import RoomMap
+
+
+class TestCommandJournal(TestCase):
+
+    def setUp(self):
+        GPIO.reset()
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "robot.journal")
+        self.cleaning_robot = CleaningRobot()
+        self.cleaning_robot.initialize_robot()
+
+    def tearDown(self):
+        self.directory.cleanup()
+        GPIO.reset()
+
+    def test_record_layout_matches_reader(self):
+        self.assertEqual(RECORD.size, RECORD_DTYPE.itemsize)
+
+    @patch.object(LTC2990, "get_temperature", return_value=31)
+    @patch.object(IBS, "get_charge_left", return_value=80)
+    @patch.object(GPIO, "input", side_effect=[False, True, False])
+    def test_journal_records_commands(self, mock_input, mock_charge, mock_temperature):
+        with CommandJournal.for_robot(self.cleaning_robot, self.path, buffer_records=2, clock=lambda: 1.5):
+            self.cleaning_robot.execute_command("f")
+            self.cleaning_robot.execute_commands("frf")
+
+        records = list(JournalReader(self.path))
+        self.assertEqual([record.command for record in records], ["f", "f", "r", "f"])
+        self.assertEqual([record.sequence for record in records], [0, 1, 2, 3])
+        self.assertEqual(str(records[1].pose), "(0,1,N)")
+        self.assertEqual(records[1].obstacle, (0, 2))
+        self.assertIsNone(records[0].obstacle)
+        self.assertEqual(str(records[3].pose), "(1,1,W)")
+        self.assertEqual((records[3].temperature, records[3].charge, records[3].timestamp), (31, 80, 1.5))
+
+    @patch.object(LTC2990, "get_temperature", return_value=25)
+    @patch.object(IBS, "get_charge_left", return_value=5)
+    def test_low_battery_refusal_is_journaled(self, mock_charge, mock_temperature):
+        with CommandJournal.for_robot(self.cleaning_robot, self.path):
+            self.cleaning_robot.execute_command("f")
+
+        record, = JournalReader(self.path)
+        self.assertTrue(record.low_battery)
+        self.assertEqual(record.charge, 5)
+
+    @patch.object(LTC2990, "get_temperature", return_value=25)
+    @patch.object(IBS, "get_charge_left", return_value=50)
+    @patch.object(GPIO, "input", side_effect=[False, True, False, False])
+    def test_replay_restores_pose_and_obstacles(self, mock_input, mock_charge, mock_temperature):
+        with CommandJournal.for_robot(self.cleaning_robot, self.path):
+            self.cleaning_robot.execute_commands("fflf")
+        # Reopening appends after the existing records
+        with CommandJournal.for_robot(self.cleaning_robot, self.path):
+            self.cleaning_robot.execute_command("f")
+
+        reader = JournalReader(self.path)
+        self.assertEqual(reader.commands(), "fflff")
+        recovered = reader.replay(CleaningRobot())
+        self.assertEqual(recovered.robot_status(), self.cleaning_robot.robot_status())
+        self.assertEqual(recovered.execute_command("r"), "(-2,1,N)")
+
+        room_map = RoomMap(4, 4)
+        self.assertEqual(reader.rebuild_map(room_map), 1)
+        self.assertTrue(room_map.is_obstacle(0, 2))
+
+    def test_rebuild_map_skips_walls(self):
+        with CommandJournal(self.path) as journal:
+            journal.record("l", "(0,0,E)", 25, 50, self.cleaning_robot.pose)
+            journal.record("f", "(0,0,E)(-1,0)", 25, 50, self.cleaning_robot.pose)
+            journal.record("f", "(0,0,N)(0,1)", 25, 50, self.cleaning_robot.pose)
+
+        room_map = RoomMap(4, 4)
+        self.assertEqual(JournalReader(self.path).rebuild_map(room_map), 1)
+        self.assertTrue(room_map.is_obstacle(0, 1))
+        self.assertEqual(room_map.outside_obstacles, 1)
+
+    def test_unknown_commands_and_missing_readings(self):
+        with CommandJournal(self.path) as journal:
+            journal.record("", "(0,0,N)", None, 50, self.cleaning_robot.pose)
+            journal.record("fl", "(0,0,N)", 25, None, self.cleaning_robot.pose)
+            journal.record("é", "(0,0,N)", None, None, self.cleaning_robot.pose)
+
+        reader = JournalReader(self.path)
+        self.assertEqual(reader.commands(), "???")
+        self.assertEqual([(record.temperature, record.charge) for record in reader],
+                         [(None, 50), (25, None), (None, None)])
+
+    def test_torn_record_is_ignored(self):
+        with CommandJournal(self.path) as journal:
+            journal.record("f", "(0,1,N)", 25, 50, self.cleaning_robot.pose)
+        with open(self.path, "ab") as journal_file:
+            journal_file.write(b"\x01\x02\x03")
+
+        self.assertEqual(len(JournalReader(self.path)), 1)
+        with CommandJournal(self.path) as journal:
+            self.assertEqual(journal.sequence, 1)
+            journal.record("r", "(0,0,E)", 25, 50, self.cleaning_robot.pose)
+        self.assertEqual(JournalReader(self.path).records["sequence"].tolist(), [0, 1])
+
+    def test_empty_journal(self):
+        CommandJournal(self.path).close()
+        reader = JournalReader(self.path)
+
+        self.assertEqual(len(reader), 0)
+        self.assertIsNone(reader.last_pose())
+        self.assertEqual(reader.obstacles()[0].size, 0)
+        self.assertRaises(CleaningRobotError, lambda: reader.replay(CleaningRobot()))
+
+    def test_not_a_journal(self):
+        with open(self.path, "wb") as journal_file:
+            journal_file.write(b"something else")
+        self.assertRaises(CleaningRobotError, lambda: JournalReader(self.path))
+
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter("always", ResourceWarning)
+            self.assertRaises(CleaningRobotError, lambda: CommandJournal(self.path))
+            gc.collect()
+        self.assertEqual([warning for warning in caught if issubclass(warning.category, ResourceWarning)], [])
+
+    def test_records_are_flushed_once_max_age_old(self):
+        timestamps = iter([10.0, 10.5, 11.0])
+        with CommandJournal(self.path, clock=lambda: next(timestamps)) as journal:
+            journal.record("f", "(0,1,N)", 25, 50, self.cleaning_robot.pose)
+            journal.record("f", "(0,2,N)", 25, 50, self.cleaning_robot.pose)
+            self.assertEqual(len(JournalReader(self.path)), 0)
+            journal.record("f", "(0,3,N)", 25, 50, self.cleaning_robot.pose)
+            self.assertEqual(len(JournalReader(self.path)), 3)
+
+    def test_low_battery_refusal_is_flushed_right_away(self):
+        with CommandJournal(self.path, clock=lambda: 1.0) as journal:
+            journal.record("f", "(0,1,N)", 25, 50, self.cleaning_robot.pose)
+            self.assertEqual(len(JournalReader(self.path)), 0)
+            journal.record("f", "!(0,1,N)", 25, 5, self.cleaning_robot.pose)
+            self.assertEqual(len(JournalReader(self.path)), 2)
+
+    @patch.object(LTC2990, "get_temperature", side_effect=[25, 75])
+    @patch.object(IBS, "get_charge_left", return_value=50)
+    @patch.object(GPIO, "input", return_value=False)
+    def test_temperature_error_flushes_journal(self, mock_input, mock_charge, mock_temperature):
+        with CommandJournal.for_robot(self.cleaning_robot, self.path, clock=lambda: 1.0):
+            self.cleaning_robot.execute_command("f")
+            self.assertRaises(CleaningRobotError, lambda: self.cleaning_robot.execute_command("f"))
+            self.assertEqual(JournalReader(self.path).commands(), "f")
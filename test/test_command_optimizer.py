@@ -0,0 +1,85 @@
+import random
+from unittest import TestCase
+from unittest.mock import Mock, patch
+
+from mock import GPIO
+from mock.ibs import IBS
+from mock.ltc2990 import LTC2990
+from src.cleaning_robot import CleaningRobot
+from src.command_optimizer import CommandOptimizer, optimize_route
+from src.position_state_manager import STATE_BY_HEADING, PositionStateMachineContext, Pose
+
+
+def final_pose(route, heading):
+    context = PositionStateMachineContext(STATE_BY_HEADING[heading])
+    pose = Pose(0, 0, heading)
+    for command in route:
+        if command == "l":
+            context.left_pose(pose)
+        elif command == "r":
+            context.right_pose(pose)
+        elif command == "f":
+            context.forward_pose(pose, False)
+    return pose
+
+
+class TestCommandOptimizer(TestCase):
+
+    def test_rewrites_turn_runs(self):
+        self.assertEqual(optimize_route("frrrf", "N"), ("fllf", 1))
+        self.assertEqual(optimize_route("lrf", "N"), ("f", 2))
+        self.assertEqual(optimize_route("llll", "N"), ("l", 3))
+        # Turning right while heading S keeps heading S
+        self.assertEqual(optimize_route("rrrf", "S"), ("f", 3))
+
+    def test_turns_cancel_only_where_the_headings_allow(self):
+        self.assertEqual(optimize_route("lr", "W"), ("", 2))
+        # From E, "l" reaches S and "r" keeps it there
+        self.assertEqual(optimize_route("lr", "E"), ("l", 1))
+
+    def test_final_pose_is_unchanged(self):
+        generator = random.Random(7)
+        for _ in range(500):
+            heading = generator.choice("NEWS")
+            route = "".join(generator.choice("fflr") for _ in range(generator.randint(0, 30)))
+
+            optimized, saved = optimize_route(route, heading)
+
+            self.assertEqual(final_pose(optimized, heading), final_pose(route, heading))
+            self.assertEqual(len(route) - len(optimized), saved)
+            self.assertGreaterEqual(saved, 0)
+            self.assertEqual(optimized.count("f"), route.count("f"))
+
+    def test_unknown_heading_passes_through(self):
+        self.assertEqual(optimize_route("rrr", None), ("rrr", 0))
+
+    def test_streams_lazily(self):
+        optimizer = CommandOptimizer("N")
+        stream = optimizer.optimize(iter("frrrlf"))
+
+        self.assertEqual(next(stream), "f")
+        self.assertEqual(optimizer.saved, 0)
+        # N -> W -> S -> S -> N: the whole run of turns goes away
+        self.assertEqual("".join(stream), "f")
+        self.assertEqual(optimizer.saved, 4)
+        self.assertEqual(optimizer.heading, STATE_BY_HEADING["N"].index)
+
+    @patch.object(LTC2990, "get_temperature", return_value=50)
+    @patch.object(IBS, "get_charge_left", return_value=90)
+    @patch.object(GPIO, "input", return_value=False)
+    @patch.object(CleaningRobot, "activate_rotation_motor")
+    def test_execute_commands_optimize(self, mock_rotation_motor: Mock, infrared_sensor_mock: Mock,
+                                       mock_charged_battery: Mock, mock_temperature_sensor: Mock):
+        route = "frrrflrlrf"
+        robot = CleaningRobot()
+        robot.initialize_robot()
+        expected = robot.execute_commands(route)
+        expected_rotations = mock_rotation_motor.call_count
+        mock_rotation_motor.reset_mock()
+
+        robot.initialize_robot()
+        result = robot.execute_commands(route, optimize=True)
+
+        self.assertEqual(result.final_status, expected.final_status)
+        self.assertEqual(result.motor_activations_saved, expected_rotations - mock_rotation_motor.call_count)
+        self.assertEqual(result.motor_activations_saved, 3)
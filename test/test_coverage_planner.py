@@ -0,0 +1,97 @@
+import random
+import time
+from unittest import TestCase
+
+import numpy as np
+
+from src.cleaning_robot import CleaningRobotError
+from src.coverage_planner import CoveragePlanner
+from src.position_state_manager import FORWARD_STEP, LEFT_TO, RIGHT_TO, Pose, STATE_BY_HEADING
+from src.room_map import RoomMap
+
+
+class TestCoveragePlanner(TestCase):
+
+    def replay(self, room_map: RoomMap, start: Pose, planner: CoveragePlanner) -> np.ndarray:
+        x, y, heading = start.x, start.y, STATE_BY_HEADING[start.heading].index
+        covered = np.zeros(room_map.grid.shape, dtype=bool)
+        covered[y, x] = True
+        for chunk in planner.commands(start):
+            for command in chunk:
+                if command == "l":
+                    heading = LEFT_TO[heading]
+                elif command == "r":
+                    heading = RIGHT_TO[heading]
+                else:
+                    dx, dy = FORWARD_STEP[heading]
+                    x, y = x + dx, y + dy
+                    self.assertTrue(room_map.is_free(x, y))
+                    covered[y, x] = True
+        return covered
+
+    def test_empty_room_serpentine(self):
+        planner = CoveragePlanner(RoomMap(3, 3))
+
+        route = "".join(planner.commands(Pose(0, 0, "N")))
+
+        self.assertEqual(route, "rff" + "lfl" + "ff" + "rfr" + "ff")
+        report = planner.report
+        self.assertEqual(report.coverage, 100.0)
+        self.assertEqual(report.revisits, 0)
+        self.assertEqual(report.motor_seconds, len(route))
+
+    def test_covers_every_reachable_cell(self):
+        rng = random.Random(3)
+        for _ in range(20):
+            room_map = RoomMap(rng.randint(3, 25), rng.randint(3, 25))
+            for _ in range(rng.randint(0, 50)):
+                x, y = rng.randrange(room_map.width), rng.randrange(room_map.height)
+                if (x, y) != (0, 0):
+                    room_map.add_obstacle(x, y)
+            planner = CoveragePlanner(room_map)
+
+            covered = self.replay(room_map, Pose(0, 0, "N"), planner)
+
+            self.assertEqual(int(covered.sum()), planner.report.reachable_cells)
+            self.assertEqual(planner.report.covered_cells, planner.report.reachable_cells)
+
+    def test_expected_coverage_excludes_enclosed_cells(self):
+        room_map = RoomMap(5, 5)
+        for x, y in [(3, 4), (4, 3)]:
+            room_map.add_obstacle(x, y)
+
+        report = CoveragePlanner(room_map).plan_report(Pose(0, 0, "N"))
+
+        self.assertAlmostEqual(report.expected_coverage, 100.0 * 22 / 23)
+        self.assertAlmostEqual(report.coverage, report.expected_coverage)
+
+    def test_start_on_obstacle(self):
+        room_map = RoomMap(3, 3)
+        room_map.add_obstacle(1, 1)
+
+        self.assertRaises(CleaningRobotError, lambda: next(CoveragePlanner(room_map).commands(Pose(1, 1, "N"))))
+
+    def test_large_room_streams_quickly(self):
+        planner = CoveragePlanner(RoomMap(1000, 1000))
+
+        started = time.perf_counter()
+        longest_chunk = max(len(chunk) for chunk in planner.commands(Pose(0, 0, "N")))
+        elapsed = time.perf_counter() - started
+
+        self.assertLess(elapsed, 1.0)
+        self.assertLessEqual(longest_chunk, 1003)
+        self.assertEqual(planner.report.coverage, 100.0)
+
+    def test_large_cluttered_room_plans_quickly(self):
+        room_map = RoomMap(1000, 1000)
+        room_map.grid[:] = np.random.default_rng(1).random((1000, 1000)) < 0.01
+        room_map.grid[0, 0] = False
+        planner = CoveragePlanner(room_map)
+
+        started = time.perf_counter()
+        report = planner.plan_report(Pose(0, 0, "N"))
+        elapsed = time.perf_counter() - started
+
+        # About 0.6 s here; the nearest pending cell is not searched by scanning every cell anymore
+        self.assertLess(elapsed, 1.0)
+        self.assertEqual(report.covered_cells, report.reachable_cells)
@@ -0,0 +1,73 @@
+import os
+import tempfile
+from unittest import TestCase
+from unittest.mock import Mock, patch
+
+from mock import GPIO
+from mock.ibs import IBS
+from mock.ltc2990 import LTC2990
+from src.cleaning_robot import CleaningRobot, CleaningRobotError
+from src.coverage_tracker import CoverageTracker
+from src.tiled_map import TiledRoomMap
+
+
+class TestCoverageTracker(TestCase):
+
+    def setUp(self):
+        GPIO.reset()
+        self.cleaning_robot = CleaningRobot()
+        self.cleaning_robot.initialize_robot()
+        self.directory = tempfile.TemporaryDirectory()
+        self.room_map = TiledRoomMap(os.path.join(self.directory.name, "hall"), tile_size=64)
+        self.tracker = CoverageTracker.for_robot(self.cleaning_robot, self.room_map, target_cells=10)
+
+    def tearDown(self):
+        self.room_map.close()
+        self.directory.cleanup()
+        GPIO.reset()
+
+    def test_start_cell_is_cleaned(self):
+        self.assertTrue(self.tracker.is_cleaned(0, 0))
+        self.assertEqual((self.tracker.cells_cleaned, self.tracker.cleaning_moves), (1, 0))
+
+    def test_cleaned_cells_are_map_flags(self):
+        cells = [(-1, -1), (63, 64), (-64, 1000), (123456, -98765)]
+        for x, y in cells:
+            self.assertTrue(self.tracker.record_move(x, y, cleaning=True))
+
+        for x, y in cells:
+            self.assertTrue(self.room_map.is_cleaned(x, y))
+        self.assertFalse(self.tracker.is_cleaned(1, 0))
+        self.assertFalse(self.tracker.record_move(-1, -1, cleaning=True))
+        self.assertEqual((self.tracker.cells_cleaned, self.tracker.revisits), (5, 1))
+
+    def test_idle_moves_are_not_cleaning(self):
+        self.assertFalse(self.tracker.record_move(3, 3, cleaning=False))
+        self.assertFalse(self.tracker.is_cleaned(3, 3))
+        self.assertEqual(self.tracker.idle_moves, 1)
+        self.assertRaises(CleaningRobotError, lambda: CoverageTracker(self.room_map, target_cells=-1))
+
+    @patch.object(LTC2990, "get_temperature", return_value=50)
+    @patch.object(IBS, "get_charge_left", return_value=90)
+    @patch.object(GPIO, "input", side_effect=[False, False, True, False])
+    def test_robot_updates_coverage(self, infrared_sensor_mock: Mock, mock_charged_battery: Mock,
+                                    mock_temperature_sensor: Mock):
+        self.cleaning_robot.manage_cleaning_system()
+
+        # Up, up, blocked, then back down onto an already cleaned cell
+        self.cleaning_robot.execute_commands("fffrrf")
+
+        snapshot = self.tracker.snapshot()
+        # The start cell and the two cells above it
+        self.assertEqual(snapshot.cells_cleaned, 3)
+        self.assertEqual(snapshot.revisits, 1)
+        self.assertEqual(snapshot.cleaning_moves, 3)
+        # Four forward activations, the blocked one included, and two turns
+        self.assertEqual(snapshot.motor_seconds, 6 * CleaningRobot.MOTOR_SECONDS)
+        self.assertEqual(snapshot.coverage, 30.0)
+        self.assertEqual(snapshot.motor_seconds_per_new_cell, 2.0)
+        self.assertEqual(snapshot.to_dict()["coverage"], 30.0)
+
+        self.tracker.reset()
+        self.assertIsNone(self.tracker.snapshot().motor_seconds_per_new_cell)
+        self.assertFalse(self.room_map.is_cleaned(0, 1))
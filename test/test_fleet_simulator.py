@@ -0,0 +1,63 @@
+import random
+from unittest import TestCase
+from unittest.mock import patch
+
+import numpy as np
+
+from mock import GPIO
+from mock.ibs import IBS
+from mock.ltc2990 import LTC2990
+from src.cleaning_robot import CleaningRobot, CleaningRobotError
+from src.fleet_simulator import FleetSimulator
+
+
+class TestFleetSimulator(TestCase):
+
+    def test_step_single_command(self):
+        fleet = FleetSimulator(3, headings=["N", "E", "W"])
+
+        fleet.step("f", obstacle_ahead=np.array([False, True, False]))
+
+        self.assertEqual(fleet.statuses(), ["(0,1,N)", "(0,0,E)(-1,0)", "(1,0,W)"])
+
+    def test_run_rejects_wrong_number_of_routes(self):
+        fleet = FleetSimulator(2)
+
+        self.assertRaises(CleaningRobotError, lambda: fleet.run(["f"]))
+
+    def test_shorter_route_keeps_its_last_obstacle(self):
+        fleet = FleetSimulator(2)
+
+        fleet.run(["f", "ff"], np.array([[True, False], [False, False]]))
+
+        self.assertEqual(fleet.statuses(), ["(0,0,N)(0,1)", "(0,2,N)"])
+
+    def test_unknown_command_clears_the_obstacle(self):
+        fleet = FleetSimulator(1)
+
+        fleet.run(["fx"], np.array([[True, False]]))
+
+        self.assertEqual(fleet.statuses(), ["(0,0,N)"])
+
+    @patch.object(LTC2990, "get_temperature", return_value=50)
+    @patch.object(IBS, "get_charge_left", return_value=90)
+    @patch.object(CleaningRobot, "activate_wheel_motor")
+    @patch.object(CleaningRobot, "activate_rotation_motor")
+    def test_matches_scalar_execute_command(self, *mocks):
+        rng = random.Random(4)
+        robots, steps = 20, 40
+        routes = ["".join(rng.choice("flr") for _ in range(rng.randint(0, steps))) for _ in range(robots)]
+        obstacles = np.array([[rng.random() < 0.3 for _ in range(steps)] for _ in range(robots)])
+
+        fleet = FleetSimulator(robots)
+        fleet.run(routes, obstacles)
+
+        robot = CleaningRobot()
+        for index, route in enumerate(routes):
+            robot.initialize_robot()
+            status = robot.robot_status()
+            with patch.object(GPIO, "input") as infrared_sensor_mock:
+                for step, command in enumerate(route):
+                    infrared_sensor_mock.return_value = obstacles[index, step]
+                    status = robot.execute_command(command)
+            self.assertEqual(fleet.statuses()[index], status)
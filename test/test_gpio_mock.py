@@ -0,0 +1,98 @@
+import time
+from unittest import TestCase
+from unittest.mock import Mock, patch
+
+from mock import GPIO
+from mock.ibs import IBS
+from mock.ltc2990 import LTC2990
+from src.cleaning_robot import CleaningRobot
+
+
+class TestGPIOMock(TestCase):
+
+    def setUp(self):
+        GPIO.reset()
+
+    def tearDown(self):
+        GPIO.reset()
+
+    def test_output_and_input_share_pin_levels(self):
+        GPIO.output(7, GPIO.HIGH)
+        self.assertEqual(GPIO.input(7), GPIO.HIGH)
+
+        GPIO.output([7, 8], [GPIO.LOW, GPIO.HIGH])
+        self.assertEqual((GPIO.input(7), GPIO.input(8)), (GPIO.LOW, GPIO.HIGH))
+
+    def test_scripted_input_keeps_last_level(self):
+        GPIO.script_input(15, [0, 1, 0, 1])
+
+        self.assertEqual([GPIO.input(15) for _ in range(6)], [0, 1, 0, 1, 1, 1])
+
+    def test_trace_records_transitions_only(self):
+        ticks = iter(range(100))
+        GPIO.set_clock(lambda: next(ticks))
+        try:
+            trace = GPIO.enable_trace(capacity=3)
+            GPIO.output(5, GPIO.HIGH)
+            GPIO.output(5, GPIO.HIGH)
+            GPIO.output([5, 6], [GPIO.LOW, GPIO.HIGH])
+            GPIO.output(6, GPIO.LOW)
+
+            self.assertEqual(trace.count, 4)
+            self.assertEqual(trace.transitions(), [(1.0, 5, 0), (2.0, 6, 1), (3.0, 6, 0)])
+        finally:
+            GPIO.set_clock(GPIO.time.perf_counter)
+
+    @patch.object(CleaningRobot, "activate_wheel_motor")
+    @patch.object(IBS, "get_charge_left", return_value=90)
+    @patch.object(LTC2990, "get_temperature", return_value=50)
+    def test_scripted_infrared_obstacles(self, *mocks: Mock):
+        cleaning_robot = CleaningRobot()
+        cleaning_robot.initialize_robot()
+        GPIO.script_input(cleaning_robot.INFRARED_PIN, [0, 1, 0])
+
+        statuses = cleaning_robot.execute_commands("fff").statuses
+
+        self.assertEqual(statuses, ["(0,1,N)", "(0,1,N)(0,2)", "(0,2,N)"])
+
+    def test_motor_pins_back_to_low_after_activation(self):
+        cleaning_robot = CleaningRobot()
+        trace = GPIO.enable_trace()
+
+        cleaning_robot.activate_wheel_motor()
+
+        self.assertEqual(trace.count, 6)
+        self.assertEqual(GPIO.get_level(cleaning_robot.PWMA), GPIO.LOW)
+
+    def test_edge_events(self):
+        edges = []
+        GPIO.add_event_detect(15, GPIO.RISING, callback=lambda channel: edges.append((channel, GPIO.input(channel))))
+
+        GPIO.set_input(15, True)
+        GPIO.set_input(15, True)
+        GPIO.set_input(15, False)
+
+        self.assertEqual(edges, [(15, 1)])
+        self.assertTrue(GPIO.event_detected(15))
+        self.assertFalse(GPIO.event_detected(15))
+        self.assertRaises(RuntimeError, lambda: GPIO.add_event_detect(15, GPIO.BOTH))
+
+        GPIO.remove_event_detect(15)
+        GPIO.set_input(15, True)
+        self.assertEqual(len(edges), 1)
+
+    def test_edge_bouncetime(self):
+        now = [0.0]
+        GPIO.set_clock(lambda: now[0])
+        try:
+            edges = []
+            GPIO.add_event_detect(15, GPIO.BOTH, callback=edges.append, bouncetime=10)
+            GPIO.set_input(15, True)
+            now[0] = 0.005
+            GPIO.set_input(15, False)
+            now[0] = 0.020
+            GPIO.set_input(15, True)
+
+            self.assertEqual(len(edges), 2)
+        finally:
+            GPIO.set_clock(time.perf_counter)
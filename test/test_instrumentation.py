@@ -0,0 +1,117 @@
+from unittest import TestCase
+from unittest.mock import patch
+
+from mock import GPIO
+from mock.ibs import IBS
+from mock.ltc2990 import LTC2990
+from src.cleaning_robot import CleaningRobot
+from src.instrumentation import Instrumentation, LatencyHistogram, instrument, uninstrument
+
+
+class TestInstrumentation(TestCase):
+
+    def setUp(self):
+        GPIO.reset()
+        self.cleaning_robot = CleaningRobot()
+        self.cleaning_robot.initialize_robot()
+
+    def tearDown(self):
+        GPIO.reset()
+
+    def test_histogram_buckets_are_monotonic_and_bounded(self):
+        previous = -1
+        for value in list(range(0, 200)) + [10 ** 6, 10 ** 9, 2 ** 63 - 1]:
+            bucket = LatencyHistogram.bucket_of(value)
+            self.assertGreaterEqual(bucket, previous)
+            previous = bucket
+            upper = LatencyHistogram.bucket_upper_bound(bucket)
+            self.assertGreaterEqual(upper, value)
+            self.assertLessEqual(upper - value, value / 16 + 1)
+
+    def test_histogram_percentiles(self):
+        histogram = LatencyHistogram()
+        for value in range(1, 1001):
+            histogram.record(value * 1000)
+
+        self.assertEqual(histogram.count, 1000)
+        self.assertEqual(histogram.minimum, 1000)
+        self.assertEqual(histogram.maximum, 1000000)
+        self.assertAlmostEqual(histogram.percentile(50), 500000, delta=500000 / 16)
+        self.assertAlmostEqual(histogram.percentile(99), 990000, delta=990000 / 16)
+        self.assertEqual(histogram.percentile(100), 1000000)
+        self.assertIsNone(LatencyHistogram().percentile(50))
+
+    @patch.object(LTC2990, "get_temperature", return_value=25)
+    @patch.object(IBS, "get_charge_left", return_value=50)
+    def test_phases_and_counters(self, mock_charge, mock_temperature):
+        instrumentation = instrument(self.cleaning_robot)
+
+        self.cleaning_robot.execute_command("f")
+        self.cleaning_robot.execute_command("r")
+        self.cleaning_robot.manage_cleaning_system()
+
+        phases = instrumentation.histograms
+        self.assertEqual(phases["execute_command"].count, 2)
+        self.assertEqual(phases["sensor.temperature"].count, 2)
+        self.assertEqual(phases["sensor.charge"].count, 3)
+        self.assertEqual(phases["gpio.infrared"].count, 1)
+        self.assertEqual(phases["gpio.motor"].count, 4)
+        self.assertEqual(phases["motor.wait"].count, 2)
+        self.assertEqual(phases["state_machine"].count, 2)
+        self.assertEqual(phases["activate_wheel_motor"].count, 1)
+        self.assertEqual(phases["activate_rotation_motor"].count, 1)
+        self.assertEqual(phases["manage_cleaning_system"].count, 1)
+        self.assertEqual(instrumentation.counters, {"command.f": 1, "command.r": 1})
+        self.assertEqual(self.cleaning_robot.robot_status(), "(0,1,W)")
+
+    @patch.object(LTC2990, "get_temperature", return_value=25)
+    @patch.object(IBS, "get_charge_left", return_value=5)
+    def test_low_battery_counter(self, mock_charge, mock_temperature):
+        instrumentation = instrument(self.cleaning_robot)
+
+        self.assertEqual(self.cleaning_robot.execute_command("f"), "!(0,0,N)")
+        self.assertEqual(instrumentation.counters["low_battery"], 1)
+        self.assertNotIn("motor.wait", instrumentation.histograms)
+
+    @patch.object(LTC2990, "get_temperature", return_value=25)
+    @patch.object(IBS, "get_charge_left", return_value=50)
+    @patch.object(GPIO, "input", return_value=True)
+    def test_listener_and_obstacle_counter(self, mock_input, mock_charge, mock_temperature):
+        instrumentation = Instrumentation()
+        events = []
+        instrumentation.add_listener(lambda phase, duration: events.append(phase))
+        instrument(self.cleaning_robot, instrumentation)
+
+        self.assertEqual(self.cleaning_robot.execute_command("f"), "(0,0,N)(0,1)")
+        self.assertEqual(instrumentation.counters["obstacle"], 1)
+        self.assertEqual(events[-1], "execute_command")
+        self.assertIn("gpio.infrared", events)
+
+    @patch.object(LTC2990, "get_temperature", return_value=25)
+    @patch.object(IBS, "get_charge_left")
+    @patch.object(GPIO, "input")
+    def test_batch_counters(self, mock_input, mock_charge, mock_temperature):
+        for fuse_forward in (False, True):
+            with self.subTest(fuse_forward=fuse_forward):
+                mock_input.side_effect = [False, True, False]
+                mock_charge.side_effect = [50, 50, 50, 50, 5]
+                self.cleaning_robot.initialize_robot()
+                instrumentation = instrument(self.cleaning_robot)
+
+                result = self.cleaning_robot.execute_commands("fflfr", fuse_forward=fuse_forward)
+
+                self.assertEqual(result.statuses, ["(0,1,N)", "(0,1,N)(0,2)", "(0,1,E)", "(-1,1,E)", "!(-1,1,E)"])
+                self.assertEqual(instrumentation.counters, {"command.f": 3, "command.l": 1, "command.r": 1,
+                                                            "obstacle": 1, "low_battery": 1})
+
+    @patch.object(LTC2990, "get_temperature", return_value=25)
+    @patch.object(IBS, "get_charge_left", return_value=50)
+    def test_uninstrument_restores_plain_methods(self, mock_charge, mock_temperature):
+        instrumentation = instrument(self.cleaning_robot)
+        uninstrument(self.cleaning_robot)
+
+        self.cleaning_robot.execute_command("f")
+
+        self.assertEqual(instrumentation.histograms, {})
+        self.assertIsNone(self.cleaning_robot.instrumentation)
+        self.assertNotIn("execute_command", vars(self.cleaning_robot))
@@ -0,0 +1,84 @@
+from unittest import TestCase
+from unittest.mock import Mock, patch
+
+from mock import GPIO
+from mock.ibs import IBS
+from mock.ltc2990 import LTC2990
+from src.cleaning_robot import CleaningRobot, CleaningRobotError
+from src.obstacle_memory import ObstacleMemory
+from src.virtual_clock import VirtualClock
+
+
+class TestObstacleMemory(TestCase):
+
+    def setUp(self):
+        GPIO.reset()
+        self.clock = VirtualClock()
+        self.cleaning_robot = CleaningRobot()
+        self.cleaning_robot.initialize_robot()
+        self.memory = ObstacleMemory.for_robot(self.cleaning_robot, ttl=10, clock=self.clock)
+
+    def tearDown(self):
+        GPIO.reset()
+
+    def test_ttl(self):
+        self.memory.remember((1, 2))
+
+        self.clock.now = 10
+        self.assertTrue(self.memory.known((1, 2)))
+        self.clock.now = 10.5
+        self.assertFalse(self.memory.known((1, 2)))
+        self.assertFalse(self.memory.known((3, 3)))
+
+        stats = self.memory.stats()
+        self.assertEqual((stats.hits, stats.misses, stats.expired, stats.size), (1, 2, 1, 0))
+        self.assertAlmostEqual(stats.hit_rate, 1 / 3)
+        self.assertRaises(CleaningRobotError, lambda: ObstacleMemory(ttl=0))
+
+    def test_prune_and_forget(self):
+        self.memory.remember((0, 1))
+        self.clock.now = 5
+        self.memory.remember((0, 2))
+        self.clock.now = 12
+
+        self.assertEqual(self.memory.prune(), 1)
+        self.assertNotIn((0, 1), self.memory)
+        self.assertIn((0, 2), self.memory)
+        self.assertTrue(self.memory.forget((0, 2)))
+        self.assertEqual(len(self.memory), 0)
+
+    @patch.object(LTC2990, "get_temperature", return_value=50)
+    @patch.object(IBS, "get_charge_left", return_value=90)
+    @patch.object(GPIO, "input", return_value=True)
+    @patch.object(CleaningRobot, "activate_wheel_motor")
+    def test_known_obstacle_short_circuits_forward(self, mock_wheel_motor: Mock, infrared_sensor_mock: Mock,
+                                                   mock_charged_battery: Mock, mock_temperature_sensor: Mock):
+        self.assertEqual(self.cleaning_robot.execute_command("f"), "(0,0,N)(0,1)")
+        self.assertEqual(self.cleaning_robot.execute_command("f"), "(0,0,N)(0,1)")
+        self.assertEqual(self.cleaning_robot.execute_commands("ff", fuse_forward=True).statuses,
+                         ["(0,0,N)(0,1)", "(0,0,N)(0,1)"])
+
+        self.assertEqual(infrared_sensor_mock.call_count, 1)
+        self.assertEqual(mock_wheel_motor.call_count, 1)
+        stats = self.memory.stats()
+        self.assertEqual((stats.hits, stats.misses), (3, 1))
+        self.assertEqual(stats.motor_seconds_saved, 3 * CleaningRobot.MOTOR_SECONDS)
+
+        # Once the obstacle is too old the sensor is asked again
+        self.clock.now = 11
+        infrared_sensor_mock.return_value = False
+        self.assertEqual(self.cleaning_robot.execute_command("f"), "(0,1,N)")
+        self.assertEqual(infrared_sensor_mock.call_count, 2)
+
+    @patch.object(LTC2990, "get_temperature", return_value=50)
+    @patch.object(IBS, "get_charge_left", return_value=90)
+    @patch.object(GPIO, "input", return_value=True)
+    def test_memory_is_keyed_by_cell_ahead(self, infrared_sensor_mock: Mock, mock_charged_battery: Mock,
+                                           mock_temperature_sensor: Mock):
+        self.cleaning_robot.execute_command("f")
+        self.cleaning_robot.execute_command("l")
+
+        self.assertEqual(self.cleaning_robot.execute_command("f"), "(0,0,E)(-1,0)")
+        self.assertEqual(infrared_sensor_mock.call_count, 2)
+        self.assertIn((0, 1), self.memory)
+        self.assertIn((-1, 0), self.memory)
@@ -0,0 +1,117 @@
+import random
+from unittest import TestCase
+from unittest.mock import Mock, patch
+
+from mock import GPIO
+from mock.ibs import IBS
+from mock.ltc2990 import LTC2990
+from src.cleaning_robot import CleaningRobot, CleaningRobotError
+from src.path_planner import PathPlanner
+from src.position_state_manager import FORWARD_STEP, Pose, STATE_BY_HEADING
+from src.room_map import RoomMap
+
+
+class TestPathPlanner(TestCase):
+
+    def setUp(self):
+        self.room_map = RoomMap(6, 6)
+        self.planner = PathPlanner(self.room_map)
+
+    def test_plan_straight_ahead(self):
+        self.assertEqual(self.planner.plan(Pose(0, 0, "N"), (0, 3)), "fff")
+
+    def test_plan_already_at_goal(self):
+        self.assertEqual(self.planner.plan(Pose(2, 2, "S"), (2, 2)), "")
+
+    def test_plan_prefers_fewer_turns(self):
+        route = self.planner.plan(Pose(0, 0, "N"), (3, 3))
+
+        self.assertEqual(route.count("f"), 6)
+        self.assertEqual(len(route) - route.count("f"), 1)
+
+    def test_weighted_heuristic_stays_within_bound(self):
+        room_map = RoomMap(30, 30)
+        rng = random.Random(5)
+        for x, y in {(rng.randrange(30), rng.randrange(30)) for _ in range(120)} - {(0, 0), (29, 29)}:
+            room_map.add_obstacle(x, y)
+        planner = PathPlanner(room_map)
+        optimal = planner.plan(Pose(0, 0, "N"), (29, 29))
+        weighted = PathPlanner(room_map, heuristic_weight=1.5).plan(Pose(0, 0, "N"), (29, 29))
+
+        self.assertIsNotNone(weighted)
+        self.assertLessEqual(planner.route_cost(weighted), 1.5 * planner.route_cost(optimal))
+
+    def test_heuristic_weight_below_one(self):
+        self.assertRaises(CleaningRobotError, PathPlanner, self.room_map, heuristic_weight=0.5)
+
+    def test_plan_unreachable(self):
+        self.room_map.add_obstacle(1, 0)
+        self.room_map.add_obstacle(0, 1)
+
+        self.assertIsNone(self.planner.plan(Pose(0, 0, "N"), (3, 3)))
+
+    def test_cache_invalidated_by_new_obstacle(self):
+        self.planner.plan(Pose(0, 0, "N"), (0, 3))
+        self.planner.plan(Pose(0, 0, "N"), (0, 3))
+        self.assertEqual(self.planner.cache_hits, 1)
+
+        self.room_map.record_status("(0,0,N)(0,1)")
+        route = self.planner.plan(Pose(0, 0, "N"), (0, 3))
+
+        self.assertEqual(self.planner.cache_misses, 2)
+        self.assertTrue(route.startswith("l") or route.startswith("r"))
+
+    @patch.object(LTC2990, "get_temperature", return_value=50)
+    @patch.object(CleaningRobot, "activate_wheel_motor")
+    @patch.object(CleaningRobot, "activate_rotation_motor")
+    @patch.object(GPIO, "input", return_value=False)
+    @patch.object(IBS, "get_charge_left", return_value=90)
+    def test_route_drives_robot_to_goal(self, *mocks: Mock):
+        for x, y in [(1, 1), (1, 2), (2, 1), (3, 4)]:
+            self.room_map.add_obstacle(x, y)
+        robot = CleaningRobot()
+        robot.initialize_robot()
+
+        route = self.planner.plan(robot.pose, (4, 5))
+        robot.execute_commands(route)
+
+        self.assertEqual((robot.pos_x, robot.pos_y), (4, 5))
+
+    @patch.object(LTC2990, "get_temperature", return_value=50)
+    @patch.object(CleaningRobot, "activate_wheel_motor")
+    @patch.object(CleaningRobot, "activate_rotation_motor")
+    @patch.object(IBS, "get_charge_left", return_value=90)
+    def test_drive_discovers_obstacles_and_reaches_goal(self, *mocks: Mock):
+        hidden_obstacles = {(0, 2), (1, 4), (2, 2), (3, 5), (4, 3)}
+        robot = CleaningRobot()
+        robot.initialize_robot()
+
+        def infrared_sensor(pin):
+            dx, dy = FORWARD_STEP[STATE_BY_HEADING[robot.heading].index]
+            return (robot.pos_x + dx, robot.pos_y + dy) in hidden_obstacles
+
+        with patch.object(GPIO, "input", side_effect=infrared_sensor):
+            result = self.planner.drive(robot, (2, 5))
+
+        self.assertEqual((robot.pos_x, robot.pos_y), (2, 5))
+        self.assertFalse(result.low_battery)
+        self.assertEqual(result.final_status, robot.robot_status())
+        xs, ys = self.room_map.obstacles()
+        found = set(zip(xs.tolist(), ys.tolist()))
+        self.assertTrue(found <= hidden_obstacles)
+        self.assertEqual(sum(")(" in status for status in result.statuses), len(found))
+
+    @patch.object(LTC2990, "get_temperature", return_value=50)
+    @patch.object(CleaningRobot, "activate_wheel_motor")
+    @patch.object(CleaningRobot, "activate_rotation_motor")
+    @patch.object(GPIO, "input", return_value=True)
+    @patch.object(IBS, "get_charge_left", return_value=90)
+    def test_drive_stops_when_the_goal_is_walled_off(self, *mocks: Mock):
+        robot = CleaningRobot()
+        robot.initialize_robot()
+
+        result = self.planner.drive(robot, (0, 5))
+
+        self.assertEqual((robot.pos_x, robot.pos_y), (0, 0))
+        self.assertFalse(result.low_battery)
+        self.assertIsNone(self.planner.plan(robot.pose, (0, 5)))
@@ -0,0 +1,112 @@
+from unittest import TestCase
+
+from benchmarks import baseline_position_state_manager as baseline
+
+from src.position_state_manager import (PositionStateMachineContext, PositionStatus, NorthState, EastState,
+                                        WestState, SouthState, Pose, STATE_BY_HEADING)
+
+
+class TestPositionStateManager(TestCase):
+
+    def test_pose_from_status(self):
+        pose = Pose.from_status("(2,-1,S)")
+
+        self.assertEqual(pose, Pose(2, -1, "S"))
+        self.assertEqual(str(pose), "(2,-1,S)")
+
+    def test_forward_pose_moves_in_place(self):
+        context = PositionStateMachineContext(WestState())
+        pose = Pose(0, 0, "W")
+
+        obstacle = context.forward_pose(pose, False)
+
+        self.assertIsNone(obstacle)
+        self.assertEqual(pose, Pose(1, 0, "W"))
+
+    def test_forward_pose_with_obstacle(self):
+        context = PositionStateMachineContext(NorthState())
+        pose = Pose(3, 4, "N")
+
+        obstacle = context.forward_pose(pose, True)
+
+        self.assertEqual(obstacle, (3, 5))
+        self.assertEqual(pose, Pose(3, 4, "N"))
+
+    def test_pose_api_matches_string_api(self):
+        for state_type in (NorthState, EastState, WestState, SouthState):
+            string_context = PositionStateMachineContext(state_type())
+            pose_context = PositionStateMachineContext(state_type())
+            status = "(5,5,X)"
+            pose = Pose.from_status(status)
+
+            for command in "lfrffrlfl":
+                if command == "l":
+                    expected = string_context.left_action(status)
+                    pose_context.left_pose(pose)
+                elif command == "r":
+                    expected = string_context.right_action(status)
+                    pose_context.right_pose(pose)
+                else:
+                    expected = string_context.forward_action(status, False)[:3]
+                    pose_context.forward_pose(pose, False)
+                status = f"({expected[0]},{expected[1]},{expected[2]})"
+                self.assertEqual(pose.get_tuple(), expected)
+
+    def test_states_are_flyweights(self):
+        self.assertIs(WestState(), WestState())
+        self.assertIsNot(WestState(), EastState())
+
+    def test_transition_table(self):
+        expected_left = {"N": "E", "E": "S", "W": "N", "S": "N"}
+        expected_right = {"N": "W", "E": "N", "W": "S", "S": "S"}
+        for state_type in (NorthState, EastState, WestState, SouthState):
+            heading = state_type.heading
+            left_pose = Pose(0, 0, heading)
+            right_pose = Pose(0, 0, heading)
+
+            PositionStateMachineContext(state_type()).left_pose(left_pose)
+            PositionStateMachineContext(state_type()).right_pose(right_pose)
+
+            self.assertEqual(left_pose.heading, expected_left[heading])
+            self.assertEqual(right_pose.heading, expected_right[heading])
+
+    def test_state_handlers_match_baseline(self):
+        for heading in "NEWS":
+            for action in ("left", "right", "forward", "obstacle"):
+                status = f"(3,-2,{heading})"
+                current = PositionStateMachineContext(STATE_BY_HEADING[heading])
+                legacy = baseline.PositionStateMachineContext(
+                    {"N": baseline.NorthState, "E": baseline.EastState, "W": baseline.WestState,
+                     "S": baseline.SouthState}[heading]())
+                if action == "left":
+                    result = current.state.handle_left_action(current, PositionStatus(status))
+                    expected = legacy._state.handle_left_action(baseline.PositionStatus(status))
+                elif action == "right":
+                    result = current.state.handle_right_action(current, PositionStatus(status))
+                    expected = legacy._state.handle_right_action(baseline.PositionStatus(status))
+                else:
+                    obstacle = action == "obstacle"
+                    result = current.state.handle_forward_action(PositionStatus(status), obstacle)
+                    expected = legacy._state.handle_forward_action(baseline.PositionStatus(status), obstacle)
+                self.assertEqual(result, expected)
+                self.assertEqual(current.state.heading, type(legacy._state).__name__[0])
+
+    def test_contexts_sharing_a_state_turn_independently(self):
+        first = PositionStateMachineContext(NorthState())
+        second = PositionStateMachineContext(NorthState())
+
+        self.assertIs(first.state, second.state)
+        self.assertEqual(first.state.handle_left_action(first, PositionStatus("(0,0,N)")), (0, 0, "E"))
+        self.assertEqual(second.state.handle_right_action(second, PositionStatus("(0,0,N)")), (0, 0, "W"))
+
+        self.assertIs(first.state, EastState())
+        self.assertIs(second.state, WestState())
+        self.assertFalse(hasattr(NorthState(), "context"))
+
+    def test_turns_are_logged(self):
+        context = PositionStateMachineContext(NorthState())
+
+        with self.assertLogs(level="INFO") as logs:
+            context.left_pose(Pose(0, 0, "N"))
+
+        self.assertEqual(logs.output, ["INFO:root:Context: Transition to EastState"])
@@ -0,0 +1,179 @@
+import asyncio
+import os
+import tempfile
+from unittest import IsolatedAsyncioTestCase, TestCase
+from unittest.mock import Mock, patch
+
+from mock import GPIO
+from mock.ibs import IBS
+from mock.ltc2990 import LTC2990
+from src.cleaning_robot import CleaningRobot, CleaningRobotError
+from src.position_state_manager import Pose
+from src.robot_server import (ERROR, LOW_BATTERY, OBSTACLE, REJECTED, REQUEST, RESPONSE, RobotClient, RobotServer,
+                              decode_response, encode_request, encode_response)
+
+
+class TestFrames(TestCase):
+
+    def test_frame_sizes(self):
+        self.assertEqual(REQUEST.size, 8)
+        self.assertEqual(RESPONSE.size, 24)
+
+    def test_response_round_trip(self):
+        frame = decode_response(encode_response(7, 3, OBSTACLE, Pose(-2, 5, "W"), (-1, 5)))
+
+        self.assertEqual((frame.request_id, frame.robot_id), (7, 3))
+        self.assertEqual(frame.pose, Pose(-2, 5, "W"))
+        self.assertEqual(frame.obstacle, (-1, 5))
+        self.assertEqual(frame.status(), "(-2,5,W)(-1,5)")
+
+    def test_low_battery_status(self):
+        frame = decode_response(encode_response(0, 0, LOW_BATTERY, Pose(0, 1, "N")))
+
+        self.assertTrue(frame.low_battery)
+        self.assertEqual(frame.status(), "!(0,1,N)")
+
+    def test_add_robot_invalid(self):
+        server = RobotServer({1: CleaningRobot()})
+
+        self.assertRaises(CleaningRobotError, server.add_robot, 1)
+        self.assertRaises(CleaningRobotError, server.add_robot, 1 << 16)
+
+
+@patch.object(GPIO, "input", return_value=False)
+@patch.object(IBS, "get_charge_left", return_value=90)
+@patch.object(LTC2990, "get_temperature", return_value=50)
+class TestRobotServer(IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.server = RobotServer()
+        self.server.add_robot(1)
+        self.server.add_robot(2)
+        self.address = await self.server.start_tcp()
+        self.client = await RobotClient.connect_tcp(*self.address)
+
+    async def asyncTearDown(self):
+        await self.client.close()
+        await self.server.close()
+
+    async def test_pipelined_route_matches_sync(self, *mocks: Mock):
+        sync_robot = CleaningRobot()
+        sync_robot.initialize_robot()
+
+        frames = await self.client.execute_commands(1, "ffrflllf")
+
+        self.assertEqual([frame.status() for frame in frames], [sync_robot.execute_command(command)
+                                                                for command in "ffrflllf"])
+        self.assertEqual(self.server.commands_executed, 8)
+
+    async def test_robots_are_multiplexed(self, *mocks: Mock):
+        first = [self.client.send(1, "f") for _ in range(3)]
+        second = [self.client.send(2, command) for command in "rff"]
+
+        frames = await asyncio.gather(*first, *second)
+
+        self.assertEqual(frames[2].pose, Pose(0, 3, "N"))
+        self.assertEqual(frames[5].pose, Pose(2, 0, "W"))
+        self.assertEqual({frame.robot_id for frame in frames}, {1, 2})
+
+    async def test_obstacle(self, mock_temperature_sensor: Mock, mock_battery: Mock, mock_infrared_sensor: Mock):
+        mock_infrared_sensor.return_value = True
+
+        frame = await self.client.request(1, "f")
+
+        self.assertEqual(frame.flags, OBSTACLE)
+        self.assertEqual(frame.pose, Pose(0, 0, "N"))
+        self.assertEqual(frame.obstacle, (0, 1))
+
+    async def test_low_battery(self, mock_temperature_sensor: Mock, mock_battery: Mock, *mocks: Mock):
+        mock_battery.return_value = 9
+
+        frame = await self.client.request(1, "f")
+
+        self.assertEqual(frame.flags, LOW_BATTERY)
+        self.assertEqual(frame.status(), "!(0,0,N)")
+
+    async def test_temperature_high(self, mock_temperature_sensor: Mock, *mocks: Mock):
+        mock_temperature_sensor.return_value = 75
+
+        frame = await self.client.request(1, "f")
+
+        self.assertEqual(frame.flags, ERROR)
+        self.assertFalse(frame.ok)
+        self.assertEqual(self.server.commands_executed, 0)
+
+    async def test_failed_read_keeps_the_robot_served(self, mock_temperature_sensor: Mock, *mocks: Mock):
+        mock_temperature_sensor.side_effect = [OSError("I2C bus error"), 50]
+
+        with self.assertLogs(level="ERROR"):
+            failed, moved, status = await asyncio.wait_for(
+                asyncio.gather(*(self.client.send(1, opcode) for opcode in "ffs")), timeout=5)
+
+        self.assertEqual(failed.flags, ERROR)
+        self.assertEqual(failed.pose, Pose(0, 0, "N"))
+        self.assertEqual(moved.pose, Pose(0, 1, "N"))
+        self.assertEqual(status.pose, Pose(0, 1, "N"))
+
+    async def test_requests_of_a_closed_connection_are_dropped(self, *mocks: Mock):
+        robot = self.server.robots[1]
+        reader, writer = await asyncio.open_connection(*self.address)
+        async with robot._lock:  # Hold the robot so that the requests stay queued
+            writer.write(b"".join(encode_request(request_id, 1, "f") for request_id in range(3)))
+            await writer.drain()
+            # The first request waits for the robot, the others for the first one
+            while 1 not in self.server._queues or self.server._queues[1].qsize() < 2:
+                await asyncio.sleep(0)
+            writer.close()
+            await writer.wait_closed()
+            while len(self.server._writers) > 1:  # Only self.client is left
+                await asyncio.sleep(0)
+
+        frame = await self.client.request(1, "s")
+
+        self.assertEqual(frame.pose, Pose(0, 1, "N"))
+        self.assertEqual(self.server.commands_executed, 1)
+
+    async def test_rejected_requests(self, *mocks: Mock):
+        unknown_robot, unknown_opcode = await asyncio.gather(self.client.send(9, "f"), self.client.send(1, "x"))
+
+        self.assertEqual(unknown_robot.flags, REJECTED)
+        self.assertEqual(unknown_opcode.flags, REJECTED)
+
+    async def test_uninitialized_robot(self, *mocks: Mock):
+        self.server.add_robot(3, CleaningRobot())
+
+        rejected = await self.client.request(3, "f")
+        initialized = await self.client.request(3, "i")
+
+        self.assertEqual(rejected.flags, REJECTED)
+        self.assertEqual(initialized.pose, Pose(0, 0, "N"))
+
+    async def test_frames_split_across_writes(self, *mocks: Mock):
+        reader, writer = await asyncio.open_connection(*self.address)
+        frames = encode_request(5, 1, "f") + encode_request(6, 1, "s")
+        try:
+            writer.write(frames[:3])
+            await writer.drain()
+            writer.write(frames[3:11])
+            await writer.drain()
+            writer.write(frames[11:])
+            first = decode_response(await reader.readexactly(RESPONSE.size))
+            second = decode_response(await reader.readexactly(RESPONSE.size))
+        finally:
+            writer.close()
+            await writer.wait_closed()
+
+        self.assertEqual((first.request_id, second.request_id), (5, 6))
+        self.assertEqual(second.pose, Pose(0, 1, "N"))
+
+    async def test_unix_socket(self, *mocks: Mock):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "robots.sock")
+            await self.server.start_unix(path)
+            client = await RobotClient.connect_unix(path)
+            try:
+                frames = await client.execute_commands(2, "lf")
+            finally:
+                await client.close()
+
+        self.assertEqual(frames[-1].status(), "(-1,0,E)")
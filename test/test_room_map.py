@@ -0,0 +1,73 @@
+from unittest import TestCase
+
+import numpy as np
+
+from src.cleaning_robot import CleaningRobotError
+from src.room_map import RoomMap, parse_obstacle
+
+
+class TestRoomMap(TestCase):
+
+    def setUp(self):
+        self.room_map = RoomMap(10, 5)
+
+    def test_parse_obstacle(self):
+        self.assertEqual(parse_obstacle("(0,0,W)(1,0)"), (1, 0))
+        self.assertEqual(parse_obstacle("(3,-2,E)(2,-2)"), (2, -2))
+        self.assertIsNone(parse_obstacle("(0,1,N)"))
+        self.assertIsNone(parse_obstacle("!(0,1,N)"))
+
+    def test_record_status(self):
+        obstacle = self.room_map.record_status("(0,0,N)(0,1)")
+
+        self.assertEqual(obstacle, (0, 1))
+        self.assertTrue(self.room_map.is_obstacle(0, 1))
+        self.assertFalse(self.room_map.is_obstacle(1, 0))
+        self.assertEqual(self.room_map.version, 1)
+
+    def test_known_obstacle_keeps_version(self):
+        self.room_map.add_obstacle(2, 3)
+
+        self.assertFalse(self.room_map.add_obstacle(2, 3))
+        self.assertEqual(self.room_map.version, 1)
+
+    def test_obstacle_outside_room(self):
+        self.assertFalse(self.room_map.add_obstacle(10, 0))
+        self.assertFalse(self.room_map.is_obstacle(-1, 0))
+        self.assertEqual(self.room_map.outside_obstacles, 1)
+        self.assertEqual(self.room_map.version, 0)
+
+    def test_wall_status_is_counted(self):
+        obstacle = self.room_map.record_status("(0,0,E)(-1,0)")
+
+        self.assertEqual(obstacle, (-1, 0))
+        self.assertEqual(self.room_map.obstacle_count(), 0)
+        self.assertEqual(self.room_map.outside_obstacles, 1)
+
+    def test_bulk_insert_skips_obstacles_outside_room(self):
+        added = self.room_map.add_obstacles(np.array([-1, 3, 10]), np.array([0, 2, 4]))
+
+        self.assertEqual(added, 1)
+        self.assertTrue(self.room_map.is_obstacle(3, 2))
+        self.assertEqual(self.room_map.obstacle_count(), 1)
+        self.assertEqual(self.room_map.outside_obstacles, 2)
+
+    def test_bulk_insert_and_lookup(self):
+        added = self.room_map.add_obstacles(np.array([1, 2, 2]), np.array([1, 4, 4]))
+
+        self.assertEqual(added, 2)
+        lookup = self.room_map.obstacles_at(np.array([1, 2, 3, -1]), np.array([1, 4, 4, 0]))
+        self.assertEqual(lookup.tolist(), [True, True, False, False])
+        xs, ys = self.room_map.obstacles()
+        self.assertEqual(sorted(zip(xs.tolist(), ys.tolist())), [(1, 1), (2, 4)])
+
+    def test_invalid_size(self):
+        self.assertRaises(CleaningRobotError, lambda: RoomMap(0, 5))
+
+    def test_large_room(self):
+        room_map = RoomMap(1000, 1000)
+
+        room_map.add_obstacle(999, 999)
+
+        self.assertEqual(room_map.grid.nbytes, 1000 * 1000)
+        self.assertEqual(room_map.obstacle_count(), 1)
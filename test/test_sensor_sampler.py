@@ -0,0 +1,84 @@
+import time
+from unittest import TestCase
+from unittest.mock import Mock, patch
+
+from mock import GPIO
+from mock.ibs import IBS
+from mock.ltc2990 import LTC2990
+from src.cleaning_robot import CleaningRobot, CleaningRobotError
+from src.sensor_sampler import RingBuffer, SensorSampler
+from src.virtual_clock import VirtualClock
+
+
+class TestSensorSampler(TestCase):
+
+    def setUp(self):
+        self.cleaning_robot = CleaningRobot()
+        self.clock = VirtualClock()
+        self.sampler = SensorSampler.for_robot(self.cleaning_robot, buffer_size=4, max_age=0.5, clock=self.clock)
+
+    def test_ring_buffer_overwrites_oldest(self):
+        buffer = RingBuffer(3)
+        for value in [1, 2, 3, 4, 5]:
+            buffer.append(value, 0.0)
+
+        self.assertEqual(buffer.values().tolist(), [3, 4, 5])
+        stats = buffer.stats()
+        self.assertEqual((stats.samples, stats.latest, stats.mean, stats.minimum, stats.maximum),
+                         (3, 5.0, 4.0, 3.0, 5.0))
+
+    def test_ring_buffer_invalid_size(self):
+        self.assertRaises(CleaningRobotError, lambda: RingBuffer(0))
+
+    @patch.object(LTC2990, "get_temperature", return_value=50)
+    @patch.object(IBS, "get_charge_left", return_value=80)
+    def test_latest_sample_and_staleness(self, mock_battery: Mock, mock_temperature_sensor: Mock):
+        self.sampler.sample_once()
+
+        self.assertEqual(self.sampler.latest_temperature(), 50)
+        self.assertEqual(self.sampler.latest_charge(), 80)
+        self.clock.now = 1.0
+        self.assertIsNone(self.sampler.latest_temperature())
+        self.assertIsNone(self.sampler.latest_charge())
+
+    @patch.object(CleaningRobot, "activate_wheel_motor")
+    @patch.object(GPIO, "input", return_value=False)
+    @patch.object(IBS, "get_charge_left", return_value=90)
+    @patch.object(LTC2990, "get_temperature", return_value=50)
+    def test_execute_command_reads_sampler(self, mock_temperature_sensor: Mock, mock_battery: Mock, *mocks: Mock):
+        self.cleaning_robot.initialize_robot()
+        self.sampler.sample_once()
+        mock_temperature_sensor.reset_mock()
+        mock_battery.reset_mock()
+
+        for _ in range(5):
+            self.cleaning_robot.execute_command("f")
+
+        mock_temperature_sensor.assert_not_called()
+        mock_battery.assert_not_called()
+
+    @patch.object(CleaningRobot, "activate_wheel_motor")
+    @patch.object(IBS, "get_charge_left", return_value=90)
+    @patch.object(LTC2990, "get_temperature")
+    def test_stale_sample_falls_back_to_bus(self, mock_temperature_sensor: Mock, *mocks: Mock):
+        self.cleaning_robot.initialize_robot()
+        mock_temperature_sensor.return_value = 50
+        self.sampler.sample_once()
+        mock_temperature_sensor.return_value = 75
+        self.clock.now = 1.0
+
+        self.assertRaises(CleaningRobotError, lambda: self.cleaning_robot.execute_command("f"))
+
+    @patch.object(IBS, "get_charge_left", return_value=9)
+    @patch.object(LTC2990, "get_temperature", return_value=50)
+    def test_background_thread(self, *mocks: Mock):
+        sampler = SensorSampler.for_robot(self.cleaning_robot, rate_hz=200)
+
+        with sampler:
+            deadline = time.monotonic() + 2
+            while len(sampler.charge) < 3 and time.monotonic() < deadline:
+                time.sleep(0.01)
+            self.cleaning_robot.manage_cleaning_system()
+
+        self.assertGreaterEqual(len(sampler.charge), 3)
+        self.assertTrue(self.cleaning_robot.recharge_led_on)
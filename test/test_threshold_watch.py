@@ -0,0 +1,104 @@
+from unittest import TestCase
+
+from mock import GPIO
+from src.cleaning_robot import CleaningRobot, CleaningRobotError
+from src.threshold_watch import CHARGE, TEMPERATURE, Threshold, ThresholdWatch
+from src.virtual_clock import VirtualClock
+
+
+class FakeSensor:
+    def __init__(self, value):
+        self.value = value
+        self.reads = 0
+
+    def get_temperature(self):
+        self.reads += 1
+        return self.value
+
+    def get_charge_left(self):
+        self.reads += 1
+        return self.value
+
+
+class TestThresholdWatch(TestCase):
+
+    def setUp(self):
+        GPIO.reset()
+        self.clock = VirtualClock()
+        self.thermometer = FakeSensor(30)
+        self.battery = FakeSensor(90)
+        self.cleaning_robot = CleaningRobot()
+        self.cleaning_robot.initialize_robot()
+        self.cleaning_robot.ltc2990 = self.thermometer
+        self.cleaning_robot.ibs = self.battery
+        self.watch = ThresholdWatch.for_robot(self.cleaning_robot, clock=self.clock, min_interval=0.1,
+                                              max_interval=5.0)
+        self.events = []
+        self.watch.add_listener(self.events.append)
+
+    def tearDown(self):
+        GPIO.reset()
+
+    def test_hysteresis(self):
+        threshold = Threshold(trip_at=10, clear_at=15, band=40)
+
+        self.assertTrue(threshold.update(10))
+        self.assertFalse(threshold.update(14))
+        self.assertTrue(threshold.tripped)
+        self.assertTrue(threshold.update(15))
+        self.assertFalse(threshold.tripped)
+        self.assertRaises(CleaningRobotError, lambda: Threshold(10, 10, 40))
+
+    def test_polling_rate_follows_the_margin(self):
+        self.watch.poll()
+        far_interval = self.watch.charge.due - self.clock.now
+
+        self.clock.now = 100
+        self.battery.value = 12
+        self.watch.poll()
+        near_interval = self.watch.charge.due - self.clock.now
+
+        self.assertAlmostEqual(far_interval, 5.0)
+        self.assertLess(near_interval, 0.5)
+
+    def test_sensor_reads_are_not_per_command(self):
+        for _ in range(50):
+            self.cleaning_robot.execute_command("r")
+
+        self.assertEqual(self.thermometer.reads, 1)
+        self.assertEqual(self.battery.reads, 1)
+        self.assertEqual(self.cleaning_robot.last_charge, 90)
+
+    def test_low_battery_blocks_motion_and_switches_cleaning_system(self):
+        self.cleaning_robot.manage_cleaning_system()
+        self.assertTrue(self.cleaning_robot.cleaning_system_on)
+
+        self.battery.value = 9
+        self.clock.now = 10
+        self.assertEqual(self.cleaning_robot.execute_command("f"), "!(0,0,N)")
+        self.assertEqual([(event.sensor, event.tripped) for event in self.events], [(CHARGE, True)])
+        self.assertFalse(self.cleaning_robot.cleaning_system_on)
+        self.assertTrue(self.cleaning_robot.recharge_led_on)
+
+        # Still blocked above the limit until the charge clears the hysteresis band
+        self.battery.value = 12
+        self.clock.now = 20
+        self.assertEqual(self.cleaning_robot.execute_command("f"), "!(0,0,N)")
+        self.battery.value = 15
+        self.clock.now = 30
+        self.assertEqual(self.cleaning_robot.execute_command("f"), "(0,1,N)")
+        self.assertTrue(self.cleaning_robot.cleaning_system_on)
+        self.assertFalse(self.cleaning_robot.recharge_led_on)
+
+    def test_overheating_raises_until_cooled_down(self):
+        self.thermometer.value = 70
+        self.assertRaises(CleaningRobotError, lambda: self.cleaning_robot.execute_command("f"))
+        self.assertEqual(self.events[0].sensor, TEMPERATURE)
+
+        self.thermometer.value = 68
+        self.clock.now = 10
+        self.assertRaises(CleaningRobotError, lambda: self.cleaning_robot.execute_command("f"))
+        self.thermometer.value = 65
+        self.clock.now = 20
+        self.assertEqual(self.cleaning_robot.execute_command("f"), "(0,1,N)")
+        self.assertFalse(self.events[-1].tripped)
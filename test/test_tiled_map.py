@@ -0,0 +1,102 @@
+import os
+import tempfile
+from unittest import TestCase
+
+import numpy as np
+
+from src.cleaning_robot import CleaningRobotError
+from src.tiled_map import CLEANED, OBSTACLE, TiledRoomMap
+
+
+class TestTiledRoomMap(TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "hall")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def tile_files(self):
+        return sorted(name for name in os.listdir(self.path) if name.startswith("tile_"))
+
+    def test_negative_coordinates(self):
+        with TiledRoomMap(self.path, tile_size=4) as room_map:
+            self.assertTrue(room_map.add_obstacle(-1, -1))
+            self.assertFalse(room_map.add_obstacle(-1, -1))
+            self.assertTrue(room_map.mark_cleaned(-5, 3))
+
+            self.assertTrue(room_map.is_obstacle(-1, -1))
+            self.assertFalse(room_map.is_obstacle(3, 3))
+            self.assertEqual(room_map.flags(-5, 3), CLEANED)
+            self.assertEqual(room_map.record_status("(0,0,E)(-1,0)"), (-1, 0))
+            self.assertTrue(room_map.is_obstacle(-1, 0))
+
+        self.assertEqual(self.tile_files(), ["tile_-1_-1.u8", "tile_-1_0.u8", "tile_-2_0.u8"])
+
+    def test_clear_cleaned_keeps_obstacles(self):
+        room_map = TiledRoomMap(self.path, tile_size=4, max_open_tiles=1)
+        room_map.mark_cleaned(0, 0)
+        room_map.mark_cleaned(9, 9)
+        room_map.add_obstacle(1, 0)
+        room_map.mark_cleaned(1, 0)
+
+        self.assertEqual(room_map.clear_cleaned(), 3)
+        self.assertEqual(room_map.flags(0, 0), 0)
+        self.assertEqual(room_map.flags(9, 9), 0)
+        self.assertEqual(room_map.flags(1, 0), OBSTACLE)
+        room_map.close()
+
+    def test_tiles_persist_and_load_lazily(self):
+        with TiledRoomMap(self.path, tile_size=8) as room_map:
+            room_map.add_obstacle(100, 200)
+            room_map.add_obstacle(-300, 7)
+
+        # The tile size of an existing map wins
+        with TiledRoomMap(self.path, tile_size=64) as room_map:
+            self.assertEqual(room_map.tile_size, 8)
+            self.assertEqual(room_map.open_tiles, 0)
+            self.assertTrue(room_map.is_obstacle(100, 200))
+            self.assertEqual(room_map.open_tiles, 1)
+            self.assertTrue(room_map.is_obstacle(-300, 7))
+            # Reading cells of tiles never written creates nothing
+            self.assertTrue(room_map.is_free(5000, -5000))
+            self.assertEqual(room_map.preload(100, 200, radius=2), 1)
+        self.assertEqual(len(self.tile_files()), 2)
+
+    def test_eviction_flushes_dirty_tiles(self):
+        room_map = TiledRoomMap(self.path, tile_size=4, max_open_tiles=2, flush_after_writes=None)
+        for x in range(0, 40, 4):
+            room_map.add_obstacle(x, 0)
+            self.assertLessEqual(room_map.open_tiles, 2)
+        self.assertEqual(room_map.dirty_tiles, 2)
+
+        for x in range(0, 32, 4):
+            self.assertEqual(np.fromfile(os.path.join(self.path, f"tile_{x // 4}_0.u8"), dtype=np.uint8)[0], OBSTACLE)
+        self.assertTrue(room_map.is_obstacle(0, 0))
+        room_map.close()
+
+    def test_flush_after_writes(self):
+        room_map = TiledRoomMap(self.path, tile_size=4, flush_after_writes=3)
+        room_map.add_obstacle(0, 0)
+        room_map.add_obstacle(1, 0)
+        self.assertEqual(room_map.dirty_tiles, 1)
+        room_map.add_obstacle(2, 0)
+        self.assertEqual(room_map.dirty_tiles, 0)
+        self.assertTrue(room_map.remove_obstacle(2, 0))
+        self.assertFalse(room_map.remove_obstacle(2, 0))
+        self.assertEqual(room_map.version, 4)
+        room_map.close()
+
+    def test_region_spans_tiles(self):
+        with TiledRoomMap(self.path, tile_size=4) as room_map:
+            room_map.add_obstacle(-1, -1)
+            room_map.add_obstacle(4, 2)
+
+            region = room_map.region(-2, -2, 6, 3)
+
+        self.assertEqual(region.shape, (5, 8))
+        self.assertEqual([(int(x) - 2, int(y) - 2) for y, x in zip(*np.nonzero(region))], [(-1, -1), (4, 2)])
+
+    def test_invalid_tile_size(self):
+        self.assertRaises(CleaningRobotError, lambda: TiledRoomMap(self.path, tile_size=100))
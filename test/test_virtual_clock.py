@@ -0,0 +1,75 @@
+import math
+import time
+from unittest import TestCase
+
+from mock import GPIO
+from src.cleaning_robot import CleaningRobot, CleaningRobotError
+from src.sensor_sampler import SensorSampler
+from src.virtual_clock import SimulatedBattery, SimulatedThermalSensor, VirtualClock, VirtualHardware
+
+
+class TestVirtualClock(TestCase):
+
+    def setUp(self):
+        GPIO.reset()
+        self.hardware = VirtualHardware()
+        self.cleaning_robot = self.hardware.attach(CleaningRobot())
+        self.cleaning_robot.initialize_robot()
+
+    def test_timers_fire_at_simulated_times(self):
+        clock = VirtualClock()
+        fired = []
+        clock.every(1.5, lambda: fired.append(clock.now))
+
+        clock.advance(4)
+
+        self.assertEqual(fired, [1.5, 3.0])
+        self.assertEqual(clock.now, 4)
+
+    def test_negative_advance(self):
+        self.assertRaises(CleaningRobotError, lambda: VirtualClock().advance(-1))
+
+    def test_motor_activation_advances_clock(self):
+        self.cleaning_robot.execute_commands("frf")
+
+        self.assertEqual(self.hardware.clock.now, 3 * CleaningRobot.MOTOR_SECONDS)
+        self.assertAlmostEqual(self.hardware.battery.motor_seconds, 3.0)
+
+    def test_battery_drain_is_step_independent(self):
+        clock = VirtualClock()
+        battery = SimulatedBattery(clock)
+        thermal = SimulatedThermalSensor(clock)
+        for _ in range(100):
+            clock.advance(1, motor_running=True)
+
+        equilibrium = thermal.ambient + thermal.motor_heating_per_second * thermal.time_constant
+        expected_temperature = equilibrium + (thermal.ambient - equilibrium) * math.exp(-100 / thermal.time_constant)
+        self.assertAlmostEqual(battery.charge, 100 - 100 * battery.motor_drain_per_second)
+        self.assertAlmostEqual(thermal.temperature, expected_temperature)
+
+    def test_eight_hour_shift_replays_quickly(self):
+        self.hardware.record_every(600)
+        sampler = SensorSampler.for_robot(self.cleaning_robot, rate_hz=1, clock=self.hardware.clock)
+        self.hardware.clock.every(sampler.period, sampler.sample_once)
+        shift = 8 * 3600
+
+        started = time.perf_counter()
+        result = self.cleaning_robot.execute_commands("ffffrfffflfff" * (shift // 13 + 1))
+        elapsed = time.perf_counter() - started
+
+        self.assertLess(elapsed, 10)
+        self.assertFalse(result.low_battery)
+        self.assertGreaterEqual(self.hardware.clock.now, shift)
+        self.assertEqual(len(self.hardware.times), int(self.hardware.clock.now // 600))
+        self.assertLess(self.hardware.charges[-1], self.hardware.charges[0])
+        self.assertGreater(max(self.hardware.temperatures), self.hardware.thermal.ambient + 30)
+        self.assertEqual(len(sampler.temperature), sampler.temperature.size)
+
+    def test_low_battery_stops_replay(self):
+        self.hardware.battery.charge = 11.5
+
+        result = self.cleaning_robot.execute_commands("f" * 1000)
+
+        self.assertTrue(result.low_battery)
+        self.assertTrue(result.final_status.startswith("!"))
+        self.assertAlmostEqual(len(result.statuses), 0.5 / self.hardware.battery.motor_drain_per_second, delta=2)